@@ -0,0 +1,447 @@
+# api.py
+# Optional local HTTP/JSON API over the open board, for scripts and bots (main.py --api).
+#
+#   GET    /tasks[?column=todo&label=<id>]     GET    /labels
+#   POST   /tasks            {"title": ...}    POST   /labels          {"name": ..., "color": "#rrggbb"}
+#   GET    /tasks/<id>                         GET    /labels/<id>
+#   PATCH  /tasks/<id>       {"progress": 40}  PATCH  /labels/<id>     {"name": ...}
+#   POST   /tasks/<id>/move  {"column": "done"}
+#   DELETE /tasks/<id>                         DELETE /labels/<id>
+#
+# Task bodies use cli.py's row format (title, progress, label or label_id, column).
+# The server runs an asyncio loop on its own thread and only parses requests and
+# writes responses. Every request is handed to the GUI thread, and the ones that
+# arrived together are applied as one batch (see apply()): one backend batch and
+# one UI pass, so a burst of updates costs one save and one refresh, not one each.
+
+import asyncio
+import ipaddress
+import json
+import os
+import re
+import stat
+import sys
+import threading
+from concurrent.futures import Future, InvalidStateError
+from http import HTTPStatus
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+from PyQt5 import QtCore
+import perf
+import sync
+from boards import Board
+from cli import LabelMap, RowError, parse_row
+from models import Label, Task
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# requests arriving within this long of the first one are applied together
+API_BATCH_MS = 5
+
+# larger request bodies are refused
+MAX_BODY = 1 << 20
+
+_COLOR = re.compile(r"^#[0-9a-fA-F]{6}$")
+
+# the answer to calls still open when the server stops
+SHUTTING_DOWN = {"error": "the app is shutting down"}
+
+
+class ApiError(Exception):
+    """A request that can't be served; becomes an HTTP error with a JSON {"error": ...} body."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Call:
+    """One request, answered through `future` with (status, JSON payload) once the GUI thread has run it."""
+    __slots__ = ("method", "path", "query", "body", "future")
+
+    def __init__(self, method: str, path: str, query: Dict[str, List[str]], body: Optional[dict]):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+        self.future: Future = Future()
+
+    def respond(self, status: int, payload):
+        try:
+            self.future.set_result((status, payload))
+        except InvalidStateError:
+            # given up on when the server stopped (it already answered 503)
+            pass
+
+
+def parse_address(text: str) -> Tuple[str, object]:
+    """("unix", path) for "unix:PATH", else ("tcp", (host, port)) for a loopback "HOST:PORT"."""
+    if text.startswith("unix:"):
+        return "unix", text[len("unix:"):]
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"expected HOST:PORT or unix:PATH, got {text!r}")
+    host = host.strip("[]") or "127.0.0.1"
+    if host != "localhost" and not ipaddress.ip_address(host).is_loopback:
+        # anyone who can reach the port can edit the board
+        raise ValueError(f"the API only listens on loopback addresses, not {host!r}")
+    return "tcp", (host, int(port))
+
+
+class ApiServer(QtCore.QObject):
+    """Serves the API on `address` from its own thread; `handler` runs each batch of calls on the GUI thread.
+
+    `handler` must answer every call it is given (Call.respond).
+    """
+    # emitted by the server thread for every parsed request
+    _received = QtCore.pyqtSignal(object)
+
+    def __init__(self, address: str, handler: Callable[[List[Call]], None], parent=None):
+        super().__init__(parent)
+        self.kind, self.address = parse_address(address)
+        self.handler = handler
+        self._pending: List[Call] = []
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(API_BATCH_MS)
+        self._timer.timeout.connect(self._drain)
+        self._received.connect(self._on_received)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # the _serve tasks of the open connections (server thread only)
+        self._connections: Set[asyncio.Task] = set()
+        self._stopped = False
+
+    def start(self):
+        """Start listening; raises OSError if the address can't be bound."""
+        started = Future()
+        self._thread = threading.Thread(target=self._run, args=(started,), name="taskapp-api", daemon=True)
+        self._thread.start()
+        started.result()
+
+    def _run(self, started: Future):
+        # server thread
+        self._loop = asyncio.new_event_loop()
+        try:
+            if self.kind == "unix":
+                if os.path.exists(self.address) and stat.S_ISSOCK(os.stat(self.address).st_mode):
+                    # left behind by an instance that didn't shut down
+                    os.unlink(self.address)
+                server = self._loop.run_until_complete(asyncio.start_unix_server(self._serve, self.address))
+            else:
+                server = self._loop.run_until_complete(asyncio.start_server(self._serve, *self.address))
+        except OSError as e:
+            started.set_exception(e)
+            self._loop.close()
+            return
+        started.set_result(None)
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            # wait_closed() waits for every client connection to close
+            self._loop.run_until_complete(self._close_connections())
+            self._loop.run_until_complete(server.wait_closed())
+            self._loop.close()
+
+    async def _close_connections(self):
+        """End the open connections: idle keep-alive ones and ones waiting for a call the GUI thread won't run now."""
+        tasks = list(self._connections)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One connection: requests are answered in order while the client keeps it open."""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        call = None
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except ApiError as e:
+                    writer.write(_response(e.status, {"error": e.message}, keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                call, keep_alive = request
+                self._received.emit(call)
+                status, payload = await asyncio.wrap_future(call.future)
+                call = None
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # stopping (see _close_connections); close() still sends what was written
+            if call is not None:
+                writer.write(_response(503, SHUTTING_DOWN, keep_alive=False))
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    def _on_received(self, call: Call):
+        if self._stopped:
+            call.respond(503, SHUTTING_DOWN)
+            return
+        self._pending.append(call)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _drain(self):
+        calls, self._pending = self._pending, []
+        perf.count("api.calls", len(calls))
+        with perf.timed("api.batch"):
+            self.handler(calls)
+
+    def stop(self):
+        """Stop listening and close every connection; requests not run yet are answered 503."""
+        self._stopped = True
+        self._timer.stop()
+        calls, self._pending = self._pending, []
+        for call in calls:
+            call.respond(503, SHUTTING_DOWN)
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[Call, bool]]:
+    """The next request on a connection as (call, keep-alive), or None once the client is done."""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise ApiError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise ApiError(400, "bad Content-Length")
+    if length > MAX_BODY:
+        raise ApiError(413, f"request bodies are limited to {MAX_BODY} bytes")
+    body = None
+    if length:
+        try:
+            body = json.loads(await reader.readexactly(length))
+        except ValueError as e:
+            raise ApiError(400, f"the body is not JSON ({e})")
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    url = urlsplit(target)
+    return Call(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), body), keep_alive
+
+
+def _response(status: int, payload, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+# Applying calls to a board. Runs on the GUI thread; each route returns (status, payload)
+# and records what it changed in `changes`, which MainWindow then shows in one pass.
+
+def apply(board: Board, calls: List[Call]) -> sync.Changes:
+    """Run `calls` against `board` as one backend batch and answer each of them."""
+    changes = sync.Changes()
+    with board.backend.batch():
+        for call in calls:
+            try:
+                status, payload = _dispatch(board, call, changes)
+            except ApiError as e:
+                status, payload = e.status, {"error": e.message}
+            except Exception as e:
+                # one broken call must not leave the others in the batch unanswered
+                print(f"api: {call.method} {call.path} failed: {e!r}", file=sys.stderr)
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            call.respond(status, payload)
+    return changes
+
+
+def _dispatch(board: Board, call: Call, changes: sync.Changes) -> Tuple[int, object]:
+    for method, pattern, route in _ROUTES:
+        match = pattern.fullmatch(call.path)
+        if match is None or method != call.method:
+            continue
+        if method in ("POST", "PATCH") and not isinstance(call.body, dict):
+            raise ApiError(400, "expected a JSON object body")
+        return route(board, call, changes, *match.groups())
+    if any(pattern.fullmatch(call.path) for _, pattern, _ in _ROUTES):
+        raise ApiError(405, f"{call.method} is not supported on {call.path}")
+    raise ApiError(404, f"no such resource: {call.path}")
+
+
+def _task(board: Board, task_id: str) -> Task:
+    task = board.store.get(task_id)
+    if task is None:
+        raise ApiError(404, f"no task {task_id!r}")
+    return task
+
+
+def _label(board: Board, label_id: str) -> Label:
+    label = next((l for l in board.labels if l.id == label_id), None)
+    if label is None:
+        raise ApiError(404, f"no label {label_id!r}")
+    return label
+
+
+def _parse_task(board: Board, raw: dict, changes: sync.Changes) -> Task:
+    """Validate a task body like an imported row; label names it doesn't know become new labels."""
+    labels = LabelMap(board.labels)
+    try:
+        task = parse_row(raw, labels)
+    except RowError as e:
+        raise ApiError(400, str(e))
+    for label in labels.take_new():
+        board.labels.append(label)
+        board.backend.put_label(label)
+        changes.labels.add(label.id)
+    return task
+
+
+def list_tasks(board: Board, call: Call, changes: sync.Changes):
+    column = call.query.get("column", [None])[0]
+    label_id = call.query.get("label", [None])[0]
+    # straight from the store's column and label indexes
+    if column is not None:
+        tasks = board.store.column(column)
+        if label_id is not None:
+            tasks = [t for t in tasks if t.label_id == label_id]
+    elif label_id is not None:
+        tasks = board.store.with_label(label_id)
+    else:
+        tasks = board.store.all()
+    return 200, [t.to_dict() for t in tasks]
+
+
+def get_task(board: Board, call: Call, changes: sync.Changes, task_id: str):
+    return 200, _task(board, task_id).to_dict()
+
+
+def create_task(board: Board, call: Call, changes: sync.Changes):
+    task = _parse_task(board, call.body, changes)
+    if task.id in board.store:
+        raise ApiError(409, f"task {task.id!r} already exists")
+    column, done_at = task.column, task.done_at
+    task.column = "todo"
+    board.store.add(task)
+    if column != task.column:
+        # stamps done_at like a move in the UI, unless the body had one
+        board.store.move(task, column)
+        task.done_at = done_at or task.done_at
+    board.backend.put_task(task)
+    board.search.add(task)
+    changes.added.append(task)
+    return 201, task.to_dict()
+
+
+def update_task(board: Board, call: Call, changes: sync.Changes, task_id: str):
+    return _update_task(board, _task(board, task_id), call.body, changes)
+
+
+def move_task(board: Board, call: Call, changes: sync.Changes, task_id: str):
+    if "column" not in call.body:
+        raise ApiError(400, "missing column")
+    return _update_task(board, _task(board, task_id), {"column": call.body["column"]}, changes)
+
+
+def _update_task(board: Board, task: Task, body: dict, changes: sync.Changes):
+    """Apply the fields in `body`, validated like a whole task; a new column moves it."""
+    raw = {**task.to_dict(), **body, "id": task.id}
+    if "label" in body and "label_id" not in body:
+        del raw["label_id"]
+    new = _parse_task(board, raw, changes)
+    task.title, task.progress, task.label_id = new.title, new.progress, new.label_id
+    if new.column != task.column:
+        board.store.move(task, new.column)
+    else:
+        board.store.update(task)
+    board.backend.put_task(task)
+    board.search.update(task)
+    changes.updated.append(task)
+    return 200, task.to_dict()
+
+
+def delete_task(board: Board, call: Call, changes: sync.Changes, task_id: str):
+    task = _task(board, task_id)
+    board.store.remove(task_id)
+    board.backend.delete_task(task_id)
+    board.search.remove(task_id)
+    changes.removed.append(task)
+    return 200, {"deleted": task_id}
+
+
+def list_labels(board: Board, call: Call, changes: sync.Changes):
+    return 200, [l.to_dict() for l in board.labels]
+
+
+def get_label(board: Board, call: Call, changes: sync.Changes, label_id: str):
+    return 200, _label(board, label_id).to_dict()
+
+
+def _label_fields(body: dict, name: str, color: str) -> Tuple[str, str]:
+    name = str(body.get("name", name)).strip()
+    color = str(body.get("color", color))
+    if not name:
+        raise ApiError(400, "missing name")
+    if not _COLOR.match(color):
+        raise ApiError(400, f"color {color!r} is not #rrggbb")
+    return name, color
+
+
+def create_label(board: Board, call: Call, changes: sync.Changes):
+    label = Label.new(*_label_fields(call.body, "", "#777777"))
+    board.labels.append(label)
+    board.backend.put_label(label)
+    changes.labels.add(label.id)
+    return 201, label.to_dict()
+
+
+def update_label(board: Board, call: Call, changes: sync.Changes, label_id: str):
+    label = _label(board, label_id)
+    label.name, label.color = _label_fields(call.body, label.name, label.color)
+    board.backend.put_label(label)
+    changes.labels.add(label_id)
+    return 200, label.to_dict()
+
+
+def delete_label(board: Board, call: Call, changes: sync.Changes, label_id: str):
+    board.labels.remove(_label(board, label_id))
+    affected = board.store.clear_label(label_id)
+    for t in affected:
+        board.backend.put_task(t)
+    board.backend.delete_label(label_id)
+    changes.updated += affected
+    changes.labels.add(label_id)
+    return 200, {"deleted": label_id}
+
+
+_ROUTES = [(method, re.compile(pattern), route) for method, pattern, route in [
+    ("GET", r"/tasks", list_tasks),
+    ("POST", r"/tasks", create_task),
+    ("GET", r"/tasks/([^/]+)", get_task),
+    ("PATCH", r"/tasks/([^/]+)", update_task),
+    ("DELETE", r"/tasks/([^/]+)", delete_task),
+    ("POST", r"/tasks/([^/]+)/move", move_task),
+    ("GET", r"/labels", list_labels),
+    ("POST", r"/labels", create_label),
+    ("GET", r"/labels/([^/]+)", get_label),
+    ("PATCH", r"/labels/([^/]+)", update_label),
+    ("DELETE", r"/labels/([^/]+)", delete_label),
+]]
@@ -0,0 +1,116 @@
+# archive.py
+# Cold storage for finished tasks: old "done" tasks leave the board for a gzip file that is only read on demand.
+#
+# The archive is a gzip stream of JSON lines, one task (Task.to_dict()) per line.
+# Archiving appends a new gzip member, so nothing already archived is rewritten;
+# restoring rewrites the file without the restored tasks. The archive is never
+# read at startup: the "Archived" view streams it while the user searches.
+
+import gzip
+import json
+import os
+import time
+import zlib
+from pathlib import Path
+from typing import Collection, Dict, Iterator, List, Optional
+from models import Task, Label
+from search import Query
+from store import DONE_COLUMN
+import perf
+
+# finished tasks older than this many days are archived (0 disables the age rule)
+ARCHIVE_AFTER_DAYS = float(os.environ.get("TASKAPP_ARCHIVE_DAYS", "30"))
+
+# at most this many finished tasks stay on the board, the most recently finished ones (0: no cap)
+DONE_KEEP = int(os.environ.get("TASKAPP_DONE_KEEP", "500"))
+
+# results the "Archived" view reads per page
+ARCHIVE_PAGE = 50
+
+
+def due(done: List[Task], now: Optional[float] = None, max_age_days: Optional[float] = None,
+        keep: Optional[int] = None) -> List[Task]:
+    """The finished tasks that should move to the archive.
+
+    A task goes once it has been done for more than `max_age_days`, or when more
+    than `keep` tasks are done; then the ones finished longest ago go first, and
+    tasks with no done_at (finished before it was recorded) count as the oldest.
+    Both default to the module settings at call time (ARCHIVE_AFTER_DAYS, DONE_KEEP).
+    """
+    now = time.time() if now is None else now
+    max_age_days = ARCHIVE_AFTER_DAYS if max_age_days is None else max_age_days
+    keep = DONE_KEEP if keep is None else keep
+    cutoff = now - max_age_days * 86400 if max_age_days > 0 else None
+    old = [t for t in done if cutoff is not None and t.done_at is not None and t.done_at < cutoff]
+    if keep <= 0 or len(done) - len(old) <= keep:
+        return old
+    old_ids = {t.id for t in old}
+    rest = sorted((t for t in done if t.id not in old_ids), key=lambda t: -1.0 if t.done_at is None else t.done_at)
+    return old + rest[:len(rest) - keep]
+
+
+class Archive:
+    """The archive file of one board."""
+    def __init__(self, path: Path):
+        self.path = path
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def add(self, tasks: List[Task]):
+        """Append `tasks` as one new gzip member (fsynced before the caller drops them from the board)."""
+        if not tasks:
+            return
+        with perf.timed("archive.add"):
+            data = "".join(json.dumps(t.to_dict(), separators=(",", ":")) + "\n" for t in tasks).encode("utf-8")
+            with open(self.path, "ab") as f:
+                f.write(gzip.compress(data))
+                f.flush()
+                os.fsync(f.fileno())
+        perf.count("archive.tasks_added", len(tasks))
+
+    def __iter__(self) -> Iterator[Task]:
+        """Stream every archived task, oldest archived first."""
+        if not self.path.exists():
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        raw = json.loads(line)
+                    except ValueError:
+                        # a torn last member from a crash mid-append
+                        return
+                    yield Task.from_dict(raw)
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                return
+
+    def search(self, query: Optional[Query], label_lookup: Dict[str, Label]) -> Iterator[Task]:
+        """Archived tasks matching `query` (all of them for None), read lazily as the caller pulls."""
+        for t in self:
+            if query is None or query.matches(t, label_lookup):
+                yield t
+
+    def remove(self, task_ids: Collection[str]):
+        """Drop tasks from the archive (after they were restored to the board)."""
+        if not task_ids or not self.path.exists():
+            return
+        with perf.timed("archive.remove"):
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                for t in self:
+                    if t.id not in task_ids:
+                        out.write((json.dumps(t.to_dict(), separators=(",", ":")) + "\n").encode("utf-8"))
+                out.close()
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp, self.path)
+
+
+def restored(task: Task) -> Task:
+    """`task` as it goes back on the board: finished just now, so it isn't archived again right away,
+    and at the end of its column (its old rank is dropped)."""
+    if task.column == DONE_COLUMN:
+        task.done_at = time.time()
+    task.rank = None
+    return task
@@ -0,0 +1,255 @@
+# bench.py
+# Headless benchmarks for the load/save/refresh/scale paths on synthetic boards.
+#
+#   python bench.py                          # 100, 1k, 10k and 100k tasks
+#   python bench.py --sizes 100 1000 -o out.json
+#   python bench.py --virtual                # same, with virtualized columns
+#
+# Runs on the "offscreen" Qt platform and prints one JSON document with wall time
+# and peak (Python-heap) memory per operation, so runs can be diffed across versions;
+# "task_memory" reports the retained bytes per loaded Task, and "startup" (and
+# "startup_progressive") a cold start of main.py in a fresh interpreter: time to
+# window, its stages, and the slowest imports as `python -X importtime` reports them.
+
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import json
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from PyQt5 import QtWidgets, QtCore
+import storage
+import archive
+from models import Task, Label
+from ui import COLUMN_ORDER
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+LABEL_COLORS = ["#4CAF50", "#F44336", "#2196F3", "#FF9800", "#9C27B0", "#00BCD4"]
+
+def make_board(n: int, seed: int = 0):
+    """A reproducible board: n tasks spread over every column and label (some unlabeled)."""
+    rng = random.Random(seed)
+    labels = [Label.new(f"Label {i}", c) for i, c in enumerate(LABEL_COLORS)]
+    columns = [key for key, _ in COLUMN_ORDER]
+    tasks = []
+    for i in range(n):
+        label = rng.choice(labels + [None])
+        t = Task.new(f"Task {i} " + " ".join(rng.choice(["fix", "add", "review", "ship", "docs", "ui"]) for _ in range(3)),
+                     label.id if label else None)
+        t.progress = rng.randint(0, 100)
+        t.column = rng.choice(columns)
+        tasks.append(t)
+    return tasks, labels
+
+def measure(name: str, fn: Callable[[], None], app: QtWidgets.QApplication) -> Dict[str, object]:
+    """Run `fn` once (plus pending Qt events) and return its wall time and peak traced memory."""
+    app.processEvents()
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    app.processEvents()
+    wall = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"op": name, "wall_ms": round(wall * 1000, 3), "peak_bytes": peak}
+
+# slowest top-level imports listed per startup run
+STARTUP_IMPORTS = 8
+
+def startup(data_file: Path, virtual: bool, progressive: bool) -> Dict[str, object]:
+    """Start main.py on `data_file` in a new process and read its --startup-report.
+
+    All times are in ms from spawning the process: "time_to_window_ms" is its first
+    paint, "process_ms" when the report arrived (with --progressive, after the
+    last card). The stage times come from the report, shifted by the
+    interpreter's own startup.
+    """
+    cmd = [sys.executable, "-X", "importtime", str(Path(__file__).with_name("main.py")), "--startup-report"]
+    if virtual:
+        cmd.append("--virtual")
+    if progressive:
+        cmd.append("--progressive")
+    env = dict(os.environ, TASKAPP_DATA=str(data_file))
+    # -X importtime writes to stderr; a file can't fill up and stall the child like a pipe
+    with tempfile.TemporaryFile("w+") as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, stdout=subprocess.PIPE, stderr=err, text=True)
+        line = proc.stdout.readline()
+        process_ms = (time.perf_counter() - start) * 1000
+        proc.stdout.close()
+        proc.wait()
+        err.seek(0)
+        importtime = err.read()
+    if not line:
+        raise RuntimeError(f"main.py --startup-report failed:\n{importtime[-2000:]}")
+    report = json.loads(line)
+    tasks = report.pop("tasks")
+    # what came before the first import in main.py: the interpreter and site
+    offset = process_ms - max(report.values())
+    imports = []
+    for row in importtime.splitlines():
+        # "import time: self [us] | cumulative | name", nested imports are indented
+        parts = row.split("|")
+        if len(parts) == 3 and row.startswith("import time:") and parts[2][1:2] != " " and parts[1].strip().isdigit():
+            imports.append((parts[2].strip(), int(parts[1]) / 1000))
+    imports.sort(key=lambda i: i[1], reverse=True)
+    return {"op": "startup_progressive" if progressive else "startup", "tasks": tasks,
+            "time_to_window_ms": round(offset + report["first_paint"], 1), "process_ms": round(process_ms, 1),
+            "stages_ms": {stage: round(offset + ms, 1) for stage, ms in report.items()},
+            "slowest_imports_ms": [[name, round(ms, 1)] for name, ms in imports[:STARTUP_IMPORTS]]}
+
+def task_memory(tasks: List[Task]) -> Dict[str, object]:
+    """Retained memory per Task when a board is loaded from its JSON form (as load_data does)."""
+    text = json.dumps([t.to_dict() for t in tasks])
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    raws = json.loads(text)
+    loaded = [Task.from_dict(r) for r in raws]
+    del raws  # only the tasks stay alive after a load
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"op": "task_memory", "bytes_per_task": round((retained - before) / max(1, len(loaded)), 1),
+            "retained_bytes": retained - before}
+
+def _card(window, key: str):
+    """The interactive card for the first task in column `key` (a TaskWidget or a virtual-row editor)."""
+    col = window.columns[key]
+    if window.virtual:
+        index = col.model.index(0)
+        col._open_editor(index)
+        return col.view.indexWidget(index)
+    return next(iter(col.task_widgets.values()), None)
+
+def bench_size(n: int, app: QtWidgets.QApplication, virtual: bool) -> List[Dict[str, object]]:
+    """Every benchmark on an n-task board, written to a temporary folder that is removed afterwards."""
+    workdir = Path(tempfile.mkdtemp(prefix=f"taskbench{n}-"))
+    try:
+        return _bench_board(n, app, virtual, workdir)
+    finally:
+        # the JSON, SQLite and snapshot copies of the board (and the extra "bench" board)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _bench_board(n: int, app: QtWidgets.QApplication, virtual: bool, workdir: Path) -> List[Dict[str, object]]:
+    import main  # after QApplication exists
+    results = []
+    tasks, labels = make_board(n)
+    storage.DATA_FILE = workdir / "tasks.json"
+
+    results.append(task_memory(tasks))
+    results.append(measure("save_data", lambda: storage.save_data(tasks, labels), app))
+    for progressive in (False, True):
+        results.append(startup(storage.DATA_FILE, virtual, progressive))
+    results.append(measure("load_data", storage.load_data, app))
+    binary = storage.BINARY_SNAPSHOT
+    storage.BINARY_SNAPSHOT = True
+    try:
+        results.append(measure("save_data_binary", lambda: storage.save_data(tasks, labels), app))
+        results.append(measure("load_data_binary", storage.load_data, app))
+    finally:
+        storage.BINARY_SNAPSHOT = binary
+
+    # MainWindow archives finished tasks on load; keep the whole board on it so every
+    # step runs on n tasks, and measure archiving on its own below
+    archive_settings = archive.DONE_KEEP, archive.ARCHIVE_AFTER_DAYS
+    archive.DONE_KEEP, archive.ARCHIVE_AFTER_DAYS = 0, 0
+
+    holder = {}
+    def build():
+        holder["w"] = main.MainWindow(app, backend="json", virtual=virtual)
+        holder["w"].show()
+    results.append(measure("window_init", build, app))
+    window = holder["w"]
+
+    results.append(measure("refresh_columns", window.refresh_columns, app))
+
+    card = _card(window, "todo")
+    if card is not None:
+        results.append(measure("task_move", lambda: card._move("right"), app))
+        # the move may have destroyed a virtual editor; pick the card again
+        card = _card(window, "todo") or _card(window, "in_progress")
+        def drag():
+            for v in range(100):
+                card._on_progress_change(v)
+        results.append(measure("slider_drag_100", drag, app))
+
+    def bulk_move():
+        window.columns["todo"].select_all()
+        window._bulk_move("in_progress")
+    results.append(measure("bulk_move_column", bulk_move, app))
+
+    def type_filter():
+        # one keystroke at a time, the first one also builds the search index
+        for i in range(1, 5):
+            window.filter_edit.setText("revi"[:i])
+        window.filter_edit.clear()
+    results.append(measure("filter_typing", type_filter, app))
+
+    def delete_label():
+        window.labels.pop(0)
+        window._on_labels_changed()
+    results.append(measure("labels_changed_delete", delete_label, app))
+
+    results.append(measure("change_scale", lambda: window._change_scale(+0.1), app))
+
+    storage.create_board("bench")
+    def switch_boards():
+        # to an empty board that has to be loaded, then back to the cached one
+        window._switch_board("bench")
+        window._switch_board(storage.DEFAULT_BOARD)
+    results.append(measure("switch_board", switch_boards, app))
+
+    # last, since it takes finished tasks off the board (make_board's have no done_at,
+    # so everything past DONE_KEEP goes)
+    archive.DONE_KEEP, archive.ARCHIVE_AFTER_DAYS = archive_settings
+    results.append(measure("archive_done", window._archive_done, app))
+
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    for r in results:
+        r["size"] = n
+    return results
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the task tracker on synthetic boards.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="board sizes (number of tasks)")
+    parser.add_argument("--virtual", action="store_true", help="use virtualized columns")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv[1:])
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(argv[:1])
+    results = []
+    for n in args.sizes:
+        results.extend(bench_size(n, app, args.virtual))
+        print(f"bench: {n} tasks done", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "qt": QtCore.QT_VERSION_STR,
+            "platform": platform.platform(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM"),
+            "virtual": args.virtual,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
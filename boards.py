@@ -0,0 +1,164 @@
+# boards.py
+# Named boards, each with its own data file and backend, and the LRU cache that keeps recently used ones loaded.
+
+import collections
+import os
+import sys
+from typing import Iterator, List, Optional
+import perf
+import storage
+import sync
+from models import Label, Task
+from store import TaskStore
+from search import SearchIndex
+from archive import Archive
+
+# total (estimated) size of the boards kept loaded besides the open one
+BOARD_CACHE_BYTES = int(os.environ.get("TASKAPP_BOARD_CACHE_MB", "64")) << 20
+
+# Board.close(): merge and retry this many times while other programs keep rewriting the file
+CLOSE_MERGE_TRIES = 3
+
+# rough retained size of one loaded task with its TaskStore entries, and of its search-index
+# entries once the board has been filtered (measured with tracemalloc on bench.make_board)
+TASK_BYTES = 600
+SEARCH_TASK_BYTES = 2100
+
+
+class Board:
+    """One board: its tasks, labels, search index, archive and the backend that persists them.
+
+    Nothing is read until load() (or until MainWindow streams records in through
+    backend.iter_load()); the backend saves from this board's own data, so a board
+    that is not on screen can still finish its pending writes.
+    """
+    def __init__(self, name: str, backend: Optional[str] = None):
+        self.name = name
+        self.data_file = storage.board_file(name)
+        self.store = TaskStore()
+        self.labels: List[Label] = []
+        self.search = SearchIndex(self.store)
+        self.backend = storage.open_backend(lambda: (self.store.all(), self.labels), backend, self.data_file)
+        # finished tasks moved off the board; only read when the "Archived" view asks
+        self.archive = Archive(storage.archive_file(self.data_file))
+
+    def load(self):
+        with perf.timed("boards.load"):
+            tasks, labels = self.backend.load()
+        unranked = [t for t in tasks if t.rank is None]
+        self.store = TaskStore(tasks)
+        self.search = SearchIndex(self.store)
+        self.labels[:] = labels
+        self.save_tasks(unranked)
+
+    def save_tasks(self, tasks: List[Task]):
+        """Persist tasks the board changed on its own: ranks given on load (files from before
+        there were ranks, imported rows) or re-keyed by rebalance()."""
+        if tasks:
+            with self.backend.batch():
+                for t in tasks:
+                    self.backend.put_task(t)
+
+    def rebalance(self) -> List[Task]:
+        """Re-key the runs of too long ranks (see TaskStore.rebalance) and save them."""
+        tasks = []
+        for column in list(self.store.unbalanced):
+            tasks += self.store.rebalance(column)
+        self.save_tasks(tasks)
+        return tasks
+
+    @property
+    def queue(self):
+        """The JSON backend's SaveQueue, or None (the other backends can't be watched, see BoardWatcher)."""
+        return getattr(self.backend, "queue", None)
+
+    @property
+    def watched(self) -> bool:
+        return self.queue is not None and self.queue.disk_state is not None
+
+    def merge_external(self, ext: sync.External) -> sync.Changes:
+        """Merge what another program wrote to the data file (see sync.merge); the file becomes our new base."""
+        queue = self.queue
+        changes = sync.merge(ext, self.store, self.labels, self.search, queue.touched)
+        queue.disk_state, queue.disk_sigs = ext.state, ext.sigs
+        if queue.touched:
+            # our edits aren't in the file yet
+            queue.mark_dirty()
+        return changes
+
+    def approx_bytes(self) -> int:
+        per_task = TASK_BYTES + (SEARCH_TASK_BYTES if self.search.built else 0)
+        return len(self.store) * per_task
+
+    def close(self):
+        """Flush and release the backend; the board can't be used afterwards.
+
+        A watched board merges whatever was written to its file since we last
+        looked first, so the final save doesn't overwrite it.
+        """
+        for _ in range(CLOSE_MERGE_TRIES if self.watched else 0):
+            try:
+                self.backend.close()
+                return
+            except storage.ChangedOnDisk:
+                try:
+                    ext = sync.read_external(self.data_file, self.queue.disk_sigs)
+                except sync.READ_ERRORS:
+                    break
+                if ext is not None:
+                    self.merge_external(ext)
+        if self.watched:
+            print(f"couldn't merge the changes to {self.data_file.name}; saving over them", file=sys.stderr)
+            self.queue.disk_state = None
+        self.backend.close()
+
+
+class BoardCache:
+    """Loaded boards, least recently used first.
+
+    The most recently used board (the one on screen) always stays; older ones are
+    closed and dropped once the estimated size of the rest passes `budget` bytes.
+    """
+    def __init__(self, budget: int = BOARD_CACHE_BYTES):
+        self.budget = budget
+        self._boards: "collections.OrderedDict[str, Board]" = collections.OrderedDict()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._boards
+
+    def __iter__(self) -> Iterator[Board]:
+        return iter(self._boards.values())
+
+    def __len__(self) -> int:
+        return len(self._boards)
+
+    def get(self, name: str) -> Optional[Board]:
+        """The cached board `name`, now the most recently used one (None on a miss)."""
+        board = self._boards.get(name)
+        perf.count("boards.cache.hit" if board is not None else "boards.cache.miss")
+        if board is not None:
+            self._boards.move_to_end(name)
+            self.evict()
+        return board
+
+    def add(self, board: Board):
+        self._boards[board.name] = board
+        self._boards.move_to_end(board.name)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used boards until the ones behind the current board fit the budget."""
+        names = list(self._boards)[:-1]
+        size = sum(self._boards[n].approx_bytes() for n in names)
+        for name in names:
+            if size <= self.budget:
+                break
+            board = self._boards.pop(name)
+            size -= board.approx_bytes()
+            board.close()
+            perf.count("boards.cache.evicted")
+
+    def close(self):
+        for board in self._boards.values():
+            board.close()
+        self._boards.clear()
@@ -0,0 +1,264 @@
+# cli.py
+# Headless bulk import/export of a board as CSV or JSON lines, built on models and storage (no PyQt5).
+#
+#   python cli.py import tasks.csv                          # into the default board
+#   python cli.py import rows.jsonl --board Ops --batch 5000 --skip-invalid
+#   python cli.py export board.csv --include-archived
+#   python cli.py export - --format jsonl | gzip > board.jsonl.gz
+#
+# A row has: title (required), progress (0-100, default 0), label (a label name;
+# unknown names become new labels), column (key or title, default todo), and
+# optionally id and done_at. Both directions stream, so memory stays flat however
+# many rows there are. Imports are committed every --batch rows: into the database
+# for the sqlite backend, otherwise into the board's inbox (see storage.inbox_file),
+# which a running app leaves alone, so the app can keep the board open meanwhile.
+
+import argparse
+import contextlib
+import csv
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from models import Task, Label, COLUMN_ORDER
+from archive import Archive
+import storage
+
+FIELDS = ("id", "title", "progress", "label", "column", "done_at")
+FORMATS = ("csv", "jsonl")
+SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# rows per committed batch
+BATCH_ROWS = 1000
+
+# invalid rows reported one by one with --skip-invalid; the rest are only counted
+MAX_REPORTED = 20
+
+# column key for either a key or a column title, lowercase
+_COLUMNS = {**{key: key for key, _ in COLUMN_ORDER}, **{title.lower(): key for key, title in COLUMN_ORDER}}
+
+# new labels get the color LabelDialog uses when none is given
+NEW_LABEL_COLOR = "#777777"
+
+
+class RowError(ValueError):
+    """A row that can't be imported (the message says why)."""
+
+
+class LabelMap:
+    """Label names to ids for one board; names it hasn't seen become new labels."""
+    def __init__(self, labels: List[Label]):
+        self.by_id = {l.id: l for l in labels}
+        self._by_name: Dict[str, Label] = {}
+        for l in labels:
+            self._by_name.setdefault(l.name.casefold(), l)
+        # created since the last take_new(), to be written before the tasks that use them
+        self._new: List[Label] = []
+
+    def resolve(self, name: str) -> str:
+        label = self._by_name.get(name.casefold())
+        if label is None:
+            label = Label.new(name, NEW_LABEL_COLOR)
+            self.by_id[label.id] = label
+            self._by_name[name.casefold()] = label
+            self._new.append(label)
+        return label.id
+
+    def take_new(self) -> List[Label]:
+        new, self._new = self._new, []
+        return new
+
+    def name(self, label_id: Optional[str]) -> str:
+        label = self.by_id.get(label_id) if label_id else None
+        return label.name if label is not None else ""
+
+
+def parse_row(raw: dict, labels: LabelMap) -> Task:
+    """Validate one input row and build its Task (label names are resolved through `labels`)."""
+    title = str(raw.get("title") or "").strip()
+    if not title:
+        raise RowError("missing title")
+    column = _COLUMNS.get(str(raw.get("column") or "todo").strip().lower())
+    if column is None:
+        raise RowError(f"unknown column {raw.get('column')!r} (expected one of {', '.join(k for k, _ in COLUMN_ORDER)})")
+    progress = raw.get("progress")
+    if progress is None or progress == "":
+        progress = 0
+    try:
+        progress = int(str(progress).strip().rstrip("%"))
+    except ValueError:
+        raise RowError(f"progress {raw.get('progress')!r} is not a whole number")
+    if not 0 <= progress <= 100:
+        raise RowError(f"progress {progress} is outside 0-100")
+    label_id = raw.get("label_id") or None
+    if label_id is not None and not isinstance(label_id, str):
+        raise RowError(f"label_id {label_id!r} is not a string")
+    if label_id is not None and label_id not in labels.by_id:
+        raise RowError(f"unknown label_id {label_id!r}")
+    name = str(raw.get("label") or "").strip()
+    if label_id is None and name:
+        label_id = labels.resolve(name)
+    done_at = None
+    if column == "done" and raw.get("done_at") not in (None, ""):
+        try:
+            done_at = float(raw["done_at"])
+        except (TypeError, ValueError):
+            raise RowError(f"done_at {raw['done_at']!r} is not a Unix time")
+    task_id = str(raw.get("id") or "").strip() or str(uuid.uuid4())
+    return Task(id=task_id, title=title, progress=progress, label_id=label_id, column=column, done_at=done_at)
+
+
+def read_rows(f: TextIO, fmt: str) -> Iterator[Tuple[int, dict]]:
+    """(line number, row) for every row of a CSV (with a header) or JSON-lines stream."""
+    if fmt == "csv":
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or "title" not in reader.fieldnames:
+            raise RowError("the CSV header has no 'title' column")
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for n, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            raise RowError(f"line {n}: not JSON ({e})")
+        if not isinstance(row, dict):
+            raise RowError(f"line {n}: expected a JSON object")
+        yield n, row
+
+
+def open_board(name: str, kind: str):
+    """The board's data file, a backend to write it through, and its labels (creating the board if needed)."""
+    data_file = storage.board_file(name)
+    if not data_file.exists() and not storage.db_file(data_file).exists():
+        storage.create_board(name)
+    if kind == "sqlite":
+        backend = storage.SqliteBackend(lambda: ([], []), data_file=data_file)
+        backend.initialize()
+        return data_file, backend, backend.labels()
+    return data_file, storage.InboxBackend(data_file), storage.load_labels(data_file)
+
+
+def import_rows(rows: Iterator[Tuple[int, dict]], backend, labels: LabelMap, batch: int = BATCH_ROWS,
+                skip_invalid: bool = False, log: TextIO = sys.stderr) -> Tuple[int, int]:
+    """Write valid rows through `backend`, `batch` rows per commit; returns (imported, skipped).
+
+    Without `skip_invalid` the first invalid row stops the import: earlier batches
+    stay committed, the rows read since the last commit are not written.
+    """
+    imported = skipped = 0
+    pending: List[Task] = []
+
+    def commit():
+        nonlocal imported
+        with backend.batch():
+            # new labels first, so no task points at a label that isn't stored yet
+            for l in labels.take_new():
+                backend.put_label(l)
+            for t in pending:
+                backend.put_task(t)
+        imported += len(pending)
+        pending.clear()
+
+    for line, raw in rows:
+        try:
+            pending.append(parse_row(raw, labels))
+        except RowError as e:
+            if not skip_invalid:
+                raise RowError(f"line {line}: {e}; {imported} rows were imported before it")
+            skipped += 1
+            if skipped <= MAX_REPORTED:
+                print(f"skipped line {line}: {e}", file=log)
+            continue
+        if len(pending) >= batch:
+            commit()
+    commit()
+    return imported, skipped
+
+
+def export_rows(data_file: Path, kind: str, backend, labels: LabelMap, include_archived: bool = False) -> Iterator[dict]:
+    """The board's tasks (then its archived ones) as rows, streamed."""
+    if kind == "sqlite":
+        records = backend.iter_load()
+    else:
+        records = storage.iter_data(data_file=data_file)
+    tasks = (obj for rec, obj in records if rec == "task")
+    for source in (tasks, Archive(storage.archive_file(data_file)) if include_archived else ()):
+        for t in source:
+            yield {"id": t.id, "title": t.title, "progress": t.progress, "label": labels.name(t.label_id),
+                   "column": t.column, "done_at": t.done_at}
+
+
+def write_rows(rows: Iterator[dict], f: TextIO, fmt: str) -> int:
+    n = 0
+    if fmt == "csv":
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({**row, "done_at": "" if row["done_at"] is None else row["done_at"]})
+            n += 1
+        return n
+    for row in rows:
+        f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+
+def _format(path: str, fmt: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    if path != "-" and Path(path).suffix.lower() in SUFFIXES:
+        return SUFFIXES[Path(path).suffix.lower()]
+    raise SystemExit(f"can't tell the format of {path!r}; pass --format {'/'.join(FORMATS)}")
+
+
+def parse_args(argv: List[str]):
+    parser = argparse.ArgumentParser(description="Bulk import/export for Minimal Task Tracker boards (no GUI needed).")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file", help="CSV or JSON-lines file, or - for stdin/stdout")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--board", default=storage.DEFAULT_BOARD, help="board name (default: %(default)s)")
+    parser.add_argument("--storage", choices=sorted(storage.BACKENDS), default=storage.DEFAULT_BACKEND,
+                        help="the board's storage backend (default: $TASKAPP_STORAGE or json)")
+    parser.add_argument("--batch", type=int, default=BATCH_ROWS, help="import: rows per commit (default: %(default)s)")
+    parser.add_argument("--skip-invalid", action="store_true", help="import: skip invalid rows instead of stopping")
+    parser.add_argument("--include-archived", action="store_true", help="export: also the archived finished tasks")
+    return parser.parse_args(argv[1:])
+
+
+def main(argv: List[str]) -> int:
+    args = parse_args(argv)
+    fmt = _format(args.file, args.format)
+    try:
+        data_file, backend, labels = open_board(args.board, args.storage)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    labels = LabelMap(labels)
+    start = time.perf_counter()
+    try:
+        if args.command == "import":
+            f = contextlib.nullcontext(sys.stdin) if args.file == "-" else open(args.file, encoding="utf-8", newline="")
+            with f as f:
+                imported, skipped = import_rows(read_rows(f, fmt), backend, labels, max(1, args.batch), args.skip_invalid)
+            print(f"imported {imported} tasks into {args.board!r}"
+                  + (f", skipped {skipped} invalid rows" if skipped else "")
+                  + f" ({time.perf_counter() - start:.1f} s)", file=sys.stderr)
+        else:
+            f = contextlib.nullcontext(sys.stdout) if args.file == "-" else open(args.file, "w", encoding="utf-8", newline="")
+            with f as f:
+                n = write_rows(export_rows(data_file, args.storage, backend, labels, args.include_archived), f, fmt)
+            print(f"exported {n} tasks from {args.board!r} ({time.perf_counter() - start:.1f} s)", file=sys.stderr)
+    except (RowError, OSError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        backend.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,556 @@
+# listview.py
+# Virtualized column: a QListView over a task model with a painting delegate, for very large boards.
+# Only visible rows are painted; real widgets exist only for the hovered/focused card.
+
+from PyQt5 import QtWidgets, QtCore, QtGui
+from models import Task, Label
+from typing import List, Dict, Optional, Callable, Set
+import styles
+from ui import COLUMN_ORDER, ChipLabel, DropMarker, UiFonts, drag_autoscroll, drop_card, dragged_card, label_style, start_card_drag
+
+# model role returning the Task object itself
+TASK_ROLE = QtCore.Qt.UserRole + 1
+
+
+class TaskListModel(QtCore.QAbstractListModel):
+    """Flat list model over the tasks of one column."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tasks: List[Task] = []
+        # task id per row, and row per task id, so lookups never scan the column
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.tasks)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        task = self.tasks[index.row()]
+        if role == TASK_ROLE:
+            return task
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return task.title
+        return None
+
+    def flags(self, index):
+        return super().flags(index) | QtCore.Qt.ItemIsEditable
+
+    def set_tasks(self, tasks: List[Task]):
+        self.beginResetModel()
+        self.tasks = list(tasks)
+        self.ids = [t.id for t in self.tasks]
+        self._rows = {task_id: row for row, task_id in enumerate(self.ids)}
+        self.endResetModel()
+
+    def row_of(self, task_id: str) -> int:
+        return self._rows.get(task_id, -1)
+
+    def append(self, task: Task):
+        self.extend([task])
+
+    def extend(self, tasks: List[Task]):
+        if not tasks:
+            return
+        row = len(self.tasks)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row + len(tasks) - 1)
+        self.tasks.extend(tasks)
+        for t in tasks:
+            self._rows[t.id] = len(self.ids)
+            self.ids.append(t.id)
+        self.endInsertRows()
+
+    def insert(self, row: int, task: Task):
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.tasks.insert(row, task)
+        self.ids.insert(row, task.id)
+        # only the rows below it move down
+        for r in range(row, len(self.ids)):
+            self._rows[self.ids[r]] = r
+        self.endInsertRows()
+
+    def move(self, task_id: str, row: int):
+        """Move a task's row in front of `row` (the row count: to the end)."""
+        src = self.row_of(task_id)
+        if src < 0 or row in (src, src + 1):
+            return
+        self.beginMoveRows(QtCore.QModelIndex(), src, src, QtCore.QModelIndex(), row)
+        dst = row - 1 if row > src else row
+        self.tasks.insert(dst, self.tasks.pop(src))
+        self.ids.insert(dst, self.ids.pop(src))
+        # only the rows it passed shift
+        for r in range(min(src, dst), max(src, dst) + 1):
+            self._rows[self.ids[r]] = r
+        self.endMoveRows()
+
+    def remove(self, task_id: str) -> bool:
+        row = self.row_of(task_id)
+        if row < 0:
+            return False
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self.tasks[row]
+        del self.ids[row]
+        del self._rows[task_id]
+        # only the rows below it move up
+        for r in range(row, len(self.ids)):
+            self._rows[self.ids[r]] = r
+        self.endRemoveRows()
+        return True
+
+    def task_changed(self, task_id: str):
+        row = self.row_of(task_id)
+        if row >= 0:
+            idx = self.index(row)
+            self.dataChanged.emit(idx, idx)
+
+
+class TaskEditor(QtWidgets.QFrame):
+    """The interactive card shown on top of the hovered/focused row: title edit, move/delete buttons, slider."""
+    def __init__(self, column: "VirtualColumnWidget", task: Task, parent=None):
+        super().__init__(parent)
+        self.setObjectName("card")
+        self.column = column
+        self.task = task
+        # where the left button went down, while a drag may still start from there
+        self._press_pos: Optional[QtCore.QPoint] = None
+        self._build_ui()
+        self.load(task)
+
+    def _build_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setSpacing(4)
+        layout.setContentsMargins(8,6,8,6)
+
+        top = QtWidgets.QHBoxLayout()
+        top.setSpacing(4)
+        self.title_edit = QtWidgets.QLineEdit()
+        self.title_edit.editingFinished.connect(self._on_title_edited)
+        top.addWidget(self.title_edit, 1)
+        self.btn_left = QtWidgets.QPushButton("◀")
+        self.btn_left.setToolTip("Move left")
+        self.btn_left.clicked.connect(lambda: self._move("left"))
+        top.addWidget(self.btn_left)
+        self.btn_right = QtWidgets.QPushButton("▶")
+        self.btn_right.setToolTip("Move right")
+        self.btn_right.clicked.connect(lambda: self._move("right"))
+        top.addWidget(self.btn_right)
+        self.btn_delete = QtWidgets.QPushButton("🗑")
+        self.btn_delete.setToolTip("Delete task")
+        self.btn_delete.clicked.connect(self._delete)
+        top.addWidget(self.btn_delete)
+        layout.addLayout(top)
+
+        bottom = QtWidgets.QHBoxLayout()
+        self.chip = ChipLabel()
+        bottom.addWidget(self.chip)
+        self.slider = QtWidgets.QSlider(QtCore.Qt.Horizontal)
+        self.slider.setRange(0,100)
+        self.slider.valueChanged.connect(self._on_progress_change)
+        bottom.addWidget(self.slider, 1)
+        layout.addLayout(bottom)
+
+    def load(self, task: Task):
+        """Show `task` without emitting change notifications."""
+        self.task = task
+        for w in (self.title_edit, self.slider):
+            w.blockSignals(True)
+        self.title_edit.setText(task.title)
+        self.slider.setValue(task.progress)
+        for w in (self.title_edit, self.slider):
+            w.blockSignals(False)
+        self.refresh_label(self.column.label_lookup)
+
+    def refresh_label(self, label_lookup: Dict[str, Label]):
+        label = label_lookup.get(self.task.label_id) if self.task.label_id else None
+        self.chip.setText(label.name if label else "No Label")
+        self.chip.set_label_style(label_style(label))
+
+    def _on_title_edited(self):
+        text = self.title_edit.text().strip()
+        if text and text != self.task.title:
+            self.task.title = text
+            self.column.model.task_changed(self.task.id)
+            self.column.on_update(self.task)
+
+    def _on_progress_change(self, val: int):
+        self.task.progress = int(val)
+        self.column.model.task_changed(self.task.id)
+        self.column.on_update(self.task)
+
+    def _move(self, direction: str):
+        keys = [c[0] for c in COLUMN_ORDER]
+        current_index = keys.index(self.task.column)
+        step = -1 if direction == "left" else 1
+        if not 0 <= current_index + step < len(keys):
+            return
+        task = self.task
+        task.column = keys[current_index + step]
+        # the move removes this row (and this editor) from the model, so let the click finish first
+        QtCore.QTimer.singleShot(0, lambda: self.column.on_move(task, task.column))
+
+    def _delete(self):
+        task = self.task
+        QtCore.QTimer.singleShot(0, lambda: self.column.on_delete(task))
+
+    def mousePressEvent(self, event):
+        # the editor covers its row, so modified clicks on it select like clicks on the view would
+        mods = event.modifiers()
+        if event.button() == QtCore.Qt.LeftButton and mods & (QtCore.Qt.ControlModifier | QtCore.Qt.ShiftModifier):
+            self.column.select(self.task.id, "range" if mods & QtCore.Qt.ShiftModifier else "toggle")
+            return
+        self._press_pos = event.pos() if event.button() == QtCore.Qt.LeftButton else None
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        # the editor covers its row, so it is what a drag of the card starts from (see TaskWidget)
+        if (self._press_pos is not None and event.buttons() & QtCore.Qt.LeftButton
+                and (event.pos() - self._press_pos).manhattanLength() >= QtWidgets.QApplication.startDragDistance()):
+            hot_spot, self._press_pos = self._press_pos, None
+            start_card_drag(self, self.task, hot_spot)
+            return
+        super().mouseMoveEvent(event)
+
+
+class TaskDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints a card (title, label chip, progress bar) and creates a TaskEditor on demand."""
+    def __init__(self, column: "VirtualColumnWidget"):
+        super().__init__(column)
+        self.column = column
+
+    def sizeHint(self, option, index):
+        line = option.fontMetrics.height()
+        return QtCore.QSize(option.rect.width(), 2 * line + 58)
+
+    def paint(self, painter, option, index):
+        task = index.data(TASK_ROLE)
+        if task is None:
+            return
+        label = self.column.label_lookup.get(task.label_id) if task.label_id else None
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        r = option.rect.adjusted(2, 4, -2, -4)
+        bg = QtGui.QColor(styles.CARD)
+        if option.state & QtWidgets.QStyle.State_MouseOver:
+            bg = bg.lighter(115)
+        painter.setPen(QtGui.QPen(QtGui.QColor(styles.ACCENT), 2) if option.state & QtWidgets.QStyle.State_Selected else QtCore.Qt.NoPen)
+        painter.setBrush(bg)
+        painter.drawRoundedRect(r, 10, 10)
+
+        inner = r.adjusted(10, 8, -10, -8)
+        fm = option.fontMetrics
+        line = fm.height()
+
+        # title
+        title_font = QtGui.QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        painter.setPen(QtGui.QColor(styles.TEXT))
+        title_rect = QtCore.QRect(inner.left(), inner.top(), inner.width(), line)
+        title = QtGui.QFontMetrics(title_font).elidedText(task.title, QtCore.Qt.ElideRight, inner.width())
+        painter.drawText(title_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter, title)
+
+        # label chip
+        painter.setFont(option.font)
+        chip_text = label.name if label else "No Label"
+        chip = QtCore.QRect(inner.left(), title_rect.bottom() + 8, fm.horizontalAdvance(chip_text) + 16, line + 6)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(QtGui.QColor(label.color) if label else QtGui.QColor(255, 255, 255, 5))
+        painter.drawRoundedRect(chip, 8, 8)
+        painter.setPen(QtGui.QColor("#ffffff" if label else "#cfd8dc"))
+        painter.drawText(chip, QtCore.Qt.AlignCenter, chip_text)
+
+        # progress bar
+        bar = QtCore.QRect(inner.left(), chip.bottom() + 8, inner.width(), 12)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(QtGui.QColor(255, 255, 255, 10))
+        painter.drawRoundedRect(bar, 6, 6)
+        if task.progress > 0:
+            fill = QtCore.QRect(bar)
+            fill.setWidth(max(12, bar.width() * task.progress // 100))
+            painter.setBrush(QtGui.QColor(label.color) if label else QtGui.QColor(styles.ACCENT))
+            painter.drawRoundedRect(fill, 6, 6)
+        small = QtGui.QFont(option.font)
+        small.setPixelSize(max(8, line - 6))
+        painter.setFont(small)
+        painter.setPen(QtGui.QColor(styles.TEXT))
+        painter.drawText(bar, QtCore.Qt.AlignCenter, f"{task.progress}%")
+        painter.restore()
+
+    def createEditor(self, parent, option, index):
+        return TaskEditor(self.column, index.data(TASK_ROLE), parent)
+
+    def setEditorData(self, editor, index):
+        editor.load(index.data(TASK_ROLE))
+
+    def setModelData(self, editor, model, index):
+        # the editor writes straight to the Task and reports through the column callbacks
+        pass
+
+    def updateEditorGeometry(self, editor, option, index):
+        editor.setGeometry(option.rect.adjusted(2, 4, -2, -4))
+
+
+class VirtualColumnWidget(QtWidgets.QFrame):
+    """Drop-in alternative to ColumnWidget backed by TaskListModel + TaskDelegate."""
+    def __init__(self, key: str, title: str, label_lookup: Dict[str, Label]):
+        super().__init__()
+        self.setObjectName("panel")
+        self.key = key
+        self.title = title
+        self.label_lookup = label_lookup
+        self.on_move: Optional[Callable[[Task, str], None]] = None
+        self.on_update: Optional[Callable[[Task], None]] = None
+        self.on_delete: Optional[Callable[[Task], None]] = None
+        # like ColumnWidget.on_drop
+        self.on_drop: Optional[Callable[[str, str, Optional[str]], None]] = None
+        self._editor_index: Optional[QtCore.QPersistentModelIndex] = None
+        # ids the filter bar lets through (None = no filter)
+        self._filter: Optional[Set[str]] = None
+        self.on_selection_changed: Optional[Callable[[], None]] = None
+        self._build_ui()
+
+    def _build_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        self.header = QtWidgets.QLabel(self.title)
+        self.header.setStyleSheet("font-weight: 700; padding: 4px;")
+        header_row = QtWidgets.QHBoxLayout()
+        header_row.addWidget(self.header)
+        header_row.addStretch()
+        self.select_all_btn = QtWidgets.QPushButton("Select all")
+        self.select_all_btn.setToolTip("Select every (shown) card in this column")
+        self.select_all_btn.clicked.connect(self.select_all)
+        header_row.addWidget(self.select_all_btn)
+        layout.addLayout(header_row)
+        layout.addSpacing(6)
+
+        self.model = TaskListModel(self)
+        self.view = QtWidgets.QListView()
+        self.view.setModel(self.model)
+        self.view.setItemDelegate(TaskDelegate(self))
+        self.view.setFrameStyle(QtWidgets.QFrame.NoFrame)
+        self.view.setUniformItemSizes(True)
+        self.view.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.view.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.view.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.view.setMouseTracking(True)
+        self.view.entered.connect(self._open_editor)
+        self.view.selectionModel().currentChanged.connect(lambda cur, _prev: self._open_editor(cur))
+        self.view.selectionModel().selectionChanged.connect(lambda *_: self._selection_changed())
+        # card drops are handled here rather than by the view's own drag and drop, which goes through the model
+        self.view.viewport().setAcceptDrops(True)
+        self.view.viewport().installEventFilter(self)
+        self.drop_marker = DropMarker(self.view.viewport())
+        layout.addWidget(self.view)
+
+    def set_fonts(self, fonts: UiFonts):
+        """Rescale the header and the rows; the view lays out and paints only the visible ones."""
+        for w in (self.header, self.select_all_btn, self.view, self.view.viewport()):
+            w.setFont(fonts.base)
+        # the live editor was built at the old scale; the next hover opens a new one
+        self._close_editor()
+
+    def _open_editor(self, index: QtCore.QModelIndex):
+        """Keep exactly one live editor: on the hovered or focused row."""
+        if self._editor_index is not None and self._editor_index == index:
+            return
+        self._close_editor()
+        if index.isValid():
+            self._editor_index = QtCore.QPersistentModelIndex(index)
+            self.view.openPersistentEditor(index)
+
+    def _close_editor(self):
+        if self._editor_index is not None:
+            if self._editor_index.isValid():
+                self.view.closePersistentEditor(QtCore.QModelIndex(self._editor_index))
+            self._editor_index = None
+
+    def set_callbacks(self, on_move: Callable[[Task,str], None], on_update: Callable[[Task], None], on_delete: Callable[[Task], None]):
+        self.on_move = on_move
+        self.on_update = on_update
+        self.on_delete = on_delete
+
+    def set_tasks(self, tasks: List[Task], on_move: Callable[[Task,str], None], on_update: Callable[[Task], None], on_delete: Callable[[Task], None]):
+        self.set_callbacks(on_move, on_update, on_delete)
+        self._close_editor()
+        self.model.set_tasks([t for t in tasks if t.column == self.key])
+        self._apply_filter(0)
+
+    def has_task(self, task_id: str) -> bool:
+        return self.model.row_of(task_id) >= 0
+
+    def task_ids(self) -> List[str]:
+        return list(self.model.ids)
+
+    def next_card(self, task_id: str) -> Optional[str]:
+        """The id of the row right below `task_id` (hidden or not), None for the last one."""
+        row = self.model.row_of(task_id)
+        return self.model.ids[row + 1] if 0 <= row < len(self.model.ids) - 1 else None
+
+    def add_task(self, task: Task, before: Optional[str] = None):
+        row = self.model.row_of(before) if before is not None else -1
+        if row < 0:
+            self.add_tasks([task])
+            return
+        self.model.insert(row, task)
+        self._set_row_hidden(row, self._filter is not None and task.id not in self._filter)
+
+    def move_card(self, task_id: str, before: Optional[str] = None):
+        """Show the row `task_id` in front of the row `before` (None: at the bottom)."""
+        row = self.model.row_of(task_id)
+        if row < 0:
+            return
+        if self._editor_index is not None and self._editor_index.row() == row:
+            self._close_editor()
+        to = self.model.row_of(before) if before is not None else -1
+        # hidden rows are tracked by persistent index, so they stay hidden
+        self.model.move(task_id, to if to >= 0 else len(self.model.ids))
+
+    def eventFilter(self, obj, event):
+        kind = event.type()
+        if kind in (QtCore.QEvent.DragEnter, QtCore.QEvent.DragMove, QtCore.QEvent.Drop) and dragged_card(event) is not None:
+            row = self._drop_row(event.pos())
+            if kind == QtCore.QEvent.Drop:
+                self.drop_marker.hide()
+                before = self.model.ids[row] if row < len(self.model.ids) else None
+                if self.on_drop is not None:
+                    on_drop = self.on_drop
+                    drop_card(event, lambda task_id: on_drop(task_id, self.key, before))
+                return True
+            event.acceptProposedAction()
+            self.drop_marker.show_at(self._row_edge(row), self.view.viewport().width())
+            drag_autoscroll(self.view.verticalScrollBar(), event.pos().y(), self.view.viewport().height())
+            return True
+        if kind == QtCore.QEvent.DragLeave:
+            self.drop_marker.hide()
+        return super().eventFilter(obj, event)
+
+    def _drop_row(self, pos: QtCore.QPoint) -> int:
+        """The row a card dropped at `pos` goes in front of (the row count: at the end), skipping hidden rows."""
+        index = self.view.indexAt(pos)
+        if not index.isValid():
+            return len(self.model.ids)
+        row = index.row() + (pos.y() > self.view.visualRect(index).center().y())
+        while row < len(self.model.ids) and self.view.isRowHidden(row):
+            row += 1
+        return row
+
+    def _row_edge(self, row: int) -> int:
+        """The y (in the viewport) between `row` and the shown row above it."""
+        if row < len(self.model.ids):
+            return self.view.visualRect(self.model.index(row)).top()
+        for r in range(row - 1, -1, -1):
+            if not self.view.isRowHidden(r):
+                return self.view.visualRect(self.model.index(r)).bottom() + 1
+        return 0
+
+    def add_tasks(self, tasks: List[Task]):
+        first = self.model.rowCount()
+        self.model.extend(tasks)
+        self._apply_filter(first)
+
+    def take_widget(self, task_id: str):
+        """Remove the row; there is no widget to hand over, so moves re-add the task in the target column."""
+        self.remove_task(task_id)
+        return None
+
+    def remove_task(self, task_id: str):
+        row = self.model.row_of(task_id)
+        if row < 0:
+            return
+        if self._editor_index is not None and self._editor_index.row() == row:
+            self._close_editor()
+        self.model.remove(task_id)
+
+    def refresh_labels(self, label_lookup: Dict[str, Label]):
+        self.label_lookup = label_lookup
+        if self._editor_index is not None and self._editor_index.isValid():
+            editor = self.view.indexWidget(QtCore.QModelIndex(self._editor_index))
+            if editor is not None:
+                editor.refresh_label(label_lookup)
+        self.view.viewport().update()
+
+    def refresh_task_labels(self, task_ids: List[str]):
+        """Only visible rows are painted, so a repaint is all a label change needs."""
+        self.refresh_labels(self.label_lookup)
+
+    def refresh_tasks(self, task_ids: List[str]):
+        """Repaint after a bulk edit (and reload the live editor if its task is among them)."""
+        if self.model.tasks:
+            self.model.dataChanged.emit(self.model.index(0), self.model.index(len(self.model.tasks) - 1))
+        if self._editor_index is not None and self._editor_index.isValid():
+            editor = self.view.indexWidget(QtCore.QModelIndex(self._editor_index))
+            if editor is not None and editor.task.id in set(task_ids):
+                editor.load(editor.task)
+
+    def remove_tasks(self, task_ids: List[str]):
+        """Drop many rows with one model reset instead of one removal per row."""
+        ids = set(task_ids)
+        self._close_editor()
+        self.model.set_tasks([t for t, task_id in zip(self.model.tasks, self.model.ids) if task_id not in ids])
+        self._apply_filter(0)
+
+    def take_widgets(self, task_ids: List[str]) -> list:
+        """Like take_widget: the rows go away and there are no widgets to hand over."""
+        self.remove_tasks(task_ids)
+        return []
+
+    def insert_widgets(self, widgets):
+        # there are never widgets to adopt (take_widgets returns none)
+        pass
+
+    def select(self, task_id: str, mode: str):
+        """"toggle" one row, or extend the selection over a "range" from the current row."""
+        row = self.model.row_of(task_id)
+        if row < 0:
+            return
+        sel = self.view.selectionModel()
+        index = self.model.index(row)
+        if mode == "range" and sel.currentIndex().isValid():
+            top, bottom = sorted((sel.currentIndex().row(), row))
+            selection = QtCore.QItemSelection(self.model.index(top), self.model.index(bottom))
+            sel.select(selection, QtCore.QItemSelectionModel.Select)
+        else:
+            sel.select(index, QtCore.QItemSelectionModel.Toggle)
+        sel.setCurrentIndex(index, QtCore.QItemSelectionModel.NoUpdate)
+
+    def select_all(self):
+        self.view.selectAll()
+
+    def clear_selection(self):
+        self.view.clearSelection()
+
+    def selected_tasks(self) -> List[Task]:
+        rows = sorted(i.row() for i in self.view.selectionModel().selectedRows())
+        return [self.model.tasks[r] for r in rows if not self.view.isRowHidden(r)]
+
+    def _selection_changed(self):
+        if self.on_selection_changed is not None:
+            self.on_selection_changed()
+
+    def set_filter(self, ids: Optional[Set[str]]):
+        """Show only the rows whose task id is in `ids` (None shows all)."""
+        self._filter = ids
+        self._apply_filter(0)
+
+    def set_task_visible(self, task_id: str, visible: bool):
+        if self._filter is not None:
+            if visible:
+                self._filter.add(task_id)
+            else:
+                self._filter.discard(task_id)
+        row = self.model.row_of(task_id)
+        if row >= 0:
+            self._set_row_hidden(row, not visible)
+
+    def _apply_filter(self, first_row: int):
+        ids = self._filter
+        for row in range(first_row, len(self.model.tasks)):
+            self._set_row_hidden(row, ids is not None and self.model.ids[row] not in ids)
+
+    def _set_row_hidden(self, row: int, hide: bool):
+        if hide == self.view.isRowHidden(row):
+            return
+        if hide and self._editor_index is not None and self._editor_index.row() == row:
+            self._close_editor()
+        self.view.setRowHidden(row, hide)
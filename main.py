@@ -1,34 +1,213 @@
 # main.py
 # Entry point: builds the main window, loads data, wires save/load and user actions.
 
+import time
+# the startup report (--startup-report) counts everything from here on, PyQt5 included
+_T_IMPORT = time.perf_counter()
+
+import argparse
+import collections
+import os
 import sys
+from typing import Callable, Dict, List, Optional
 from PyQt5 import QtWidgets, QtCore, QtGui
 import styles
 import storage
-from ui import ColumnWidget, LabelDialog, LabelPickDialog, COLUMN_ORDER
+import perf
+import ui
+from ui import ArchiveDialog, ColumnWidget, LabelDialog, LabelPickDialog, COLUMN_ORDER, LABEL_ADDED, LABEL_DELETED, LABEL_RECOLORED, LABEL_RENAMED
 from models import Task, Label
+from store import DONE_COLUMN, TaskStore
+import archive
+from search import Query, SearchIndex, parse_query
+from boards import Board, BoardCache
+from sync import Changes
+# imported where they are used, so a plain start doesn't pay for them: listview (--virtual),
+# perfui (--perf), watcher (--watch) and api (--api, which pulls in asyncio)
+
+_T_IMPORTED = time.perf_counter()
+
+# progressive startup: each QTimer tick adds cards for at most this long...
+LOAD_SLICE_MS = 12
+# ...and each column gets its first screenful before any column gets the rest
+FIRST_SCREEN_CARDS = 8
+# off-screen cards are added in pages (see ColumnWidget.add_tasks) of at least this many cards;
+# every tick relayouts the cards already shown, so pages also grow to 1/LOAD_PAGE_GROWTH of
+# the column to keep the number of ticks, and the total relayout cost, low
+LOAD_PAGE_CARDS = 16
+LOAD_PAGE_GROWTH = 4
+
+# ranks that got too long (see TaskStore.rebalance) are re-keyed once the board has been left alone this long
+REBALANCE_IDLE_MS = 3000
+
+def _longest_increasing(values: List[int]) -> List[int]:
+    """One longest strictly increasing subsequence of `values` (patience sorting, O(n log n))."""
+    tails: List[int] = []  # index into values of the smallest tail of a run of each length
+    prev = [-1] * len(values)
+    for i, v in enumerate(values):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if values[tails[mid]] < v:
+                lo = mid + 1
+            else:
+                hi = mid
+        prev[i] = tails[lo - 1] if lo else -1
+        if lo == len(tails):
+            tails.append(i)
+        else:
+            tails[lo] = i
+    run = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        run.append(values[i])
+        i = prev[i]
+    return run[::-1]
 
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, app: QtWidgets.QApplication):
+    # the board is on screen: painted once, with every card loaded (see startup_times)
+    startupFinished = QtCore.pyqtSignal()
+
+    def __init__(self, app: QtWidgets.QApplication, backend: Optional[str] = None, virtual: bool = False, progressive: bool = False,
+                 board: str = storage.DEFAULT_BOARD, watch: bool = False, api_address: Optional[str] = None):
         super().__init__()
         self.app = app
-        self.setWindowTitle("Minimal Task Tracker")
+        # virtual: render columns with a model/view list (only visible rows cost anything)
+        self.virtual = virtual
+        # progressive: show the empty board right away and stream the cards in afterwards
+        self.progressive = progressive
+        # milliseconds since __init__ started, for "first_paint" and "loaded"
+        self.startup_times: Dict[str, float] = {}
+        self._t_start = time.perf_counter()
+        self._load_timer: Optional[QtCore.QTimer] = None
+        self.stall_monitor: Optional["perfui.StallMonitor"] = None
+        if perf.ENABLED:
+            import perfui
+            perfui.install_style_hooks()
+            self.stall_monitor = perfui.StallMonitor(self)
+            self.stall_monitor.start()
         # start with a larger default window
         self.resize(1200, 760)
 
-        # scale (multiplier) applied to stylesheet font-size
+        # scale (multiplier) applied to the UI fonts (see styles.font_sizes)
         self.scale = 1.0
-        self.base_font = styles.BASE_FONT_SIZE
 
-        # load data
-        self.tasks, self.labels = storage.load_data()
+        # load only the board being opened; others are loaded when switched to and kept in
+        # an LRU cache. Handlers report each change to the board's backend, which decides
+        # how to persist it
+        self._backend_kind = backend
+        self.boards = BoardCache()
+        self._rebalance_timer = QtCore.QTimer(self)
+        self._rebalance_timer.setSingleShot(True)
+        self._rebalance_timer.setInterval(REBALANCE_IDLE_MS)
+        self._rebalance_timer.timeout.connect(self._rebalance)
+        # watch: merge in what other programs write to the loaded boards' files (JSON backend only)
+        self.watcher: Optional["BoardWatcher"] = None
+        if watch:
+            from watcher import BoardWatcher
+            self.watcher = BoardWatcher(self.boards, self)
+            self.watcher.merged.connect(self._on_external_changes)
+        self.board: Optional[Board] = None
+        self.board = self._open_board(board, load=not progressive)
+        self._update_title()
+        # filter bar: each board's index is built on its first query and maintained by the handlers below
+        self._query: Optional[Query] = None
+        # set while a bulk action clears the selection, so the bar is updated once
+        self._bulk_running = False
+        # shared with the columns and their cards, so it is only ever updated in place
+        self.label_lookup: Dict[str, Label] = {}
         self._rebuild_label_lookup()
-        self._build_ui()
-        # apply initial qss
+        # (name, color) per label id as last applied, to tell what _on_labels_changed has to do
+        self._label_state = {l.id: (l.name, l.color) for l in self.labels}
+        # before the widgets exist, so they are polished and get their fonts once
         self.apply_stylesheet()
+        self._build_ui()
+        if progressive:
+            self._start_progressive_load()
+        else:
+            self._mark_startup("loaded")
+            self._schedule_rebalance()
+        # api_address: serve the local HTTP/JSON API there (see api.py)
+        self.api_server: Optional["api.ApiServer"] = None
+        if api_address is not None:
+            import api
+            try:
+                self.api_server = api.ApiServer(api_address or api.DEFAULT_ADDRESS, self._on_api_calls, self)
+                self.api_server.start()
+            except (OSError, ValueError) as e:
+                print(f"api: not serving on {api_address}: {e}", file=sys.stderr)
+                self.api_server = None
+
+    @property
+    def tasks(self) -> List[Task]:
+        """All tasks in board order (a fresh list; mutate through self.store)."""
+        return self.store.all()
+
+    # the open board's data; switching boards swaps all four at once
+    @property
+    def store(self) -> TaskStore:
+        return self.board.store
+
+    @property
+    def labels(self) -> List[Label]:
+        return self.board.labels
+
+    @property
+    def search(self) -> SearchIndex:
+        return self.board.search
+
+    @property
+    def backend(self):
+        return self.board.backend
+
+    def _open_board(self, name: str, load: bool = True) -> Board:
+        """The board `name` from the cache, or a newly opened one (loaded unless `load` is False)."""
+        board = self.boards.get(name)
+        if board is not None:
+            return board
+        board = Board(name, self._backend_kind)
+        if isinstance(board.backend, storage.JsonBackend):
+            # saves run on a worker thread; failures come back here
+            board.backend.queue.failed.connect(self._on_save_failed)
+        if load:
+            board.load()
+            self._archive_done(board)
+        self.boards.add(board)
+        if load and self.watcher is not None:
+            self.watcher.watch(board)
+        return board
+
+    def _archive_done(self, board: Optional[Board] = None) -> List[Task]:
+        """Move the board's finished tasks that are due (see archive.due) to its archive file."""
+        board = board or self.board
+        tasks = archive.due(board.store.column(DONE_COLUMN))
+        if not tasks:
+            return tasks
+        with perf.timed("ui.archive_done"):
+            try:
+                # written (and synced) before the tasks leave the board, so a crash can't lose them
+                board.archive.add(tasks)
+            except OSError as e:
+                self.statusBar().showMessage(f"Couldn't archive finished tasks ({e})", 10000)
+                return []
+            with board.backend.batch():
+                for t in tasks:
+                    board.store.remove(t.id)
+                    board.backend.delete_task(t.id)
+                    board.search.remove(t.id)
+            if board is self.board:
+                self.columns[DONE_COLUMN].remove_tasks([t.id for t in tasks])
+        return tasks
+
+    def _update_title(self):
+        if self.board.name == storage.DEFAULT_BOARD:
+            self.setWindowTitle("Minimal Task Tracker")
+        else:
+            self.setWindowTitle(f"{self.board.name} — Minimal Task Tracker")
 
     def _rebuild_label_lookup(self):
-        self.label_lookup = {l.id: l for l in self.labels}
+        self.label_lookup.clear()
+        self.label_lookup.update((l.id, l) for l in self.labels)
 
     def _build_ui(self):
         central = QtWidgets.QWidget()
@@ -36,31 +215,68 @@ class MainWindow(QtWidgets.QMainWindow):
         layout = QtWidgets.QVBoxLayout(central)
         toolbar = QtWidgets.QHBoxLayout()
 
+        # board switcher: boards are listed from disk, but only loaded when picked
+        self.board_combo = QtWidgets.QComboBox()
+        self.board_combo.setToolTip("Switch board")
+        self._fill_board_combo()
+        self.board_combo.activated[str].connect(self._switch_board)
+        self.new_board_btn = QtWidgets.QPushButton("＋ Board")
+        self.new_board_btn.clicked.connect(self._create_board_dialog)
+
         self.add_task_btn = QtWidgets.QPushButton("＋ New Task")
         self.add_task_btn.clicked.connect(self._create_task_dialog)
         self.manage_labels_btn = QtWidgets.QPushButton("Labels")
         self.manage_labels_btn.clicked.connect(self._open_label_manager)
+        self.archive_btn = QtWidgets.QPushButton("Archived")
+        self.archive_btn.setToolTip("Search and restore archived finished tasks")
+        self.archive_btn.clicked.connect(self._open_archive)
 
         # scale controls
         self.btn_scale_down = QtWidgets.QPushButton("A−")
         self.btn_scale_down.setToolTip("Decrease UI size")
-        self.btn_scale_down.clicked.connect(lambda: self._change_scale(-0.1))
+        self.btn_scale_down.clicked.connect(lambda: self._change_scale(-styles.SCALE_STEP))
         self.btn_scale_up = QtWidgets.QPushButton("A＋")
         self.btn_scale_up.setToolTip("Increase UI size")
-        self.btn_scale_up.clicked.connect(lambda: self._change_scale(+0.1))
+        self.btn_scale_up.clicked.connect(lambda: self._change_scale(+styles.SCALE_STEP))
 
+        toolbar.addWidget(self.board_combo)
+        toolbar.addWidget(self.new_board_btn)
         toolbar.addWidget(self.add_task_btn)
         toolbar.addWidget(self.manage_labels_btn)
+        toolbar.addWidget(self.archive_btn)
         toolbar.addWidget(self.btn_scale_down)
         toolbar.addWidget(self.btn_scale_up)
         toolbar.addStretch()
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter: words, label:name, progress:20-80")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_edit.setMinimumWidth(280)
+        self.filter_edit.textChanged.connect(self._apply_filter)
+        toolbar.addWidget(self.filter_edit)
+        if perf.ENABLED:
+            # live instrumentation overlay, only offered when instrumentation is on
+            import perfui
+            self.perf_overlay = perfui.PerfOverlay(central)
+            self.perf_btn = QtWidgets.QPushButton("Perf")
+            self.perf_btn.setCheckable(True)
+            self.perf_btn.setToolTip("Show live performance counters")
+            self.perf_btn.toggled.connect(self.perf_overlay.set_active)
+            toolbar.addWidget(self.perf_btn)
         layout.addLayout(toolbar)
+        layout.addWidget(self._build_bulk_bar())
 
         # columns area
         columns_area = QtWidgets.QHBoxLayout()
         self.columns = {}
+        column_cls = ColumnWidget
+        if self.virtual:
+            from listview import VirtualColumnWidget
+            column_cls = VirtualColumnWidget
         for key, title in COLUMN_ORDER:
-            col = ColumnWidget(key, title, self.label_lookup)
+            col = column_cls(key, title, self.label_lookup)
+            col.set_callbacks(self._on_task_move, self._on_task_update, self._on_task_delete)
+            col.on_selection_changed = self._on_selection_changed
+            col.on_drop = self._on_card_dropped
             self.columns[key] = col
             columns_area.addWidget(col, 1)
         layout.addLayout(columns_area)
@@ -68,51 +284,429 @@ class MainWindow(QtWidgets.QMainWindow):
         # fill columns with tasks
         self.refresh_columns()
 
+    def _build_bulk_bar(self) -> QtWidgets.QWidget:
+        """Actions for the selected cards (ctrl/shift-click or "Select all"); hidden while nothing is selected."""
+        self.bulk_bar = QtWidgets.QWidget()
+        bar = QtWidgets.QHBoxLayout(self.bulk_bar)
+        bar.setContentsMargins(0, 0, 0, 0)
+        self.selection_label = QtWidgets.QLabel()
+        bar.addWidget(self.selection_label)
+
+        move_btn = QtWidgets.QPushButton("Move to")
+        move_menu = QtWidgets.QMenu(move_btn)
+        for key, title in COLUMN_ORDER:
+            move_menu.addAction(title, lambda key=key: self._bulk_move(key))
+        move_btn.setMenu(move_menu)
+        bar.addWidget(move_btn)
+
+        label_btn = QtWidgets.QPushButton("Set label")
+        self.bulk_label_menu = QtWidgets.QMenu(label_btn)
+        # labels can change at any time, so the menu is filled when it opens
+        self.bulk_label_menu.aboutToShow.connect(self._fill_bulk_label_menu)
+        label_btn.setMenu(self.bulk_label_menu)
+        bar.addWidget(label_btn)
+
+        progress_btn = QtWidgets.QPushButton("Set progress")
+        progress_btn.clicked.connect(self._bulk_progress_dialog)
+        bar.addWidget(progress_btn)
+        delete_btn = QtWidgets.QPushButton("Delete")
+        delete_btn.clicked.connect(self._bulk_delete)
+        bar.addWidget(delete_btn)
+        clear_btn = QtWidgets.QPushButton("Clear selection")
+        clear_btn.clicked.connect(self._clear_selection)
+        bar.addWidget(clear_btn)
+        bar.addStretch()
+        self.bulk_bar.hide()
+        return self.bulk_bar
+
+    def _mark_startup(self, stage: str):
+        self.startup_times[stage] = (time.perf_counter() - self._t_start) * 1000
+        perf.observe(f"startup.{stage}", self.startup_times[stage])
+        if stage in ("first_paint", "loaded") and {"first_paint", "loaded"} <= self.startup_times.keys():
+            self.startupFinished.emit()
+
+    def paintEvent(self, event):
+        if "first_paint" not in self.startup_times:
+            self._mark_startup("first_paint")
+        super().paintEvent(event)
+
+    def _start_progressive_load(self):
+        """Stream records from the backend and add cards in time-sliced batches (see _load_slice)."""
+        self._loader = self.backend.iter_load()
+        self._backlog = {key: collections.deque() for key, _ in COLUMN_ORDER}
+        self._shown = {key: 0 for key, _ in COLUMN_ORDER}
+        self._late_labels = False
+        # tasks the store gave a rank to, saved once the load is complete
+        self._unranked: List[Task] = []
+        # creating tasks, editing labels or leaving the board needs the whole board
+        self._set_board_actions_enabled(False)
+        self._load_timer = QtCore.QTimer(self)
+        self._load_timer.setInterval(0)
+        self._load_timer.timeout.connect(self._load_slice)
+        self._load_timer.start()
+
+    def _load_slice(self):
+        """One QTimer tick of progressive loading: parse and place cards for up to LOAD_SLICE_MS."""
+        deadline = time.perf_counter() + LOAD_SLICE_MS / 1000
+        while time.perf_counter() < deadline:
+            if self._loader is not None:
+                rec = next(self._loader, None)
+                if rec is None:
+                    self._loader = None
+                    continue
+                kind, obj = rec
+                if kind == "label":
+                    # update the shared lookup in place so the columns see the label too
+                    self.labels.append(obj)
+                    self.label_lookup[obj.id] = obj
+                    self._label_state[obj.id] = (obj.name, obj.color)
+                    self._late_labels = self._late_labels or len(self.store) > 0
+                    continue
+                if obj.rank is None:
+                    self._unranked.append(obj)
+                self.store.add(obj)
+                self.search.add(obj)
+                backlog = self._backlog.get(obj.column)
+                if backlog is None:
+                    continue
+                if not backlog and self._shown[obj.column] < FIRST_SCREEN_CARDS:
+                    self._show_loaded(obj.column, [obj])
+                else:
+                    backlog.append(obj)
+            else:
+                # everything is parsed: drain the backlogs round-robin so all columns keep filling
+                pending = [(key, q) for key, q in self._backlog.items() if q]
+                if not pending:
+                    self._finish_progressive_load()
+                    return
+                for key, q in pending:
+                    size = max(LOAD_PAGE_CARDS, self._shown[key] // LOAD_PAGE_GROWTH)
+                    self._show_loaded(key, [q.popleft() for _ in range(min(size, len(q)))])
+
+    def _show_loaded(self, key: str, tasks: List[Task]):
+        # a task may have been moved or deleted while it was waiting in a backlog
+        tasks = [t for t in tasks if t.id in self.store and t.column == key]
+        self.columns[key].add_tasks(tasks)
+        self._shown[key] += len(tasks)
+        # the active filter was computed before these tasks were loaded
+        for t in tasks:
+            self._refilter_task(t)
+
+    def _finish_progressive_load(self):
+        self._load_timer.stop()
+        self._set_board_actions_enabled(True)
+        self.board.save_tasks(self._unranked)
+        # the cards came in file order; journal records and other programs' edits may not be in card order
+        for key, _ in COLUMN_ORDER:
+            self._sort_cards(key)
+        self._schedule_rebalance()
+        self._archive_done()
+        if self.watcher is not None:
+            self.watcher.watch(self.board)
+        if self._late_labels:
+            for col in self.columns.values():
+                col.refresh_labels(self.label_lookup)
+        self._mark_startup("loaded")
+        print(f"startup: first paint {self.startup_times.get('first_paint', 0):.0f} ms, "
+              f"fully loaded {self.startup_times['loaded']:.0f} ms ({len(self.store)} tasks)", file=sys.stderr)
+
+    def _set_board_actions_enabled(self, enabled: bool):
+        for w in (self.add_task_btn, self.manage_labels_btn, self.archive_btn, self.board_combo, self.new_board_btn):
+            w.setEnabled(enabled)
+
+    def _fill_board_combo(self):
+        names = storage.list_boards()
+        for b in self.boards:
+            # a board opened with --board may not have been saved yet
+            if b.name not in names:
+                names.append(b.name)
+        self.board_combo.clear()
+        self.board_combo.addItems(names)
+        self.board_combo.setCurrentText(self.board.name)
+
+    def _switch_board(self, name: str):
+        """Show board `name`, loading it unless it is still cached; the old board stays cached."""
+        if name == self.board.name:
+            return
+        with perf.timed("ui.switch_board"):
+            self._clear_selection()
+            try:
+                board = self._open_board(name)
+            except (OSError, ValueError) as e:
+                QtWidgets.QMessageBox.warning(self, "Open board", f"Couldn't open board {name!r}: {e}")
+                self.board_combo.setCurrentText(self.board.name)
+                return
+            self.board = board
+            self._label_state = {l.id: (l.name, l.color) for l in self.labels}
+            self.refresh_columns()
+            self._update_title()
+            self.board_combo.setCurrentText(name)
+        self._schedule_rebalance()
+
+    def _create_board_dialog(self):
+        name, ok = QtWidgets.QInputDialog.getText(self, "New board", "Board name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        try:
+            storage.create_board(name)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.warning(self, "New board", f"Couldn't create board {name!r}: {e}")
+            return
+        self._fill_board_combo()
+        self._switch_board(name)
+
     def apply_stylesheet(self):
-        font_px = max(10, int(self.base_font * self.scale))
-        self.app.setStyleSheet(styles.qss(font_size_px=font_px))
-        # also adjust global application font (helps some controls)
-        f = QtGui.QFont()
-        f.setPointSize(max(9, int(font_px * 0.9)))
-        self.app.setFont(f)
+        qss = styles.qss()
+        if self.app.styleSheet() != qss:
+            # (re)setting it re-polishes every widget, which is why it doesn't depend on the scale
+            self.app.setStyleSheet(qss)
+        ui.set_ui_fonts(ui.ui_fonts(self.scale))
 
     def _change_scale(self, delta: float):
-        self.scale = max(0.7, min(1.6, self.scale + delta))
-        self.apply_stylesheet()
-        # After scaling we may want to force relayout/resize
-        self.adjustSize()
+        scale = round(max(styles.MIN_SCALE, min(styles.MAX_SCALE, self.scale + delta)), 2)
+        if scale == self.scale:
+            return
+        self.scale = scale
+        with perf.timed("ui.change_scale"):
+            fonts = ui.ui_fonts(scale)
+            ui.set_ui_fonts(fonts)
+            # the chrome now; the columns rescale the cards in view and defer the rest (see ColumnWidget.set_fonts)
+            ui.apply_fonts(self, fonts)
 
     def refresh_columns(self):
-        # update label lookup (maybe changed)
-        self._rebuild_label_lookup()
-        tasks_by_col = {k: [] for k,_ in COLUMN_ORDER}
-        for t in self.tasks:
-            tasks_by_col.setdefault(t.column, []).append(t)
-        for key, _ in COLUMN_ORDER:
-            col_widget = self.columns[key]
-            col_widget.set_tasks(tasks_by_col.get(key, []), self._on_task_move, self._on_task_update, self._on_task_delete)
+        with perf.timed("ui.refresh_columns"):
+            # update label lookup (maybe changed)
+            self._rebuild_label_lookup()
+            for key, _ in COLUMN_ORDER:
+                col_widget = self.columns[key]
+                col_widget.set_tasks(self.store.column(key), self._on_task_move, self._on_task_update, self._on_task_delete)
+            if self._query is not None:
+                self._apply_filter()
+
+    def _place_task(self, task: Task):
+        """Move the task's existing card into its current column, or create one if it has none."""
+        target = self.columns[task.column]
+        if target.has_task(task.id):
+            return
+        for col in self.columns.values():
+            if col is not target and col.has_task(task.id):
+                widget = col.take_widget(task.id)
+                if widget is not None:
+                    target.insert_widget(widget)
+                    return
+        target.add_task(task)
+
+    def _sort_cards(self, key: str):
+        """Reorder a column's cards to the store's order, moving as few of them as possible."""
+        col = self.columns[key]
+        shown = col.task_ids()
+        want = [tid for tid in self.store.column_ids(key) if col.has_task(tid)]
+        if shown == want:
+            return
+        with perf.timed("ui.sort_cards"):
+            pos = {tid: i for i, tid in enumerate(want)}
+            # the cards on a longest run already in order stay, the others move in front of their successor
+            keep = set(_longest_increasing([pos[tid] for tid in shown if tid in pos]))
+            for i in range(len(want) - 1, -1, -1):
+                if i not in keep:
+                    col.move_card(want[i], want[i + 1] if i + 1 < len(want) else None)
+
+    def _on_card_dropped(self, task_id: str, column: str, before: Optional[str]):
+        """A card was dragged in front of the card `before` in `column` (None: to its end).
+
+        Only the moved task gets a new rank (see TaskStore.move), so that is all the backend writes.
+        """
+        task = self.store.get(task_id)
+        target = self.columns.get(column)
+        if task is None or target is None or before == task_id:
+            return
+        if task.column == column and target.has_task(task_id) and target.next_card(task_id) == before:
+            # dropped where it already was
+            return
+        with perf.timed("ui.card_dropped"):
+            rekeyed = self.store.move(task, column, before)
+            self.board.save_tasks([task] + rekeyed)
+            self.search.update(task)
+            source = next((col for col in self.columns.values() if col.has_task(task_id)), None)
+            if source is target:
+                target.move_card(task_id, before)
+            else:
+                widget = source.take_widget(task_id) if source is not None else None
+                if widget is not None:
+                    target.insert_widget(widget, before)
+                else:
+                    target.add_task(task, before)
+            self._refilter_task(task)
+        self._schedule_rebalance()
+        if column == DONE_COLUMN:
+            self._archive_done()
+
+    def _schedule_rebalance(self):
+        if self.store.unbalanced:
+            # restarted by every change that adds a long rank, so it waits for a pause
+            self._rebalance_timer.start()
+
+    def _rebalance(self):
+        for board in self.boards:
+            board.rebalance()
 
     def _on_task_move(self, task: Task, target_col: str):
-        for i, t in enumerate(self.tasks):
-            if t.id == task.id:
-                self.tasks[i] = task
-                break
+        if task.id in self.store:
+            self.store.move(task, target_col)
         else:
-            self.tasks.append(task)
-        storage.save_data(self.tasks, self.labels)
-        self.refresh_columns()
+            self.store.add(task)
+        self.backend.put_task(task)
+        self.search.update(task)
+        self._place_task(task)
+        self._refilter_task(task)
+        if target_col == DONE_COLUMN:
+            self._archive_done()
 
     def _on_task_update(self, task: Task):
-        for i, t in enumerate(self.tasks):
-            if t.id == task.id:
-                self.tasks[i] = task
-                break
-        storage.save_data(self.tasks, self.labels)
+        self.store.update(task)
+        self.backend.put_task(task)
+        self.search.update(task)
+        self._refilter_task(task)
 
     def _on_task_delete(self, task: Task):
-        self.tasks[:] = [t for t in self.tasks if t.id != task.id]
-        storage.save_data(self.tasks, self.labels)
-        self.refresh_columns()
+        self.store.remove(task.id)
+        self.backend.delete_task(task.id)
+        self.search.remove(task.id)
+        for col in self.columns.values():
+            col.remove_task(task.id)
+
+    def _selected_tasks(self) -> List[Task]:
+        return [t for col in self.columns.values() for t in col.selected_tasks()]
+
+    def _on_selection_changed(self):
+        if self._bulk_running:
+            return
+        n = len(self._selected_tasks())
+        self.selection_label.setText(f"{n} selected")
+        self.bulk_bar.setVisible(n > 0)
+
+    def _clear_selection(self):
+        self._bulk_running = True
+        try:
+            for col in self.columns.values():
+                col.clear_selection()
+        finally:
+            self._bulk_running = False
+        self._on_selection_changed()
+
+    def _take_selection(self) -> List[Task]:
+        """The selected tasks; the selection itself is cleared, bulk actions apply once."""
+        tasks = self._selected_tasks()
+        self._clear_selection()
+        return tasks
+
+    def _bulk(self, action: str, tasks: List[Task], change: Callable[[Task], None]):
+        """Apply `change` to every task as one transaction: one backend batch, then one UI pass.
+
+        `change` updates the store and the backend for a single task; the caller
+        reconciles the columns afterwards.
+        """
+        with perf.timed(f"ui.bulk_{action}"):
+            with self.backend.batch():
+                for t in tasks:
+                    change(t)
+        perf.count(f"ui.bulk_{action}.tasks", len(tasks))
+
+    def _bulk_move(self, target_col: str):
+        tasks = [t for t in self._take_selection() if t.column != target_col]
+        if not tasks:
+            return
+        sources = {t.id: t.column for t in tasks}
+        def move(t: Task):
+            self.store.move(t, target_col)
+            self.backend.put_task(t)
+            self.search.update(t)
+        self._bulk("move", tasks, move)
+        self.setUpdatesEnabled(False)
+        try:
+            # hand the existing cards over in one page; columns that have no widgets to give
+            # (the virtual ones) get the tasks re-added instead
+            widgets = []
+            for key, ids in self._group_by_column(tasks, sources).items():
+                widgets += self.columns[key].take_widgets(ids)
+            adopted = {w.task.id for w in widgets}
+            target = self.columns[target_col]
+            target.insert_widgets(widgets)
+            target.add_tasks([t for t in tasks if t.id not in adopted])
+            for t in tasks:
+                self._refilter_task(t)
+            if target_col == DONE_COLUMN:
+                self._archive_done()
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _fill_bulk_label_menu(self):
+        self.bulk_label_menu.clear()
+        self.bulk_label_menu.addAction("No label", lambda: self._bulk_set_label(None))
+        for l in self.labels:
+            self.bulk_label_menu.addAction(l.name, lambda lid=l.id: self._bulk_set_label(lid))
+
+    def _bulk_set_label(self, label_id: Optional[str]):
+        tasks = [t for t in self._take_selection() if t.label_id != label_id]
+        def relabel(t: Task):
+            t.label_id = label_id
+            self.store.update(t)
+            self.backend.put_task(t)
+        self._bulk("relabel", tasks, relabel)
+        self._refresh_cards(tasks)
+
+    def _bulk_progress_dialog(self):
+        if not self._selected_tasks():
+            return
+        value, ok = QtWidgets.QInputDialog.getInt(self, "Set progress", "Progress (%):", 0, 0, 100)
+        if ok:
+            self._bulk_set_progress(value)
+
+    def _bulk_set_progress(self, progress: int):
+        tasks = [t for t in self._take_selection() if t.progress != progress]
+        def set_progress(t: Task):
+            t.progress = progress
+            self.store.update(t)
+            self.backend.put_task(t)
+            self.search.update(t)
+        self._bulk("progress", tasks, set_progress)
+        self._refresh_cards(tasks)
+
+    @staticmethod
+    def _group_by_column(tasks: List[Task], columns: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
+        """Task ids per column (the task's current column unless `columns` maps id -> column)."""
+        by_column: Dict[str, List[str]] = {}
+        for t in tasks:
+            key = columns[t.id] if columns is not None else t.column
+            by_column.setdefault(key, []).append(t.id)
+        return by_column
+
+    def _refresh_cards(self, tasks: List[Task]):
+        for key, ids in self._group_by_column(tasks).items():
+            self.columns[key].refresh_tasks(ids)
+        for t in tasks:
+            self._refilter_task(t)
+
+    def _bulk_delete(self):
+        tasks = self._selected_tasks()
+        if not tasks:
+            return
+        answer = QtWidgets.QMessageBox.question(self, "Delete tasks", f"Delete {len(tasks)} selected task(s)?")
+        if answer != QtWidgets.QMessageBox.Yes:
+            return
+        tasks = self._take_selection()
+        def delete(t: Task):
+            self.store.remove(t.id)
+            self.backend.delete_task(t.id)
+            self.search.remove(t.id)
+        self._bulk("delete", tasks, delete)
+        self.setUpdatesEnabled(False)
+        try:
+            for key, ids in self._group_by_column(tasks).items():
+                self.columns[key].remove_tasks(ids)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _create_task_dialog(self):
         title, ok = QtWidgets.QInputDialog.getText(self, "New task", "Task name:")
@@ -124,38 +718,244 @@ class MainWindow(QtWidgets.QMainWindow):
             return
         label_id = pick.selected_id  # may be None for "No label"
         new_task = Task.new(title.strip(), label_id)
-        self.tasks.append(new_task)
-        storage.save_data(self.tasks, self.labels)
-        self.refresh_columns()
+        self.store.add(new_task)
+        self.backend.put_task(new_task)
+        self.search.add(new_task)
+        self.columns[new_task.column].add_task(new_task)
+        self._refilter_task(new_task)
 
     def _open_label_manager(self):
         dlg = LabelDialog(self.labels, parent=self)
-        # listen to signals so we update immediately if labels are changed
-        dlg.labelsChanged.connect(self._on_labels_changed)
+        # every change says which label changed and how, so only the affected cards are touched
+        dlg.labelChanged.connect(self._on_label_changed)
         dlg.exec_()
-        # After closed ensure label sync just in case
-        self._on_labels_changed()
 
-    def _on_labels_changed(self):
-        # Rebuild label lookup & sanitize tasks referencing deleted labels
-        self._rebuild_label_lookup()
-        valid_ids = {l.id for l in self.labels}
-        for t in self.tasks:
-            if t.label_id and t.label_id not in valid_ids:
-                t.label_id = None
-        storage.save_data(self.tasks, self.labels)
-        # Refresh columns and widgets to pick up new colors/names
-        for col in self.columns.values():
-            col.refresh_labels(self.label_lookup)
-        # If tasks were changed (label deleted) also refresh the whole layout
-        self.refresh_columns()
+    def _open_archive(self):
+        dlg = ArchiveDialog(self.board.archive, self.label_lookup, parent=self)
+        dlg.restoreRequested.connect(self._restore_archived)
+        dlg.exec_()
+
+    def _restore_archived(self, tasks: List[Task]):
+        """Put archived tasks back on the board (finished ones count as finished just now)."""
+        ids = {t.id for t in tasks}
+        # a task can be in both places after a crash mid-archive; the board's copy wins
+        tasks = [archive.restored(t) for t in tasks if t.id not in self.store]
+        with perf.timed("ui.restore_archived"):
+            with self.backend.batch():
+                for t in tasks:
+                    self.store.add(t)
+                    self.backend.put_task(t)
+                    self.search.add(t)
+            for key, col_ids in self._group_by_column(tasks).items():
+                self.columns[key].add_tasks([self.store.get(tid) for tid in col_ids])
+            for t in tasks:
+                self._refilter_task(t)
+            try:
+                self.board.archive.remove(ids)
+            except OSError as e:
+                # the tasks are back on the board either way; restoring them again is a no-op
+                self.statusBar().showMessage(f"Couldn't update the archive ({e})", 10000)
+
+    def _on_labels_changed(self, persist: bool = True):
+        """Catch up after self.labels was edited directly: diff it and apply each change.
+
+        `persist` is False when the changes are already saved (merged from the data file, or made through the API).
+        """
+        current = {l.id: l for l in self.labels}
+        for lid in [lid for lid in self._label_state if lid not in current]:
+            self._on_label_changed(lid, LABEL_DELETED, persist)
+        for lid, l in current.items():
+            old = self._label_state.get(lid)
+            if old is None:
+                self._on_label_changed(lid, LABEL_ADDED, persist)
+                continue
+            if l.name != old[0]:
+                self._on_label_changed(lid, LABEL_RENAMED, persist)
+            if l.color != old[1]:
+                self._on_label_changed(lid, LABEL_RECOLORED, persist)
+
+    def _on_label_changed(self, label_id: str, kind: str, persist: bool = True):
+        """Apply one label change: persist it and restyle only the cards using that label."""
+        with perf.timed("ui.label_changed"):
+            if kind == LABEL_DELETED:
+                self.label_lookup.pop(label_id, None)
+                self._label_state.pop(label_id, None)
+                # only the tasks that used the deleted label need touching (a merge has already
+                # cleared them, and reports them as updated)
+                affected = self.store.clear_label(label_id)
+                if persist:
+                    with self.backend.batch():
+                        for t in affected:
+                            self.backend.put_task(t)
+                        self.backend.delete_label(label_id)
+            else:
+                label = next((l for l in self.labels if l.id == label_id), None)
+                if label is None:
+                    return
+                self.label_lookup[label_id] = label
+                self._label_state[label_id] = (label.name, label.color)
+                if persist:
+                    self.backend.put_label(label)
+                # a new label isn't on any card yet
+                affected = [] if kind == LABEL_ADDED else self.store.with_label(label_id)
+            for key, ids in self._group_by_column(affected).items():
+                self.columns[key].refresh_task_labels(ids)
+            if self._query is not None and self._query.label is not None and kind != LABEL_RECOLORED:
+                # which tasks match label:<name> may have changed
+                self._apply_filter()
+
+    def _apply_filter(self):
+        """Narrow every column to the tasks matching the filter bar (cards are hidden, not rebuilt)."""
+        with perf.timed("ui.filter"):
+            query = parse_query(self.filter_edit.text())
+            self._query = None if query.is_empty() else query
+            ids = None if self._query is None else self.search.search(self._query, self.labels)
+            for col in self.columns.values():
+                col.set_filter(ids)
+
+    def _refilter_task(self, task: Task):
+        """Show or hide one card after its task changed while a filter is active."""
+        if self._query is not None:
+            self.columns[task.column].set_task_visible(task.id, self._query.matches(task, self.label_lookup))
+
+    def _on_external_changes(self, board: Board, changes: Changes):
+        """Show what a merge took from the data file: only the cards and labels it changed."""
+        if changes.kept:
+            self.statusBar().showMessage(f"{board.data_file.name} changed on disk; kept your newer edits to "
+                                         f"{len(changes.kept)} item(s)", 10000)
+        if board is self.board:
+            # the other boards' columns are built from their stores when they are shown
+            self._show_changes(changes)
+
+    def _on_api_calls(self, calls: List["api.Call"]):
+        """Run a batch of API requests against the open board, then show the result in one pass."""
+        if self._load_timer is not None and self._load_timer.isActive():
+            for call in calls:
+                call.respond(503, {"error": "the board is still loading"})
+            return
+        import api
+        changes = api.apply(self.board, calls)
+        self._show_changes(changes)
+        if any(t.column == DONE_COLUMN for t in changes.added + changes.updated):
+            self._archive_done()
+
+    def _show_changes(self, changes: Changes):
+        """Update just the cards and labels in `changes`; the store, labels and backend already have them."""
+        if not changes:
+            return
+        with perf.timed("ui.show_changes"):
+            if changes.labels:
+                self._on_labels_changed(persist=False)
+            self.setUpdatesEnabled(False)
+            try:
+                for key, ids in self._group_by_column(changes.removed).items():
+                    self.columns[key].remove_tasks(ids)
+                # a script may have used a column this window doesn't have
+                shown = {t.id: t for t in changes.added + changes.updated if t.id in self.store and t.column in self.columns}
+                # cards that changed column are handed over, and new ones added, a page per column
+                # (see _bulk_move); the virtual columns have no widgets to hand over
+                taking: Dict[str, List[str]] = {}
+                for t in shown.values():
+                    source = next((key for key, col in self.columns.items() if col.has_task(t.id)), None)
+                    if source is not None and source != t.column:
+                        taking.setdefault(source, []).append(t.id)
+                widgets = []
+                for key, ids in taking.items():
+                    widgets += self.columns[key].take_widgets(ids)
+                for key, _ in COLUMN_ORDER:
+                    self.columns[key].insert_widgets([w for w in widgets if w.task.column == key])
+                missing = [t for t in shown.values() if not self.columns[t.column].has_task(t.id)]
+                for key, ids in self._group_by_column(missing).items():
+                    self.columns[key].add_tasks([shown[tid] for tid in ids])
+                # moved-in and new cards were appended, and other programs may have reordered some
+                for key in {t.column for t in shown.values()}:
+                    self._sort_cards(key)
+                self._refresh_cards([t for t in changes.updated if t.id in shown])
+                for t in changes.added:
+                    if t.id in shown:
+                        self._refilter_task(t)
+            finally:
+                self.setUpdatesEnabled(True)
+            self._schedule_rebalance()
+        perf.count("ui.show_changes.tasks", len(changes.added) + len(changes.updated) + len(changes.removed))
+
+    def _on_save_failed(self, message: str):
+        self.statusBar().showMessage(f"Couldn't save tasks ({message}); retrying", 10000)
+        if self.watcher is not None:
+            # the file may have changed on disk: merge it before the retry
+            self.watcher.check()
 
     def closeEvent(self, event):
-        storage.save_data(self.tasks, self.labels)
+        if self._load_timer is not None:
+            self._load_timer.stop()
+        if self.stall_monitor is not None:
+            self.stall_monitor.stop()
+        if self.api_server is not None:
+            self.api_server.stop()
+        if self.watcher is not None:
+            # closing the boards merges anything still unmerged itself
+            self.watcher.stop()
+        # waits for saves still running on the worker threads, for every cached board
+        self.boards.close()
         super().closeEvent(event)
 
+def parse_args(argv: List[str]):
+    """Parse our own options; anything unrecognised is left for Qt."""
+    parser = argparse.ArgumentParser(description="Minimal Task Tracker")
+    parser.add_argument("--board", default=os.environ.get("TASKAPP_BOARD", storage.DEFAULT_BOARD),
+                        help="board to open (or TASKAPP_BOARD); other boards are loaded when switched to")
+    parser.add_argument("--storage", choices=sorted(storage.BACKENDS), default=None,
+                        help="storage backend (default: $TASKAPP_STORAGE or json)")
+    parser.add_argument("--binary-snapshot", action="store_true", default=storage.BINARY_SNAPSHOT,
+                        help="keep a binary tasks.bin next to tasks.json for faster loads (or TASKAPP_SNAPSHOT=bin)")
+    parser.add_argument("--progressive", action="store_true", default=os.environ.get("TASKAPP_PROGRESSIVE") == "1",
+                        help="show the window first and stream cards in afterwards (or TASKAPP_PROGRESSIVE=1)")
+    parser.add_argument("--watch", action="store_true", default=os.environ.get("TASKAPP_WATCH") == "1",
+                        help="merge in changes other programs make to the board files (or TASKAPP_WATCH=1; json storage only)")
+    parser.add_argument("--api", nargs="?", const="", default=os.environ.get("TASKAPP_API") or None,
+                        metavar="HOST:PORT|unix:PATH",
+                        help="serve a local HTTP/JSON API for scripts (on 127.0.0.1:8765 if no address is given; or TASKAPP_API)")
+    parser.add_argument("--virtual", action="store_true", default=os.environ.get("TASKAPP_VIRTUAL") == "1",
+                        help="virtualized column rendering for very large boards (or TASKAPP_VIRTUAL=1)")
+    parser.add_argument("--perf", action="store_true", default=perf.ENABLED,
+                        help="collect hot-path timings and counters (or TASKAPP_PERF=1)")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print startup timings as JSON once the board is on screen, then quit (used by bench.py)")
+    parser.add_argument("--perf-file", default=os.environ.get("TASKAPP_PERF_FILE", "taskapp-perf.json"),
+                        help="where --perf writes its JSON dump on exit")
+    return parser.parse_known_args(argv[1:])
+
+def startup_report(window: MainWindow, marks: Dict[str, float]) -> Dict[str, float]:
+    """Milliseconds from the first import in this module to each startup stage.
+
+    `marks` holds perf_counter() times taken by __main__; the window adds first paint
+    and fully loaded. Interpreter startup itself comes before all of them.
+    """
+    points = dict(marks, imports=_T_IMPORTED)
+    for stage, ms in window.startup_times.items():
+        points[stage] = window._t_start + ms / 1000
+    report = {stage: round((t - _T_IMPORT) * 1000, 1) for stage, t in sorted(points.items(), key=lambda p: p[1])}
+    report["tasks"] = len(window.store)
+    return report
+
 if __name__ == "__main__":
-    app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow(app)
+    args, qt_args = parse_args(sys.argv)
+    perf.enable(args.perf)
+    storage.BINARY_SNAPSHOT = args.binary_snapshot
+    app = QtWidgets.QApplication(sys.argv[:1] + qt_args)
+    marks = {"qapplication": time.perf_counter()}
+    window = MainWindow(app, backend=args.storage, virtual=args.virtual, progressive=args.progressive, board=args.board,
+                        watch=args.watch, api_address=args.api)
+    marks["window_built"] = time.perf_counter()
+    if args.startup_report:
+        def report():
+            import json
+            print(json.dumps(startup_report(window, marks)), flush=True)
+            app.quit()
+        window.startupFinished.connect(report)
     window.show()
-    sys.exit(app.exec_())
+    code = app.exec_()
+    if perf.ENABLED:
+        perf.dump(args.perf_file)
+        print(f"perf: wrote {args.perf_file}", file=sys.stderr)
+    sys.exit(code)
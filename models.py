@@ -1,27 +1,173 @@
 # models.py
 # Data models for the task tracker.
-from dataclasses import dataclass, asdict
+#
+# Both models are slotted (no per-instance __dict__). Column keys and label ids
+# are interned, so every task in a column / with a label shares one string
+# object, and task ids are kept as 16 raw UUID bytes. Serialize with to_dict().
+# A task loaded from a binary snapshot decodes its title on first access.
+# Tasks in the "done" column carry done_at (Unix time they got there), which the
+# archive (archive.py) uses to tell how long they have been finished. Cards are
+# ordered within their column by Task.rank, a sort key from ranks.py; a task
+# without one (older files, imports) gets one when it joins a TaskStore.
+#
+# Everything imports this at startup, and uuid and dataclasses each take longer to
+# import than a small board takes to load: Label is written out like Task, ids are
+# packed by hand, and uuid is only imported to create a new record.
 from typing import List, Optional
-import uuid
+import sys
+
+# Column identifiers and human labels
+COLUMN_ORDER = [("todo", "TO-DO"), ("in_progress", "IN PROGRESS"), ("done", "COMPLETED")]
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+def _new_id() -> str:
+    import uuid
+    return str(uuid.uuid4())
+
+def _pack_id(value: str):
+    """16 UUID bytes for a canonical (lowercase, hyphenated) uuid string; anything else is kept as-is so it round-trips."""
+    if value.__class__ is not str or len(value) != 36 or value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return value
+    h = value.replace("-", "")
+    try:
+        raw = bytes.fromhex(h)
+    except ValueError:
+        return value
+    # fromhex also skips whitespace and takes uppercase, neither of which would round-trip
+    return raw if len(raw) == 16 and raw.hex() == h else value
+
+def _unpack_id(raw) -> str:
+    if isinstance(raw, bytes):
+        h = raw.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return raw
 
-@dataclass
 class Label:
-    id: str
-    name: str
-    color: str  # hex string like "#ff00aa"
+    __slots__ = ("id", "name", "color")
+
+    def __init__(self, id: str, name: str, color: str):
+        self.id = sys.intern(id)
+        self.name = name
+        self.color = color  # hex string like "#ff00aa"
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.id, self.name, self.color) == (other.id, other.name, other.color)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Label(id={self.id!r}, name={self.name!r}, color={self.color!r})"
 
     @staticmethod
     def new(name: str, color: str) -> "Label":
-        return Label(id=str(uuid.uuid4()), name=name, color=color)
+        return Label(id=_new_id(), name=name, color=color)
+
+    @staticmethod
+    def from_dict(raw: dict) -> "Label":
+        return Label(id=raw["id"], name=raw["name"], color=raw["color"])
+
+    def copy(self) -> "Label":
+        return Label(id=self.id, name=self.name, color=self.color)
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "name": self.name, "color": self.color}
 
-@dataclass
 class Task:
-    id: str
-    title: str
-    progress: int  # 0..100
-    label_id: Optional[str]
-    column: str  # "todo" | "in_progress" | "done"
+    __slots__ = ("_id", "_title", "progress", "_label_id", "_column", "done_at", "rank")
+    FIELDS = ("id", "title", "progress", "label_id", "column", "done_at", "rank")
+
+    def __init__(self, id: str, title: str, progress: int, label_id: Optional[str], column: str,
+                 done_at: Optional[float] = None, rank: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.progress = progress  # 0..100
+        self.label_id = label_id
+        self.column = column  # "todo" | "in_progress" | "done"
+        self.done_at = done_at  # when it was moved to "done" (None outside "done", or unknown)
+        self.rank = rank  # sort key within the column (see ranks.py)
+
+    @property
+    def id(self) -> str:
+        return _unpack_id(self._id)
+
+    @id.setter
+    def id(self, value: str):
+        self._id = _pack_id(value)
+
+    @property
+    def title(self) -> str:
+        title = self._title
+        if title.__class__ is not str:
+            # still a reference into a binary snapshot (see snapshot.py)
+            title = self._title = title()
+        return title
+
+    @title.setter
+    def title(self, value: str):
+        self._title = value
+
+    @property
+    def label_id(self) -> Optional[str]:
+        return self._label_id
+
+    @label_id.setter
+    def label_id(self, value: Optional[str]):
+        self._label_id = _intern(value)
+
+    @property
+    def column(self) -> str:
+        return self._column
+
+    @column.setter
+    def column(self, value: str):
+        self._column = sys.intern(value)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Task(" + ", ".join(f"{f}={getattr(self, f)!r}" for f in self.FIELDS) + ")"
 
     @staticmethod
     def new(title: str, label_id: Optional[str]) -> "Task":
-        return Task(id=str(uuid.uuid4()), title=title, progress=0, label_id=label_id, column="todo")
+        return Task(id=_new_id(), title=title, progress=0, label_id=label_id, column="todo")
+
+    @staticmethod
+    def from_dict(raw: dict) -> "Task":
+        return Task(id=raw["id"], title=raw["title"], progress=raw["progress"], label_id=raw.get("label_id"), column=raw["column"],
+                    done_at=raw.get("done_at"), rank=raw.get("rank"))
+
+    @staticmethod
+    def from_packed(raw_id, title, progress: int, label_id: Optional[str], column: str, done_at: Optional[float] = None,
+                    rank: Optional[str] = None) -> "Task":
+        """Build from already packed/interned fields (binary snapshots); `title` may be a zero-arg callable."""
+        t = Task.__new__(Task)
+        t._id = raw_id
+        t._title = title
+        t.progress = progress
+        t._label_id = label_id
+        t._column = column
+        t.done_at = done_at
+        t.rank = rank
+        return t
+
+    def copy(self) -> "Task":
+        """A detached copy (a title not yet read from a snapshot stays lazy)."""
+        return Task.from_packed(self._id, self._title, self.progress, self._label_id, self._column, self.done_at, self.rank)
+
+    def to_dict(self) -> dict:
+        raw = {"id": self.id, "title": self.title, "progress": self.progress, "label_id": self._label_id, "column": self._column}
+        if self.done_at is not None:
+            # only finished tasks have one, so the other records stay as they were
+            raw["done_at"] = self.done_at
+        if self.rank is not None:
+            raw["rank"] = self.rank
+        return raw
@@ -0,0 +1,128 @@
+# perf.py
+# Optional hot-path instrumentation: counters and timing histograms, dumped to JSON on exit.
+# Qt-free so storage (and headless tools) can report too; the Qt side lives in perfui.py.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# turned on by TASKAPP_PERF=1 or main.py --perf; every hook is a no-op while this is False
+ENABLED = os.environ.get("TASKAPP_PERF") == "1"
+
+# histogram bucket upper bounds, in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class Histogram:
+    """Bucketed timing distribution with count/total/min/max."""
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(float(BUCKETS_MS[i]), self.max) if i < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "min_ms": round(self.min, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "buckets_ms": {("<=%g" % b): n for b, n in zip(BUCKETS_MS, self.buckets)} | {"inf": self.buckets[-1]},
+        }
+
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = {}
+_histograms: Dict[str, Histogram] = {}
+_started = time.time()
+
+def enable(flag: bool = True):
+    global ENABLED
+    ENABLED = flag
+
+def count(name: str, n: int = 1):
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+def observe(name: str, ms: float):
+    if not ENABLED:
+        return
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.add(ms)
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Record the duration of the block in histogram `name`."""
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, (time.perf_counter() - start) * 1000)
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started = time.time()
+
+def snapshot() -> dict:
+    with _lock:
+        return {
+            "started": _started,
+            "uptime_s": round(time.time() - _started, 3),
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {k: h.to_dict() for k, h in sorted(_histograms.items())},
+        }
+
+def summary_lines(limit: Optional[int] = None) -> List[str]:
+    """Short human-readable lines for the live overlay."""
+    snap = snapshot()
+    lines = [f"{k}: {v}" for k, v in snap["counters"].items()]
+    for k, h in snap["histograms"].items():
+        lines.append(f"{k}: n={h['count']} p50≤{h['p50_ms']:.1f}ms max={h['max_ms']:.1f}ms")
+    return lines[:limit] if limit else lines
+
+def dump(path: Path):
+    Path(path).write_text(json.dumps(snapshot(), indent=2), encoding="utf-8")
@@ -0,0 +1,90 @@
+# perfui.py
+# Qt side of the instrumentation: event-loop stall monitor, setStyleSheet counting and the live overlay.
+
+import time
+from PyQt5 import QtWidgets, QtCore
+import perf
+
+# event-loop heartbeat; a tick arriving more than STALL_MS late counts as a stall
+HEARTBEAT_MS = 50
+STALL_MS = 100
+
+_style_hooks_installed = False
+
+def install_style_hooks():
+    """Count every setStyleSheet call made from Python (widgets and the application)."""
+    global _style_hooks_installed
+    if _style_hooks_installed:
+        return
+    _style_hooks_installed = True
+    for cls, name in ((QtWidgets.QWidget, "qt.setStyleSheet.widget"), (QtWidgets.QApplication, "qt.setStyleSheet.app")):
+        original = cls.setStyleSheet
+        def hooked(self, sheet, _original=original, _name=name):
+            perf.count(_name)
+            return _original(self, sheet)
+        cls.setStyleSheet = hooked
+
+
+class StallMonitor(QtCore.QObject):
+    """Records how late a fixed-interval timer fires; lateness above STALL_MS is an event-loop stall."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(HEARTBEAT_MS)
+        self._timer.timeout.connect(self._tick)
+        self._last = time.perf_counter()
+
+    def start(self):
+        self._last = time.perf_counter()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        now = time.perf_counter()
+        late = (now - self._last) * 1000 - HEARTBEAT_MS
+        self._last = now
+        if late > STALL_MS:
+            perf.count("eventloop.stalls")
+            perf.observe("eventloop.stall_ms", late)
+
+
+class PerfOverlay(QtWidgets.QLabel):
+    """Small always-on-top panel in the corner of its parent showing the live counters."""
+    REFRESH_MS = 500
+
+    def __init__(self, parent: QtWidgets.QWidget):
+        super().__init__(parent)
+        self.setObjectName("perfOverlay")
+        self.setStyleSheet("background-color: rgba(0,0,0,0.75); color: #9AE6B4; font-family: monospace; font-size: 11px; padding: 6px; border-radius: 6px;")
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def set_active(self, on: bool):
+        if on:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def refresh(self):
+        self.setText("\n".join(perf.summary_lines(limit=24)) or "no samples yet")
+        self.adjustSize()
+        self._place()
+
+    def _place(self):
+        parent = self.parentWidget()
+        self.move(max(0, parent.width() - self.width() - 12), 48)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Resize and self.isVisible():
+            self._place()
+        return False
@@ -0,0 +1,158 @@
+# ranks.py
+# Sort keys for the manual card order (Task.rank): strings that sort like the cards, so a move re-keys only the moved card.
+#
+# A key is an "integer" part whose first character gives its length ('a'-'z' for
+# the positive ones, 'A'-'Z' for the negative ones), then an optional fraction.
+# The digits are base 62 in ASCII order, so plain string comparison orders keys.
+# Appending after the last key increments the integer, which keeps keys short
+# (a0 ... az, b00 ...). Inserting between two neighbours takes the midpoint of
+# their fractions, and repeated inserts at the same spot add a character every
+# few times. TaskStore flags keys longer than MAX_LENGTH, and
+# TaskStore.rebalance() spreads fresh keys over them and their neighbours.
+# This is the scheme of the "fractional-indexing" JavaScript package.
+
+from typing import List, Optional
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+_VALUE = {c: i for i, c in enumerate(DIGITS)}
+
+# the key of the first card of an empty column
+FIRST = "a0"
+
+# keys longer than this get rebalanced; appending alone stays below it up to 62**8 cards
+MAX_LENGTH = 10
+# ... to keys no longer than this, so the same spot takes many more inserts to need it again
+SPREAD_LENGTH = MAX_LENGTH // 2
+
+# the smallest integer part; a key before it can only extend its fraction
+_SMALLEST = "A" + "0" * 26
+
+
+def _int_length(head: str) -> int:
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    return 0
+
+
+def valid(key) -> bool:
+    """Whether `key` is a well-formed rank (a file written by another program may hold anything)."""
+    if key.__class__ is not str or not key:
+        return False
+    n = _int_length(key[0])
+    return (0 < n <= len(key) and not key[1:].strip(DIGITS) and key != _SMALLEST
+            and (len(key) == n or key[-1] != "0"))
+
+
+def _split(key: str):
+    n = _int_length(key[0])
+    return key[:n], key[n:]
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+    """A fraction between the fractions `a` and `b` (None: past every fraction); none of them ends in "0"."""
+    if b is not None:
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+    da = _VALUE[a[0]] if a else 0
+    db = _VALUE[b[0]] if b is not None else len(DIGITS)
+    if db - da > 1:
+        return DIGITS[(da + db) // 2]
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[da] + _midpoint(a[1:], None)
+
+
+def _increment(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = _VALUE[digits[i]] + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement(integer: str) -> Optional[str]:
+    head, digits = integer[0], list(integer[1:])
+    for i in range(len(digits) - 1, -1, -1):
+        d = _VALUE[digits[i]] - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def key_between(a: Optional[str], b: Optional[str]) -> str:
+    """A key that sorts after `a` and before `b` (None: no bound on that side); needs a < b."""
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"no key between {a!r} and {b!r}")
+    if a is None:
+        if b is None:
+            return FIRST
+        ib, fb = _split(b)
+        if ib == _SMALLEST:
+            return ib + _midpoint("", fb)
+        if ib < b:
+            # b has a fraction, so its integer part alone comes just before it
+            return ib
+        key = _decrement(ib)
+        if key is None:
+            raise ValueError(f"no key before {b!r}")
+        return key
+    ia, fa = _split(a)
+    if b is None:
+        key = _increment(ia)
+        return ia + _midpoint(fa, None) if key is None else key
+    ib, fb = _split(b)
+    if ia == ib:
+        return ia + _midpoint(fa, fb)
+    key = _increment(ia)
+    if key is not None and key < b:
+        return key
+    return ia + _midpoint(fa, None)
+
+
+def keys_between(a: Optional[str], b: Optional[str], n: int) -> List[str]:
+    """`n` ascending keys between `a` and `b`, as short as that range allows."""
+    if n <= 0:
+        return []
+    if n == 1:
+        return [key_between(a, b)]
+    if b is None:
+        keys = [key_between(a, None)]
+        for _ in range(n - 1):
+            keys.append(key_between(keys[-1], None))
+        return keys
+    if a is None:
+        keys = [key_between(None, b)]
+        for _ in range(n - 1):
+            keys.append(key_between(None, keys[-1]))
+        return keys[::-1]
+    mid = n // 2
+    c = key_between(a, b)
+    return keys_between(a, c, mid) + [c] + keys_between(c, b, n - mid - 1)
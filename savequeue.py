@@ -0,0 +1,177 @@
+# savequeue.py
+# Write-behind saving for the JSON backend: coalesces changes on the GUI thread, writes on a worker thread.
+#
+# Kept apart from storage.py because it needs Qt (timers and signals); storage
+# itself, and everything headless built on it (cli.py), imports without PyQt5.
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from PyQt5 import QtCore
+from models import Task, Label
+from storage import SAVE_INTERVAL, save_data
+import perf
+import sync
+
+
+def detach(tasks: List[Task], labels: List[Label]) -> Tuple[List[Task], List[Label]]:
+    """Private copies of `tasks` and `labels` for a background save.
+
+    The copies share nothing mutable with the originals, so the GUI thread can keep
+    editing while a worker serializes them.
+    """
+    with perf.timed("storage.detach"):
+        return [t.copy() for t in tasks], [l.copy() for l in labels]
+
+
+class SaveQueue(QtCore.QObject):
+    """Write-behind saver: marks the data dirty and flushes at most once per `interval` seconds.
+
+    `source` returns the current (tasks, labels). The coalescing timer runs on the
+    GUI thread, which reads `source` and detach()es it when the timer fires; the
+    copy is then dumped and written by a single worker thread, so a slow disk never
+    blocks the UI and at most one write is in flight. A failed write is reported
+    through `failed` and retried after another interval.
+
+    With `disk_state` set (see BoardWatcher), writes refuse to replace a file that
+    was rewritten since we last read or wrote it (storage.ChangedOnDisk, reported
+    like any failure), and `disk_sigs`/`touched` keep what the merge in sync.py needs.
+    """
+    failed = QtCore.pyqtSignal(str)
+    # emitted by the worker when a write ends: error message (None on success), new disk state, its signatures
+    _written = QtCore.pyqtSignal(object, object, object)
+
+    def __init__(self, source: Callable[[], Tuple[List[Task], List[Label]]], interval: float = SAVE_INTERVAL,
+                 data_file: Optional[Path] = None):
+        super().__init__()
+        self.source = source
+        self.interval = interval
+        self.data_file = data_file
+        # inbox bytes the source's data includes (set by the backend's load), dropped by the next save
+        self.inbox_seen = 0
+        self._writing_seen = 0
+        # file_state() of the data file as we last read or wrote it; None: don't check before writing
+        self.disk_state: Optional[Tuple[int, int]] = None
+        # sync.signatures() of the records in that file (kept while disk_state is set)
+        self.disk_sigs: sync.Signatures = ({}, {})
+        # record id -> when we last changed it, for the changes not written yet
+        self.touched: Dict[str, float] = {}
+        self._writing_touched: Dict[str, float] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="taskapp-save")
+        self._pending: Optional[Future] = None
+        self._dirty = False
+        self._last_flush = 0.0
+        self._paused = False
+        self._closed = False
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._written.connect(self._on_written)
+
+    def mark_dirty(self):
+        """Schedule a flush; repeated calls before it runs are coalesced."""
+        self._dirty = True
+        if self._timer.isActive() or self._paused or self._closed or self.writing():
+            # a running write reschedules itself when it ends (see _on_written)
+            return
+        delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+        self._timer.start(int(delay * 1000))
+
+    def touch(self, record_id: str):
+        """Note that a task or label was changed here (see sync.merge), then mark_dirty()."""
+        self.touched[record_id] = time.time()
+        self.mark_dirty()
+
+    def pause(self):
+        """Hold back flushes (e.g. while the data is still being loaded)."""
+        self._paused = True
+        self._timer.stop()
+
+    def resume(self):
+        self._paused = False
+        if self._dirty:
+            self.mark_dirty()
+
+    def writing(self) -> bool:
+        """Whether a write is running on the worker."""
+        return self._pending is not None and not self._pending.done()
+
+    def flush(self):
+        """Hand a detached copy of the data to the writer thread if anything changed since the last flush."""
+        self._timer.stop()
+        if not self._dirty or self.writing():
+            return
+        self._dirty = False
+        tasks, labels = detach(*self.source())
+        self._last_flush = time.monotonic()
+        # handed to this write; given back if it fails
+        self._writing_seen, self.inbox_seen = self.inbox_seen, 0
+        self._writing_touched, self.touched = self.touched, {}
+        self._pending = self._executor.submit(self._write, tasks, labels, self._writing_seen, self.disk_state)
+
+    def _write(self, tasks: List[Task], labels: List[Label], inbox_seen: int,
+               disk_state: Optional[Tuple[int, int]]) -> Tuple[Optional[str], object, object]:
+        # worker thread; the signal is queued to the GUI thread
+        error = state = sigs = None
+        try:
+            state = save_data(tasks, labels, self.data_file, inbox_seen, disk_state)
+            if disk_state is not None:
+                sigs = sync.signatures(tasks, labels)
+        except OSError as e:
+            error = str(e)
+        except Exception as e:
+            # not a disk problem (e.g. a value the binary snapshot can't pack), but it must
+            # still reach the UI and leave the data dirty, or saving would stop silently
+            error = f"{type(e).__name__}: {e}"
+        self._written.emit(error, state, sigs)
+        return error, state, sigs
+
+    def _on_written(self, error: Optional[str], state: Optional[Tuple[int, int]], sigs: Optional[sync.Signatures]):
+        # handled here; close() only has to deal with a write whose signal hasn't arrived
+        self._pending = None
+        if error is not None:
+            # keep the data dirty so the next flush retries
+            self._dirty = True
+            self.inbox_seen = max(self.inbox_seen, self._writing_seen)
+            self._restore_touched()
+            perf.count("storage.save_data.failures")
+            self.failed.emit(error)
+        else:
+            self._writing_touched = {}
+            if sigs is not None and self.disk_state is not None:
+                self.disk_state, self.disk_sigs = state, sigs
+        if self._dirty and not self._closed:
+            self.mark_dirty()
+
+    def _restore_touched(self):
+        # the failed write's changes are still ours only; later edits keep their newer times
+        for rid, t in self._writing_touched.items():
+            self.touched.setdefault(rid, t)
+        self._writing_touched = {}
+
+    def close(self):
+        """Wait for a running write, then flush synchronously (used on shutdown).
+
+        A paused queue is not flushed: its source only holds part of the data. If
+        the file changed on disk (storage.ChangedOnDisk) the data stays dirty, so the
+        caller can merge and close() again.
+        """
+        self._closed = True
+        self._timer.stop()
+        if self._pending is not None:
+            # still running, or its _on_written hasn't run (and won't before we return)
+            error, state, sigs = self._pending.result()
+            if error is not None:
+                self._dirty = True
+                self.inbox_seen = max(self.inbox_seen, self._writing_seen)
+                self._restore_touched()
+            elif sigs is not None and self.disk_state is not None:
+                self.disk_state, self.disk_sigs = state, sigs
+            self._pending = None
+        self._executor.shutdown()
+        if self._paused or not self._dirty:
+            return
+        tasks, labels = self.source()
+        save_data(list(tasks), list(labels), self.data_file, self.inbox_seen, self.disk_state)
+        self._dirty = False
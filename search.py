@@ -0,0 +1,213 @@
+# search.py
+# Filter-bar queries and the inverted index that answers them without scanning every title.
+#
+# Query syntax (terms are ANDed, case-insensitive):
+#   word               title contains "word" (substring, not just whole tokens)
+#   label:bug          label name contains "bug" (quote names with spaces: label:"in review")
+#   progress:20-80     progress between 20 and 80 inclusive; also progress:>50, progress:<=30, progress:100
+
+import re
+import shlex
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from models import Task, Label
+from store import TaskStore
+import perf
+
+_TOKEN = re.compile(r"\w+")
+_PROGRESS = re.compile(r"^(?:(\d+)-(\d+)|(<=|>=|<|>)?(\d+))$")
+
+
+def tokens(text: str) -> Set[str]:
+    return set(_TOKEN.findall(text.lower()))
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class Query:
+    """A parsed filter: title terms, a label-name fragment and a progress range (all lowercase)."""
+    __slots__ = ("terms", "label", "progress")
+
+    def __init__(self, terms: List[str], label: Optional[str] = None, progress: Optional[Tuple[int, int]] = None):
+        self.terms = terms
+        self.label = label
+        self.progress = progress
+
+    def is_empty(self) -> bool:
+        return not self.terms and self.label is None and self.progress is None
+
+    def matches(self, task: Task, label_lookup: Dict[str, Label]) -> bool:
+        """Check one task directly (used to re-filter a single edited card)."""
+        if self.progress is not None and not self.progress[0] <= task.progress <= self.progress[1]:
+            return False
+        if self.label is not None:
+            label = label_lookup.get(task.label_id) if task.label_id else None
+            if label is None or self.label not in label.name.lower():
+                return False
+        title = task.title.lower()
+        return all(t in title for t in self.terms)
+
+
+def parse_query(text: str) -> Query:
+    """Parse filter-bar text; unknown or half-typed filters are treated as title terms."""
+    try:
+        words = shlex.split(text)
+    except ValueError:
+        # an unbalanced quote while the user is still typing
+        words = text.replace('"', " ").replace("'", " ").split()
+    terms, label, progress = [], None, None
+    for word in words:
+        key, sep, value = word.partition(":")
+        key = key.lower()
+        if sep and key == "label" and value:
+            label = value.lower()
+        elif sep and key == "progress" and _parse_progress(value) is not None:
+            progress = _parse_progress(value)
+        else:
+            terms.append(word.lower())
+    return Query(terms, label, progress)
+
+def _parse_progress(value: str) -> Optional[Tuple[int, int]]:
+    m = _PROGRESS.match(value.replace(" ", ""))
+    if m is None:
+        return None
+    lo, hi, op, n = m.groups()
+    if lo is not None:
+        return min(int(lo), int(hi)), max(int(lo), int(hi))
+    n = int(n)
+    return {
+        None: (n, n), ">": (n + 1, 100), ">=": (n, 100), "<": (0, n - 1), "<=": (0, n),
+    }[op]
+
+
+class SearchIndex:
+    """Inverted index over the tasks in a TaskStore.
+
+    - token -> task ids (whole words)
+    - trigram -> task ids (substring candidates, confirmed against the title)
+    - progress value -> task ids
+
+    Labels are looked up through the store's own label index. The index is built
+    on the first search and kept up to date by add/update/remove afterwards, so a
+    board that is never filtered pays nothing for it.
+    """
+    def __init__(self, store: TaskStore):
+        self.store = store
+        self._built = False
+        self._tokens: Dict[str, Set[str]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._by_progress: List[Set[str]] = [set() for _ in range(101)]
+        self._title_of: Dict[str, str] = {}
+        self._progress_of: Dict[str, int] = {}
+
+    @property
+    def built(self) -> bool:
+        """Whether the index exists yet (it is built by the first search)."""
+        return self._built
+
+    def add(self, task: Task):
+        if not self._built:
+            return
+        task_id = task.id
+        if task_id in self._title_of:
+            self.update(task)
+            return
+        self._index_title(task_id, task.title.lower())
+        self._index_progress(task_id, task.progress)
+
+    def update(self, task: Task):
+        """Re-sync after a task was edited in place."""
+        if not self._built:
+            return
+        task_id = task.id
+        if task_id not in self._title_of:
+            self.add(task)
+            return
+        title = task.title.lower()
+        if self._title_of[task_id] != title:
+            self._unindex_title(task_id)
+            self._index_title(task_id, title)
+        if self._progress_of[task_id] != task.progress:
+            self._by_progress[self._progress_of[task_id]].discard(task_id)
+            self._index_progress(task_id, task.progress)
+
+    def remove(self, task_id: str):
+        if not self._built or task_id not in self._title_of:
+            return
+        self._unindex_title(task_id)
+        self._by_progress[self._progress_of.pop(task_id)].discard(task_id)
+
+    def search(self, query: Query, labels: Iterable[Label]) -> Set[str]:
+        """Ids of the tasks matching `query` (every task for an empty query)."""
+        with perf.timed("search.query"):
+            if not self._built:
+                self._build()
+            result: Optional[Set[str]] = None
+            if query.label is not None:
+                result = set()
+                for l in labels:
+                    if query.label in l.name.lower():
+                        result.update(t.id for t in self.store.with_label(l.id))
+            if query.progress is not None:
+                lo, hi = max(0, query.progress[0]), min(100, query.progress[1])
+                ids = set().union(*self._by_progress[lo:hi + 1]) if lo <= hi else set()
+                result = ids if result is None else result & ids
+            # most selective terms first, so the sets being intersected shrink quickly
+            for term in sorted(query.terms, key=len, reverse=True):
+                if result is not None and not result:
+                    break
+                ids = self._term(term, result)
+                result = ids if result is None else result & ids
+            return set(self._title_of) if result is None else result
+
+    def _term(self, term: str, within: Optional[Set[str]]) -> Set[str]:
+        """Ids whose title contains `term`."""
+        if len(term) < 3:
+            if _TOKEN.fullmatch(term):
+                # too short for trigrams: match against the (much smaller) token vocabulary
+                ids: Set[str] = set()
+                for token, tids in self._tokens.items():
+                    if term in token:
+                        ids |= tids
+                return ids
+            # a short term with punctuation or spaces isn't indexed at all
+            candidates = within if within is not None else self._title_of.keys()
+        else:
+            grams = sorted((self._trigrams.get(g, set()) for g in trigrams(term)), key=len)
+            candidates = grams[0].intersection(*grams[1:])
+            if within is not None:
+                candidates = candidates & within
+        # trigrams only narrow it down; confirm on the title
+        return {tid for tid in candidates if term in self._title_of[tid]}
+
+    def _build(self):
+        with perf.timed("search.build"):
+            self._built = True
+            for t in self.store:
+                self.add(t)
+
+    def _index_title(self, task_id: str, title: str):
+        self._title_of[task_id] = title
+        for tok in tokens(title):
+            self._tokens.setdefault(tok, set()).add(task_id)
+        for g in trigrams(title):
+            self._trigrams.setdefault(g, set()).add(task_id)
+
+    def _unindex_title(self, task_id: str):
+        title = self._title_of.pop(task_id)
+        for tok in tokens(title):
+            _discard(self._tokens, tok, task_id)
+        for g in trigrams(title):
+            _discard(self._trigrams, g, task_id)
+
+    def _index_progress(self, task_id: str, progress: int):
+        progress = max(0, min(100, progress))
+        self._progress_of[task_id] = progress
+        self._by_progress[progress].add(task_id)
+
+def _discard(index: Dict[str, Set[str]], key: str, task_id: str):
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(task_id)
+        if not ids:
+            del index[key]
@@ -0,0 +1,287 @@
+# snapshot.py
+# Binary snapshot of a board (tasks.bin), read through mmap.
+#
+# Layout (little-endian):
+#   header     magic, version, record size, task/label/string counts, and the
+#              mtime/size of the tasks.json it was written alongside
+#   labels     label_count x (id, name, color) string indices
+#   tasks      task_count fixed-size records: 16-byte id, title/column/label/rank
+#              string indices, progress, flags, done_at (NaN when unset)
+#   offsets    (string_count + 1) u32 offsets into the string blob
+#   strings    UTF-8 blob; every distinct string is stored once
+#
+# Counts, columns and progress come straight from the records; titles are only
+# decoded when something reads task.title. JSON stays the interchange format:
+#
+#   python snapshot.py to-bin tasks.json tasks.bin
+#   python snapshot.py to-json tasks.bin tasks.json
+
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+from models import Task, Label
+
+MAGIC = b"TSKB"
+VERSION = 3
+
+HEADER = struct.Struct("<4sHHIIIqq")
+LABEL_RECORD = struct.Struct("<III")
+TASK_RECORD = struct.Struct("<16sIIIIBBHd")
+
+NO_STRING = 0xFFFFFFFF
+
+# task record flags
+FLAG_STRING_ID = 1  # the id isn't a canonical uuid; its first 4 bytes are a string index
+
+
+class SnapshotError(ValueError):
+    """The file isn't a snapshot this version can read."""
+
+
+# every Snapshot whose map is still open, so a writer can release them (see release())
+_open_snapshots: "weakref.WeakSet[Snapshot]" = weakref.WeakSet()
+
+def release(path: Path) -> None:
+    """Unmap every open Snapshot of `path`, keeping its data readable from memory.
+
+    Tasks loaded from a snapshot keep it mapped until their titles are read, and
+    Windows can't replace a file that is still mapped.
+    """
+    path = Path(path)
+    for snap in list(_open_snapshots):
+        if snap.path == path:
+            snap.unmap()
+
+
+def write_snapshot(path: Path, tasks: List[Task], labels: List[Label], source: Optional[Path] = None) -> None:
+    """Write `tasks`/`labels` to `path` atomically.
+
+    `source` is the JSON file saved together with this snapshot; its mtime and
+    size are recorded so a reader can tell when the JSON was changed without it.
+    """
+    strings: Dict[str, int] = {}
+
+    def ref(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    label_part = bytearray()
+    for l in labels:
+        label_part += LABEL_RECORD.pack(ref(l.id), ref(l.name), ref(l.color))
+    task_part = bytearray()
+    for t in tasks:
+        raw_id = t._id
+        if isinstance(raw_id, bytes):
+            id_field, flags = raw_id, 0
+        else:
+            id_field, flags = struct.pack("<I", ref(raw_id)), FLAG_STRING_ID
+        done_at = math.nan if t.done_at is None else t.done_at
+        task_part += TASK_RECORD.pack(id_field, ref(t.title), ref(t.column), ref(t.label_id), ref(t.rank), t.progress, flags, 0,
+                                      done_at)
+
+    blob = bytearray()
+    offsets = array("I", [0])
+    for s in strings:
+        blob += s.encode("utf-8")
+        offsets.append(len(blob))
+    if sys.byteorder != "little":
+        offsets.byteswap()
+
+    mtime_ns, size = -1, -1
+    if source is not None and source.exists():
+        st = source.stat()
+        mtime_ns, size = st.st_mtime_ns, st.st_size
+    header = HEADER.pack(MAGIC, VERSION, TASK_RECORD.size, len(tasks), len(labels), len(strings), mtime_ns, size)
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        for part in (header, label_part, task_part, offsets.tobytes(), blob):
+            f.write(part)
+        f.flush()
+        os.fsync(f.fileno())
+    release(path)
+    os.replace(tmp, path)
+
+
+class _LazyTitle:
+    """Stands in for Task.title until it's first read (see Task.title)."""
+    __slots__ = ("snapshot", "index")
+
+    def __init__(self, snapshot: "Snapshot", index: int):
+        self.snapshot = snapshot
+        self.index = index
+
+    def __call__(self) -> str:
+        return self.snapshot.string(self.index)
+
+
+class Snapshot:
+    """Read-only view of a tasks.bin file.
+
+    Per-record accessors (column(), progress(), ...) read the map directly;
+    tasks() builds Task objects whose titles are decoded on first access, so
+    the map stays open until the last of those titles has been read.
+    """
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # an empty file can't be mapped
+                raise SnapshotError(f"{self.path}: empty file")
+        if len(self._map) < HEADER.size:
+            raise SnapshotError(f"{self.path}: truncated header")
+        (magic, version, record_size, self.task_count, self.label_count, string_count,
+         self.source_mtime_ns, self.source_size) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise SnapshotError(f"{self.path}: not a task snapshot")
+        if version != VERSION or record_size != TASK_RECORD.size:
+            raise SnapshotError(f"{self.path}: unsupported snapshot version {version}")
+        self._labels_at = HEADER.size
+        self._tasks_at = self._labels_at + self.label_count * LABEL_RECORD.size
+        offsets_at = self._tasks_at + self.task_count * TASK_RECORD.size
+        self._blob_at = offsets_at + (string_count + 1) * 4
+        self._offsets = array("I")
+        self._offsets.frombytes(self._map[offsets_at:self._blob_at])
+        if sys.byteorder != "little":
+            self._offsets.byteswap()
+        if len(self._offsets) != string_count + 1 or self._blob_at + self._offsets[-1] > len(self._map):
+            raise SnapshotError(f"{self.path}: truncated string table")
+        # decoded + interned column keys and label ids, by string index
+        self._keys: Dict[int, str] = {}
+        _open_snapshots.add(self)
+
+    def __len__(self) -> int:
+        return self.task_count
+
+    def matches(self, source: Path) -> bool:
+        """Whether `source` is still the JSON file this snapshot was written with."""
+        try:
+            st = source.stat()
+        except OSError:
+            return False
+        return (st.st_mtime_ns, st.st_size) == (self.source_mtime_ns, self.source_size)
+
+    def unmap(self) -> None:
+        """Copy the file into memory and close the map (the file can then be replaced)."""
+        old = self._map
+        if isinstance(old, mmap.mmap):
+            self._map = bytes(old)
+            old.close()
+        _open_snapshots.discard(self)
+
+    def string(self, index: int) -> Optional[str]:
+        if index == NO_STRING:
+            return None
+        start = self._blob_at + self._offsets[index]
+        end = self._blob_at + self._offsets[index + 1]
+        try:
+            return self._map[start:end].decode("utf-8")
+        except ValueError:
+            # unmapped by a save on another thread in the meantime; the copy is in place
+            return self._map[start:end].decode("utf-8")
+
+    def _key(self, index: int) -> Optional[str]:
+        key = self._keys.get(index)
+        if key is None and index != NO_STRING:
+            key = self._keys[index] = sys.intern(self.string(index))
+        return key
+
+    def _record(self, i: int) -> tuple:
+        if not 0 <= i < self.task_count:
+            raise IndexError(i)
+        return TASK_RECORD.unpack_from(self._map, self._tasks_at + i * TASK_RECORD.size)
+
+    def _records(self) -> Iterator[tuple]:
+        end = self._tasks_at + self.task_count * TASK_RECORD.size
+        return TASK_RECORD.iter_unpack(self._map[self._tasks_at:end])
+
+    def _id(self, id_field: bytes, flags: int):
+        if flags & FLAG_STRING_ID:
+            return self.string(struct.unpack_from("<I", id_field)[0])
+        return id_field
+
+    # per-record access, no Task objects involved
+
+    def column(self, i: int) -> str:
+        return self._key(self._record(i)[2])
+
+    def progress(self, i: int) -> int:
+        return self._record(i)[5]
+
+    def label_id(self, i: int) -> Optional[str]:
+        return self._key(self._record(i)[3])
+
+    def title(self, i: int) -> str:
+        return self.string(self._record(i)[1])
+
+    def column_counts(self) -> Dict[str, int]:
+        counts: Dict[int, int] = {}
+        for rec in self._records():
+            counts[rec[2]] = counts.get(rec[2], 0) + 1
+        return {self._key(k): n for k, n in counts.items()}
+
+    def column_indices(self, column: str) -> List[int]:
+        """Record numbers of the tasks in `column`, in board order."""
+        return [i for i, rec in enumerate(self._records()) if self._key(rec[2]) == column]
+
+    # materialized models
+
+    def labels(self) -> List[Label]:
+        out = []
+        for i in range(self.label_count):
+            id_, name, color = LABEL_RECORD.unpack_from(self._map, self._labels_at + i * LABEL_RECORD.size)
+            out.append(Label(id=self._key(id_), name=self.string(name), color=self.string(color)))
+        return out
+
+    def task(self, i: int) -> Task:
+        return self._task(self._record(i))
+
+    def tasks(self) -> Iterator[Task]:
+        for rec in self._records():
+            yield self._task(rec)
+
+    def _task(self, rec: tuple) -> Task:
+        id_field, title, column, label, rank, progress, flags, _, done_at = rec
+        return Task.from_packed(self._id(id_field, flags), _LazyTitle(self, title), progress, self._key(label), self._key(column),
+                                None if math.isnan(done_at) else done_at, self.string(rank))
+
+
+def json_to_snapshot(json_path: Path, bin_path: Path) -> None:
+    raw = json.loads(Path(json_path).read_text(encoding="utf-8"))
+    tasks = [Task.from_dict(t) for t in raw.get("tasks", [])]
+    labels = [Label.from_dict(l) for l in raw.get("labels", [])]
+    write_snapshot(Path(bin_path), tasks, labels, source=Path(json_path))
+
+def snapshot_to_json(bin_path: Path, json_path: Path) -> None:
+    snap = Snapshot(bin_path)
+    raw = {
+        "labels": [l.to_dict() for l in snap.labels()],
+        "tasks": [t.to_dict() for t in snap.tasks()],
+    }
+    Path(json_path).write_text(json.dumps(raw, indent=2), encoding="utf-8")
+
+def main(argv: List[str]) -> int:
+    if len(argv) != 4 or argv[1] not in ("to-bin", "to-json"):
+        print("usage: snapshot.py to-bin TASKS.json TASKS.bin | to-json TASKS.bin TASKS.json", file=sys.stderr)
+        return 2
+    if argv[1] == "to-bin":
+        json_to_snapshot(Path(argv[2]), Path(argv[3]))
+    else:
+        snapshot_to_json(Path(argv[2]), Path(argv[3]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
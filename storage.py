@@ -2,15 +2,200 @@
 # Handles saving/loading tasks & labels to/from a JSON file.
 
 import json
-from typing import Tuple, List
+import re
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, Optional, Tuple, List
 from pathlib import Path
 from models import Task, Label
 import os
+import perf
+# sqlite3 and snapshot are imported by the code that needs them (the sqlite backend,
+# BINARY_SNAPSHOT), so starting on the default JSON storage doesn't load them
 
-DATA_FILE = Path(os.path.dirname(__file__)) / "tasks.json"
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-def load_data() -> Tuple[List[Task], List[Label]]:
-    if not DATA_FILE.exists():
+# the default board's file; the other boards live next to it (see boards_dir), so TASKAPP_DATA moves them all
+DATA_FILE = Path(os.environ.get("TASKAPP_DATA") or Path(os.path.dirname(__file__)) / "tasks.json")
+
+# the board stored in DATA_FILE itself; every other board is <name>.json in boards_dir()
+DEFAULT_BOARD = "default"
+_BOARD_NAME = re.compile(r"^[\w][\w .-]{0,63}$")
+
+# minimum number of seconds between two write-behind flushes
+SAVE_INTERVAL = 1.0
+
+# journal backend: compact into a fresh snapshot once the journal grows past this many bytes
+JOURNAL_COMPACT_BYTES = 1 << 20
+
+# characters read per chunk by the streaming loader
+READ_CHUNK = 1 << 16
+
+# which backend MainWindow uses ("json", "journal" or "sqlite")
+DEFAULT_BACKEND = os.environ.get("TASKAPP_STORAGE", "json")
+
+# also write a binary snapshot (tasks.bin) on every save and load from it while it's current
+BINARY_SNAPSHOT = os.environ.get("TASKAPP_SNAPSHOT") == "bin"
+
+# Every function that reads or writes a board takes its data file; None means DATA_FILE
+# (looked up at call time, so tests and benchmarks can point DATA_FILE elsewhere).
+
+def journal_file(data_file: Optional[Path] = None) -> Path:
+    """The append-only journal that sits next to the data file."""
+    data_file = data_file or DATA_FILE
+    return data_file.with_name(data_file.stem + ".journal")
+
+def db_file(data_file: Optional[Path] = None) -> Path:
+    """The SQLite database used by the sqlite backend, next to the data file."""
+    data_file = data_file or DATA_FILE
+    return data_file.with_name(data_file.stem + ".db")
+
+def snapshot_file(data_file: Optional[Path] = None) -> Path:
+    """The binary snapshot written next to the data file when BINARY_SNAPSHOT is on."""
+    data_file = data_file or DATA_FILE
+    return data_file.with_name(data_file.stem + ".bin")
+
+def inbox_file(data_file: Optional[Path] = None) -> Path:
+    """Records appended by other processes (cli.py imports), next to the data file.
+
+    It has the journal's format and is replayed after it on every load. A running
+    app never writes it, and save_data() only drops the part it had loaded, so
+    records appended while the app has the board open are kept for its next load.
+    """
+    data_file = data_file or DATA_FILE
+    return data_file.with_name(data_file.stem + ".inbox")
+
+def inbox_size(data_file: Optional[Path] = None) -> int:
+    """Bytes in the inbox now; pass it to save_data() as `inbox_seen` once they've been loaded."""
+    if not inbox_file(data_file).exists():
+        return 0
+    # under the lock, so the count never ends inside a record that is still being appended
+    with _inbox_lock(data_file):
+        try:
+            return inbox_file(data_file).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+def _inbox_lock(data_file: Optional[Path]):
+    """Serializes appends to the inbox with save_data() trimming it, across processes."""
+    return _file_lock(inbox_file(data_file))
+
+@contextmanager
+def _file_lock(path: Path):
+    """Advisory lock on `path` (through a .lock file next to it), held until the block ends."""
+    with open(path.with_name(path.name + ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def append_inbox(text: str, data_file: Optional[Path] = None) -> None:
+    """Append whole records (journal lines) to the inbox and sync them."""
+    with _inbox_lock(data_file):
+        with open(inbox_file(data_file), "a", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+def _trim_inbox(data_file: Path, seen: int) -> None:
+    """Drop the first `seen` bytes of the inbox (a snapshot now contains them)."""
+    path = inbox_file(data_file)
+    with _inbox_lock(data_file):
+        try:
+            with open(path, "rb") as f:
+                f.seek(seen)
+                rest = f.read()
+        except FileNotFoundError:
+            return
+        if not rest:
+            path.unlink()
+            return
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(rest)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+class ChangedOnDisk(OSError):
+    """save_data() found the data file changed since `expect_state`; merge it before saving again."""
+
+# file_state() of a data file that doesn't exist
+MISSING = (0, 0)
+
+def file_state(path: Path) -> Tuple[int, int]:
+    """(mtime in ns, size) of `path`, or MISSING; a cheap way to tell whether someone rewrote it."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return MISSING
+    return st.st_mtime_ns, st.st_size
+
+def archive_file(data_file: Optional[Path] = None) -> Path:
+    """The compressed archive of old finished tasks, next to the data file (see archive.py)."""
+    data_file = data_file or DATA_FILE
+    return data_file.with_name(data_file.stem + ".archive.gz")
+
+def boards_dir() -> Path:
+    """Where the boards other than DEFAULT_BOARD keep their files."""
+    return DATA_FILE.with_name("boards")
+
+def board_file(name: str) -> Path:
+    """The data file of board `name` (its journal, database and snapshot sit next to it)."""
+    if name == DEFAULT_BOARD:
+        return DATA_FILE
+    if not _BOARD_NAME.match(name) or name.endswith((".", " ")):
+        raise ValueError(f"invalid board name: {name!r}")
+    return boards_dir() / f"{name}.json"
+
+def list_boards() -> List[str]:
+    """Names of the existing boards, DEFAULT_BOARD first."""
+    names = set()
+    if boards_dir().is_dir():
+        for path in boards_dir().iterdir():
+            # sqlite boards may have no JSON file left to migrate from
+            if path.suffix in (".json", ".db") and _BOARD_NAME.match(path.stem):
+                names.add(path.stem)
+    names.discard(DEFAULT_BOARD)
+    return [DEFAULT_BOARD] + sorted(names, key=str.lower)
+
+def create_board(name: str) -> Path:
+    """Create an empty board (with the default labels) and return its data file."""
+    path = board_file(name)
+    if path.exists() or db_file(path).exists():
+        raise FileExistsError(f"board {name!r} already exists")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tasks, labels = load_data(path)
+    save_data(tasks, labels, path)
+    return path
+
+def _open_snapshot(data_file: Path) -> Optional["snapshot.Snapshot"]:
+    """The binary snapshot, if enabled and still in sync with the data file (otherwise JSON wins)."""
+    if not BINARY_SNAPSHOT:
+        return None
+    import snapshot
+    path = snapshot_file(data_file)
+    if not path.exists():
+        return None
+    try:
+        snap = snapshot.Snapshot(path)
+    except (OSError, snapshot.SnapshotError):
+        return None
+    return snap if snap.matches(data_file) else None
+
+def load_data(data_file: Optional[Path] = None) -> Tuple[List[Task], List[Label]]:
+    data_file = data_file or DATA_FILE
+    if not data_file.exists():
         # Return default sample labels and empty tasks
         default_labels = [
             Label.new("General", "#4CAF50"),
@@ -18,14 +203,619 @@ def load_data() -> Tuple[List[Task], List[Label]]:
             Label.new("Feature", "#2196F3"),
         ]
         return [], default_labels
-    raw = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-    tasks = [Task(**t) for t in raw.get("tasks", [])]
-    labels = [Label(**l) for l in raw.get("labels", [])]
+    snap = _open_snapshot(data_file)
+    if snap is not None:
+        perf.count("storage.load.binary")
+        return _replay_journal(list(snap.tasks()), snap.labels(), data_file)
+    raw = json.loads(data_file.read_text(encoding="utf-8"))
+    tasks = [Task.from_dict(t) for t in raw.get("tasks", [])]
+    labels = [Label.from_dict(l) for l in raw.get("labels", [])]
+    return _replay_journal(tasks, labels, data_file)
+
+def _journal_records(data_file: Path) -> Iterator[dict]:
+    """The journal's records, then the inbox's."""
+    for path in (journal_file(data_file), inbox_file(data_file)):
+        if not path.exists():
+            continue
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    # a torn last line from a crash mid-append; everything before it is intact
+                    break
+                yield rec
+
+def _replay_journal(tasks: List[Task], labels: List[Label], data_file: Path) -> Tuple[List[Task], List[Label]]:
+    """Apply journal (and inbox) records, if any, on top of the snapshot read from the data file."""
+    if not journal_file(data_file).exists() and not inbox_file(data_file).exists():
+        return tasks, labels
+    task_map = {t.id: t for t in tasks}
+    label_map = {l.id: l for l in labels}
+    for rec in _journal_records(data_file):
+        op = rec.get("op")
+        if op == "task":
+            task = Task.from_dict(rec["data"])
+            old = task_map.get(task.id)
+            if old is not None and old.column != task.column:
+                # a moved card goes to the end of its new column, as it did in the session
+                del task_map[task.id]
+            task_map[task.id] = task
+        elif op == "task_del":
+            task_map.pop(rec["id"], None)
+        elif op == "label":
+            label_map[rec["data"]["id"]] = Label.from_dict(rec["data"])
+        elif op == "label_del":
+            label_map.pop(rec["id"], None)
+    return list(task_map.values()), list(label_map.values())
+
+def iter_data(chunk_size: int = READ_CHUNK, data_file: Optional[Path] = None) -> Iterator[Tuple[str, object]]:
+    """Stream ("label", Label) and ("task", Task) records from the data file (journal applied).
+
+    The file is parsed incrementally, one array element at a time, so the first
+    cards can be shown before the whole file has been read (a current binary
+    snapshot is read record by record instead). Journal records are
+    applied on the fly; tasks the journal moved to another column or created
+    come last, in journal order.
+    """
+    data_file = data_file or DATA_FILE
+    if not data_file.exists():
+        _, labels = load_data(data_file)
+        for l in labels:
+            yield "label", l
+        return
+    journal_tasks, journal_labels = _read_journal(data_file)
+    tail = []
+    for kind, obj in _iter_snapshot(chunk_size, data_file):
+        if kind == "label":
+            if obj.id in journal_labels:
+                raw = journal_labels.pop(obj.id)
+                if raw is None:
+                    continue
+                obj = Label.from_dict(raw)
+            yield "label", obj
+        else:
+            if obj.id in journal_tasks:
+                new = journal_tasks.pop(obj.id)
+                if new is None:
+                    continue
+                if new["column"] != obj.column:
+                    tail.append(new)
+                    continue
+                obj = Task.from_dict(new)
+            yield "task", obj
+    for raw in journal_labels.values():
+        if raw is not None:
+            yield "label", Label.from_dict(raw)
+    for raw in tail + [r for r in journal_tasks.values() if r is not None]:
+        yield "task", Task.from_dict(raw)
+
+def _iter_snapshot(chunk_size: int, data_file: Path) -> Iterator[Tuple[str, object]]:
+    """("label", Label) / ("task", Task) records of the snapshot alone, labels first."""
+    snap = _open_snapshot(data_file)
+    if snap is not None:
+        perf.count("storage.load.binary")
+        for l in snap.labels():
+            yield "label", l
+        for t in snap.tasks():
+            yield "task", t
+        return
+    for key, raw in _stream_json(data_file, chunk_size):
+        if key == "labels":
+            yield "label", Label.from_dict(raw)
+        elif key == "tasks":
+            yield "task", Task.from_dict(raw)
+
+def _read_journal(data_file: Path) -> Tuple[Dict[str, Optional[dict]], Dict[str, Optional[dict]]]:
+    """Final state per id according to the journal and inbox alone (None = deleted)."""
+    tasks: Dict[str, Optional[dict]] = {}
+    labels: Dict[str, Optional[dict]] = {}
+    for rec in _journal_records(data_file):
+        op = rec.get("op")
+        if op == "task":
+            tasks[rec["data"]["id"]] = rec["data"]
+        elif op == "task_del":
+            tasks[rec["id"]] = None
+        elif op == "label":
+            labels[rec["data"]["id"]] = rec["data"]
+        elif op == "label_del":
+            labels[rec["id"]] = None
     return tasks, labels
 
-def save_data(tasks: List[Task], labels: List[Label]) -> None:
+def load_labels(data_file: Optional[Path] = None) -> List[Label]:
+    """The board's labels without reading its tasks (the snapshot stores labels first)."""
+    data_file = data_file or DATA_FILE
+    if not data_file.exists():
+        return load_data(data_file)[1]
+    labels: Dict[str, Label] = {}
+    for kind, obj in _iter_snapshot(READ_CHUNK, data_file):
+        if kind != "label":
+            break
+        labels[obj.id] = obj
+    for rec in _journal_records(data_file):
+        if rec.get("op") == "label":
+            labels[rec["data"]["id"]] = Label.from_dict(rec["data"])
+        elif rec.get("op") == "label_del":
+            labels.pop(rec["id"], None)
+    return list(labels.values())
+
+def _stream_json(path: Path, chunk_size: int) -> Iterator[Tuple[str, object]]:
+    """Yield (key, element) for every element of the top-level arrays in a JSON object file."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf = buf[pos:] + chunk
+            pos = 0
+            return True
+
+        def skip_ws():
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in " \t\r\n":
+                    pos += 1
+                if pos < len(buf) or not fill():
+                    return
+
+        def expect(chars: str) -> str:
+            nonlocal pos
+            skip_ws()
+            if pos >= len(buf) or buf[pos] not in chars:
+                raise ValueError(f"{path}: expected one of {chars!r} at offset {pos}")
+            pos += 1
+            return buf[pos - 1]
+
+        def decode():
+            nonlocal pos
+            while True:
+                skip_ws()
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if fill():
+                        continue
+                    raise
+                # a number at the very end of the buffer may continue in the next chunk
+                if end == len(buf) and fill():
+                    continue
+                pos = end
+                return value
+
+        expect("{")
+        skip_ws()
+        if buf[pos:pos + 1] == "}":
+            return
+        while True:
+            key = decode()
+            expect(":")
+            skip_ws()
+            if buf[pos:pos + 1] == "[":
+                pos += 1
+                skip_ws()
+                if buf[pos:pos + 1] == "]":
+                    pos += 1
+                else:
+                    while True:
+                        yield key, decode()
+                        if expect(",]") == "]":
+                            break
+            else:
+                decode()
+            if expect(",}") == "}":
+                return
+
+def save_data(tasks: List[Task], labels: List[Label], data_file: Optional[Path] = None, inbox_seen: int = 0,
+              expect_state: Optional[Tuple[int, int]] = None) -> Tuple[int, int]:
+    """Write the full board as the new snapshot and return the data file's new file_state().
+
+    `inbox_seen` is how much of the inbox (see inbox_size()) the caller had loaded
+    into `tasks`/`labels`; that part is dropped, anything appended since is kept.
+    Writers hold an advisory lock on the data file, so two processes never
+    interleave their writes; with `expect_state`, a file that was rewritten since
+    the caller last read it raises ChangedOnDisk instead of being overwritten.
+    """
+    data_file = data_file or DATA_FILE
+    # labels first, so a streaming reader has them before the cards that reference them
     raw = {
-        "tasks": [vars(t) for t in tasks],
-        "labels": [vars(l) for l in labels],
+        "labels": [l.to_dict() for l in labels],
+        "tasks": [t.to_dict() for t in tasks],
     }
-    DATA_FILE.write_text(json.dumps(raw, indent=2), encoding="utf-8")
+    with perf.timed("storage.save_data"):
+        text = json.dumps(raw, indent=2)
+        with _file_lock(data_file):
+            if expect_state is not None and file_state(data_file) != expect_state:
+                raise ChangedOnDisk(f"{data_file.name} changed on disk")
+            _write_atomic(data_file, text)
+            state = file_state(data_file)
+            if BINARY_SNAPSHOT:
+                import snapshot
+                # written second, so it records the mtime/size of the JSON it matches
+                snapshot.write_snapshot(snapshot_file(data_file), tasks, labels, source=data_file)
+    perf.count("storage.save_data.calls")
+    # json.dumps escapes non-ASCII, so characters == bytes
+    perf.count("storage.bytes_written", len(text))
+    # the snapshot now contains everything the journal described
+    journal_file(data_file).unlink(missing_ok=True)
+    if inbox_seen:
+        _trim_inbox(data_file, inbox_seen)
+    return state
+
+def _write_atomic(path: Path, text: str) -> None:
+    """Write to a temp file next to `path` and rename it over the original."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class JsonBackend:
+    """Whole-file JSON storage: every change marks the data dirty for the write-behind queue."""
+    def __init__(self, source: Callable[[], Tuple[List[Task], List[Label]]], data_file: Optional[Path] = None):
+        # the queue needs Qt; importing it here keeps this module usable without PyQt5 (cli.py)
+        from savequeue import SaveQueue
+        self.data_file = data_file
+        self.queue = SaveQueue(source, data_file=data_file)
+        # file_state() of the data file the last load read (see BoardWatcher.watch)
+        self.loaded_state = MISSING
+
+    def load(self) -> Tuple[List[Task], List[Label]]:
+        self.queue.inbox_seen = inbox_size(self.data_file)
+        self.loaded_state = file_state(self.data_file or DATA_FILE)
+        data = load_data(self.data_file)
+        self._fold_inbox()
+        return data
+
+    def iter_load(self) -> Iterator[Tuple[str, object]]:
+        """Streaming load; flushes are held back until it finishes so a partial board is never saved."""
+        self.queue.pause()
+        self.queue.inbox_seen = inbox_size(self.data_file)
+        self.loaded_state = file_state(self.data_file or DATA_FILE)
+        try:
+            yield from iter_data(data_file=self.data_file)
+            self._fold_inbox()
+        finally:
+            self.queue.resume()
+
+    def _fold_inbox(self):
+        # save soon even if nothing changes, so the next load doesn't replay the inbox again
+        if self.queue.inbox_seen:
+            self.queue.mark_dirty()
+
+    @contextmanager
+    def batch(self):
+        """Group several changes; the queue already coalesces them into one write."""
+        yield
+
+    def put_task(self, task: Task):
+        self.queue.touch(task.id)
+
+    def delete_task(self, task_id: str):
+        self.queue.touch(task_id)
+
+    def put_label(self, label: Label):
+        self.queue.touch(label.id)
+
+    def delete_label(self, label_id: str):
+        self.queue.touch(label_id)
+
+    def close(self):
+        self.queue.close()
+
+
+class JournalBackend:
+    """Append-only storage: each change appends one small record to the journal.
+
+    load_data() replays the journal on top of the last snapshot. Once the journal
+    passes `compact_bytes` the full state from `source` is written as a new
+    snapshot and the journal is dropped.
+    """
+    def __init__(self, source: Callable[[], Tuple[List[Task], List[Label]]], compact_bytes: int = JOURNAL_COMPACT_BYTES,
+                 data_file: Optional[Path] = None):
+        self.source = source
+        self.compact_bytes = compact_bytes
+        self.data_file = data_file
+        # inbox bytes already loaded, dropped by the next compaction
+        self._inbox_seen = 0
+        self._fh = None
+        self._size = 0
+        # journal lines held back by batch()
+        self._buffer: Optional[List[str]] = None
+
+    def load(self) -> Tuple[List[Task], List[Label]]:
+        had_snapshot = (self.data_file or DATA_FILE).exists()
+        self._inbox_seen = inbox_size(self.data_file)
+        tasks, labels = load_data(self.data_file)
+        path = journal_file(self.data_file)
+        self._size = path.stat().st_size if path.exists() else 0
+        if not had_snapshot:
+            # persist the default labels, otherwise journaled tasks would point at ids that
+            # get regenerated on the next start
+            save_data(tasks, labels, self.data_file, self._inbox_seen)
+            self._size = self._inbox_seen = 0
+        return tasks, labels
+
+    def iter_load(self) -> Iterator[Tuple[str, object]]:
+        if not (self.data_file or DATA_FILE).exists():
+            tasks, labels = self.load()
+            for l in labels:
+                yield "label", l
+            return
+        path = journal_file(self.data_file)
+        self._size = path.stat().st_size if path.exists() else 0
+        self._inbox_seen = inbox_size(self.data_file)
+        yield from iter_data(data_file=self.data_file)
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single journal write."""
+        if self._buffer is not None:
+            yield
+            return
+        self._buffer = []
+        try:
+            yield
+        finally:
+            lines, self._buffer = self._buffer, None
+            if lines:
+                self._write("".join(lines))
+
+    def put_task(self, task: Task):
+        self._append({"op": "task", "data": task.to_dict()})
+
+    def delete_task(self, task_id: str):
+        self._append({"op": "task_del", "id": task_id})
+
+    def put_label(self, label: Label):
+        self._append({"op": "label", "data": label.to_dict()})
+
+    def delete_label(self, label_id: str):
+        self._append({"op": "label_del", "id": label_id})
+
+    def _append(self, record: dict):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        perf.count("storage.journal.records")
+        if self._buffer is not None:
+            self._buffer.append(line)
+        else:
+            self._write(line)
+
+    def _write(self, text: str):
+        if self._fh is None:
+            self._fh = open(journal_file(self.data_file), "a", encoding="utf-8")
+        self._fh.write(text)
+        self._fh.flush()
+        self._size += len(text)
+        perf.count("storage.bytes_written", len(text))
+        if self._size >= self.compact_bytes:
+            self.compact()
+
+    def compact(self):
+        """Write the full state as a new snapshot and drop the journal."""
+        self._close_journal()
+        tasks, labels = self.source()
+        save_data(list(tasks), list(labels), self.data_file, self._inbox_seen)
+        self._size = self._inbox_seen = 0
+
+    def _close_journal(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def close(self):
+        self._close_journal()
+
+
+class InboxBackend(JournalBackend):
+    """Write-only backend for other processes (cli.py): records go to the inbox, not the journal.
+
+    The app may be rewriting the snapshot and dropping its journal at any time;
+    the inbox is left alone until an app has loaded it (see inbox_file()).
+    """
+    def __init__(self, data_file: Optional[Path] = None):
+        super().__init__(lambda: ([], []), data_file=data_file)
+
+    def _write(self, text: str):
+        append_inbox(text, self.data_file)
+        perf.count("storage.bytes_written", len(text))
+
+
+class SqliteBackend:
+    """SQLite storage (WAL mode): every change is a single-row upsert or delete.
+
+    Tasks are indexed by column and label_id, so tasks_in_column() and
+    tasks_with_label() don't need the whole board in memory. On first use the
+    existing tasks.json (plus journal) is migrated into the database once.
+    """
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        title TEXT NOT NULL,
+        progress INTEGER NOT NULL,
+        label_id TEXT,
+        col TEXT NOT NULL,
+        pos INTEGER NOT NULL,
+        done_at REAL,
+        rank TEXT
+    );
+    CREATE INDEX IF NOT EXISTS tasks_col ON tasks(col, pos);
+    CREATE INDEX IF NOT EXISTS tasks_label ON tasks(label_id);
+    CREATE TABLE IF NOT EXISTS labels (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        color TEXT NOT NULL,
+        pos INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    TASK_COLS = "id, title, progress, label_id, col, done_at, rank"
+    # card order: the rows without a rank (written before tasks had one, or by the CLI importer)
+    # after the ranked ones, which SQLite would otherwise sort first, so TaskStore appends them
+    TASK_ORDER = "rank IS NULL, rank, pos"
+
+    def __init__(self, source: Callable[[], Tuple[List[Task], List[Label]]], path: Optional[Path] = None,
+                 data_file: Optional[Path] = None):
+        self.source = source
+        self.data_file = data_file
+        self.path = path or db_file(data_file)
+        import sqlite3
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(tasks)")}
+        if "done_at" not in columns:
+            # databases created before tasks had a completion time
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN done_at REAL")
+        if "rank" not in columns:
+            # ... or a manual order
+            self.conn.execute("ALTER TABLE tasks ADD COLUMN rank TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS tasks_rank ON tasks(col, rank)")
+        self._in_batch = False
+        self._next_task_pos = self._max_pos("tasks") + 1
+        self._next_label_pos = self._max_pos("labels") + 1
+
+    def _max_pos(self, table: str) -> int:
+        return self.conn.execute(f"SELECT COALESCE(MAX(pos), -1) FROM {table}").fetchone()[0]
+
+    def initialize(self):
+        """Migrate the JSON data file into the database if that hasn't happened yet."""
+        if self.conn.execute("SELECT value FROM meta WHERE key = 'initialized'").fetchone() is None:
+            self.migrate_from_json()
+
+    def load(self) -> Tuple[List[Task], List[Label]]:
+        self.initialize()
+        # every column in card order, so TaskStore doesn't have to sort them (each column's ranks
+        # start over, so the columns come interleaved, which lets iter_load fill them all at once)
+        tasks = [self._task(r) for r in self.conn.execute(f"SELECT {self.TASK_COLS} FROM tasks ORDER BY {self.TASK_ORDER}")]
+        return tasks, self.labels()
+
+    def labels(self) -> List[Label]:
+        return [Label(id=r[0], name=r[1], color=r[2]) for r in self.conn.execute("SELECT id, name, color FROM labels ORDER BY pos")]
+
+    def iter_load(self) -> Iterator[Tuple[str, object]]:
+        """Stream labels, then tasks, straight from the database cursor."""
+        self.initialize()
+        for l in self.labels():
+            yield "label", l
+        # a separate connection, so writes made while cards stream in don't disturb the cursor
+        import sqlite3
+        reader = sqlite3.connect(str(self.path))
+        try:
+            for r in reader.execute(f"SELECT {self.TASK_COLS} FROM tasks ORDER BY {self.TASK_ORDER}"):
+                yield "task", self._task(r)
+        finally:
+            reader.close()
+
+    def migrate_from_json(self):
+        """One-shot import of the JSON data file (or the default labels) into an empty database."""
+        data_file = self.data_file or DATA_FILE
+        source = str(data_file) if data_file.exists() else "defaults"
+        tasks, labels = load_data(data_file)
+        with self.conn:
+            for t in tasks:
+                self._upsert_task(t)
+            for l in labels:
+                self._upsert_label(l)
+            self.conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('initialized', ?)", (source,))
+
+    @staticmethod
+    def _task(row) -> Task:
+        return Task(id=row[0], title=row[1], progress=row[2], label_id=row[3], column=row[4], done_at=row[5], rank=row[6])
+
+    # Indexed queries for callers that don't load the whole board (scripts, tools).
+    # MainWindow doesn't use them: it loads the board once and TaskStore keeps the
+    # same column and label indexes in memory, so a query would only add a round trip.
+    def tasks_in_column(self, column: str) -> List[Task]:
+        """The tasks in `column` in card order, through the tasks_rank index."""
+        rows = self.conn.execute(f"SELECT {self.TASK_COLS} FROM tasks WHERE col = ? ORDER BY {self.TASK_ORDER}", (column,))
+        return [self._task(r) for r in rows]
+
+    def tasks_with_label(self, label_id: str) -> List[Task]:
+        """The tasks labeled `label_id` in board order, through the label_id index."""
+        rows = self.conn.execute(f"SELECT {self.TASK_COLS} FROM tasks WHERE label_id = ? ORDER BY pos", (label_id,))
+        return [self._task(r) for r in rows]
+
+    def _upsert_task(self, task: Task):
+        # pos is assigned on insert and on a column change (the card goes to the end of its
+        # new column); other updates keep the card's place in the list, and so does a row
+        # without a rank (the CLI importer's) that stays in its column
+        self.conn.execute(
+            "INSERT INTO tasks(id, title, progress, label_id, col, pos, done_at, rank) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET title = excluded.title, progress = excluded.progress, "
+            "label_id = excluded.label_id, pos = CASE WHEN col = excluded.col THEN pos ELSE excluded.pos END, "
+            "col = excluded.col, done_at = excluded.done_at, "
+            "rank = CASE WHEN excluded.rank IS NULL AND col = excluded.col THEN rank ELSE excluded.rank END",
+            (task.id, task.title, task.progress, task.label_id, task.column, self._next_task_pos, task.done_at, task.rank),
+        )
+        self._next_task_pos += 1
+
+    def _upsert_label(self, label: Label):
+        self.conn.execute(
+            "INSERT INTO labels(id, name, color, pos) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET name = excluded.name, color = excluded.color",
+            (label.id, label.name, label.color, self._next_label_pos),
+        )
+        self._next_label_pos += 1
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into one transaction (one commit)."""
+        if self._in_batch:
+            yield
+            return
+        self._in_batch = True
+        try:
+            with self.conn:
+                yield
+        finally:
+            self._in_batch = False
+
+    def _tx(self):
+        # each change commits on its own unless it's part of a batch()
+        return nullcontext() if self._in_batch else self.conn
+
+    def put_task(self, task: Task):
+        perf.count("storage.sqlite.writes")
+        with self._tx():
+            self._upsert_task(task)
+
+    def delete_task(self, task_id: str):
+        perf.count("storage.sqlite.writes")
+        with self._tx():
+            self.conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def put_label(self, label: Label):
+        perf.count("storage.sqlite.writes")
+        with self._tx():
+            self._upsert_label(label)
+
+    def delete_label(self, label_id: str):
+        perf.count("storage.sqlite.writes")
+        with self._tx():
+            self.conn.execute("DELETE FROM labels WHERE id = ?", (label_id,))
+
+    def close(self):
+        self.conn.close()
+
+
+BACKENDS = {"json": JsonBackend, "journal": JournalBackend, "sqlite": SqliteBackend}
+
+def open_backend(source: Callable[[], Tuple[List[Task], List[Label]]], kind: Optional[str] = None,
+                 data_file: Optional[Path] = None):
+    """Create the storage backend named `kind` (defaults to DEFAULT_BACKEND) for one data file."""
+    kind = kind or DEFAULT_BACKEND
+    if kind not in BACKENDS:
+        raise ValueError(f"unknown storage backend: {kind!r}")
+    return BACKENDS[kind](source, data_file=data_file)
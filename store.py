@@ -0,0 +1,270 @@
+# store.py
+# In-memory task index: lookup by id, per-column order and label membership, kept up to date incrementally.
+
+import bisect
+import itertools
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from models import Task
+import perf
+import ranks
+
+# the column whose tasks are finished (and stamped with Task.done_at)
+DONE_COLUMN = "done"
+
+class TaskStore:
+    """Holds the board's tasks with indexes that are maintained on every change.
+
+    - id -> task
+    - column -> (rank, id) pairs in card order (a sorted list, so a task and its
+      neighbours are found by bisection)
+    - label_id -> task ids
+
+    Widgets mutate Task objects in place before reporting a change, so the store
+    remembers which column/label/rank each task was indexed under.
+
+    Tasks arriving in rank order (a saved board: all() returns them that way) are
+    simply appended; one that arrives out of order marks its column unsorted, and
+    the column is sorted once when it is next read; move() inserts the task in its
+    place right away. A task without a valid rank gets one after the last card of
+    its column.
+    """
+    def __init__(self, tasks: Optional[List[Task]] = None):
+        self._by_id: Dict[str, Task] = {}
+        self._columns: Dict[str, List[Tuple[str, str]]] = {}
+        self._by_label: Dict[str, Set[str]] = {}
+        self._column_of: Dict[str, str] = {}
+        self._rank_of: Dict[str, str] = {}
+        self._label_of: Dict[str, Optional[str]] = {}
+        # columns that got a task out of rank order since they were last read
+        self._unsorted: Set[str] = set()
+        # columns with a rank longer than ranks.MAX_LENGTH or two equal ranks (see rebalance)
+        self.unbalanced: Set[str] = set()
+        unranked = []
+        for t in tasks or []:
+            if ranks.valid(t.rank):
+                self.add(t)
+            else:
+                unranked.append(t)
+        # after every ranked task, so their new ranks come after the existing ones
+        for t in unranked:
+            self.add(t)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Task]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._by_id
+
+    def get(self, task_id: str) -> Optional[Task]:
+        return self._by_id.get(task_id)
+
+    def all(self) -> List[Task]:
+        """All tasks in board order (the order they are saved in).
+
+        Every column is in card order, and the columns are interleaved so a streaming
+        load (see MainWindow._load_slice) fills all of them from the start.
+        """
+        by_id = self._by_id
+        columns = [self._ordered(key) for key in list(self._columns)]
+        return [by_id[entry[1]] for row in itertools.zip_longest(*columns) for entry in row if entry is not None]
+
+    def column(self, key: str) -> List[Task]:
+        """Tasks in one column, in display order."""
+        return [self._by_id[tid] for _, tid in self._ordered(key)]
+
+    def column_ids(self, key: str) -> List[str]:
+        return [tid for _, tid in self._ordered(key)]
+
+    def with_label(self, label_id: str) -> List[Task]:
+        return [self._by_id[tid] for tid in self._by_label.get(label_id, ())]
+
+    def add(self, task: Task):
+        if task.id in self._by_id:
+            self.update(task)
+            return
+        if not ranks.valid(task.rank):
+            task.rank = self._rank_after(task.column)
+        self._by_id[task.id] = task
+        self._index_column(task.id, task.column, task.rank)
+        self._index_label(task.id, task.label_id)
+
+    def move(self, task: Task, column: str, before: Optional[str] = None) -> List[Task]:
+        """Move a task in front of the task `before` in `column`, or to its end (stamping or
+        clearing done_at as it enters or leaves DONE_COLUMN).
+
+        Only the moved task gets a new rank, unless the cards around `before` have equal
+        ranks (another program appended at the same time): then those are re-keyed as
+        well, and returned so the caller saves them too.
+        """
+        if column == DONE_COLUMN:
+            if self._column_of.get(task.id) != DONE_COLUMN:
+                task.done_at = time.time()
+        else:
+            task.done_at = None
+        task.column = column
+        self._unindex_column(task.id)
+        rekeyed = []
+        if before is None or self._column_of.get(before) != column or before == task.id:
+            task.rank = self._rank_after(column)
+            self._index_column(task.id, column, task.rank)
+        else:
+            ids = self._ordered(column)
+            i = bisect.bisect_left(ids, (self._rank_of[before], before))
+            if i and ids[i - 1][0] >= ids[i][0]:
+                rekeyed = self._respace(column, i - 1, i + 1)
+            task.rank = ranks.key_between(ids[i - 1][0] if i else None, ids[i][0])
+            self._index_column(task.id, column, task.rank, at=i)
+        if self._label_of.get(task.id) != task.label_id:
+            self._unindex_label(task.id)
+            self._index_label(task.id, task.label_id)
+        return rekeyed
+
+    def update(self, task: Task):
+        """Re-sync the indexes after a task was edited in place (or replaced by an equal-id copy)."""
+        if task.id not in self._by_id:
+            self.add(task)
+            return
+        if self._column_of.get(task.id) != task.column:
+            self.move(task, task.column)
+            return
+        self._by_id[task.id] = task
+        if self._rank_of.get(task.id) != task.rank:
+            # merged from the data file: another program reordered it
+            self._unindex_column(task.id)
+            if not ranks.valid(task.rank):
+                task.rank = self._rank_after(task.column)
+            self._index_column(task.id, task.column, task.rank)
+        if self._label_of.get(task.id) != task.label_id:
+            self._unindex_label(task.id)
+            self._index_label(task.id, task.label_id)
+
+    def remove(self, task_id: str) -> Optional[Task]:
+        task = self._by_id.pop(task_id, None)
+        if task is None:
+            return None
+        self._unindex_column(task_id)
+        self._unindex_label(task_id)
+        return task
+
+    def clear_label(self, label_id: str) -> List[Task]:
+        """Detach a (deleted) label from every task using it; returns the tasks that changed."""
+        affected = self.with_label(label_id)
+        for t in affected:
+            t.label_id = None
+            self._label_of[t.id] = None
+        self._by_label.pop(label_id, None)
+        return affected
+
+    def rebalance(self, column: str) -> List[Task]:
+        """Give the runs of too long (or equal) ranks in `column` fresh, short ones; returns the re-keyed tasks.
+
+        Each run is widened until its outer neighbours leave room for short keys,
+        so usually only a handful of tasks change, never their order.
+        """
+        self.unbalanced.discard(column)
+        ids = self._ordered(column)
+        rekeyed: List[Task] = []
+        i = 0
+        with perf.timed("store.rebalance"):
+            while i < len(ids):
+                rank = ids[i][0]
+                if len(rank) > ranks.MAX_LENGTH or (i and rank == ids[i - 1][0]):
+                    start = max(0, i - 1)
+                    end = i + 1
+                    while end < len(ids) and ids[end][0] == rank:
+                        end += 1
+                    rekeyed += self._respace(column, start, end)
+                    i = end
+                else:
+                    i += 1
+        perf.count("store.rebalanced", len(rekeyed))
+        return rekeyed
+
+    def _respace(self, column: str, start: int, end: int) -> List[Task]:
+        """New ranks for the column's (sorted) entries start:end, widening the range until they fit in ranks.SPREAD_LENGTH."""
+        ids = self._columns[column]
+        width = max(end - start, 1)
+        while True:
+            lo_i, hi_i = max(0, start - width), min(len(ids), end + width)
+            lo = ids[lo_i - 1][0] if lo_i else None
+            hi = ids[hi_i][0] if hi_i < len(ids) else None
+            if lo is None or hi is None or lo < hi:
+                keys = ranks.keys_between(lo, hi, hi_i - lo_i)
+                if max(map(len, keys)) <= ranks.SPREAD_LENGTH or (lo_i == 0 and hi_i == len(ids)):
+                    break
+            width *= 2
+        rekeyed = []
+        for i, key in enumerate(keys, lo_i):
+            rank, tid = ids[i]
+            if rank != key:
+                # the order doesn't change, so the column stays sorted
+                ids[i] = (key, tid)
+                task = self._by_id[tid]
+                task.rank = self._rank_of[tid] = key
+                rekeyed.append(task)
+        return rekeyed
+
+    def _ordered(self, column: str) -> List[Tuple[str, str]]:
+        """The column's (rank, id) pairs, sorted."""
+        ids = self._columns.get(column)
+        if ids is None:
+            return []
+        if column in self._unsorted:
+            self._unsorted.discard(column)
+            with perf.timed("store.sort_column"):
+                ids.sort()
+            if any(a[0] == b[0] for a, b in zip(ids, ids[1:])):
+                self.unbalanced.add(column)
+        return ids
+
+    def _rank_after(self, column: str) -> str:
+        ids = self._ordered(column)
+        return ranks.key_between(ids[-1][0] if ids else None, None)
+
+    def _index_column(self, task_id: str, column: str, rank: str, at: Optional[int] = None):
+        """Add the task to its column: at index `at` of the sorted column (move() has found it),
+        or appended, which leaves the column unsorted if that is out of order."""
+        ids = self._columns.setdefault(column, [])
+        entry = (rank, task_id)
+        if at is not None:
+            ids.insert(at, entry)
+        else:
+            if ids and column not in self._unsorted:
+                if rank == ids[-1][0]:
+                    self.unbalanced.add(column)
+                if entry < ids[-1]:
+                    self._unsorted.add(column)
+            ids.append(entry)
+        self._column_of[task_id] = column
+        self._rank_of[task_id] = rank
+        if len(rank) > ranks.MAX_LENGTH:
+            self.unbalanced.add(column)
+
+    def _unindex_column(self, task_id: str):
+        column = self._column_of.pop(task_id, None)
+        rank = self._rank_of.pop(task_id, None)
+        if column is not None:
+            ids = self._columns[column]
+            entry = (rank, task_id)
+            if column in self._unsorted:
+                ids.remove(entry)
+            else:
+                del ids[bisect.bisect_left(ids, entry)]
+
+    def _index_label(self, task_id: str, label_id: Optional[str]):
+        self._label_of[task_id] = label_id
+        if label_id:
+            self._by_label.setdefault(label_id, set()).add(task_id)
+
+    def _unindex_label(self, task_id: str):
+        label_id = self._label_of.pop(task_id, None)
+        if label_id:
+            ids = self._by_label.get(label_id)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del self._by_label[label_id]
@@ -1,6 +1,9 @@
 # styles.py
 # Centralized color and style configuration. Modify these to change the look.
 
+import functools
+from typing import Tuple
+
 # Theme colors (dark by default)
 BG = "#0F1115"        # main background
 PANEL = "#14161A"     # panel background
@@ -13,14 +16,27 @@ CARD_ELEV = "rgba(124,92,255,0.06)"
 # Base font size (pixels) used by scaling function
 BASE_FONT_SIZE = 14
 
-def qss(font_size_px: int = BASE_FONT_SIZE) -> str:
-    """Return the stylesheet with a given base font size (px)."""
+# UI scale (multiplier of BASE_FONT_SIZE): range and the step of the A−/A＋ buttons
+MIN_SCALE = 0.7
+MAX_SCALE = 1.6
+SCALE_STEP = 0.1
+
+def font_sizes(scale: float = 1.0) -> Tuple[int, int, int]:
+    """Pixel sizes of the (base, muted, progress-bar) text at `scale`."""
+    base = max(10, int(BASE_FONT_SIZE * scale))
+    return base, max(11, base - 2), max(10, base - 4)
+
+# Font sizes are not part of the stylesheet: they are set as widget fonts (see
+# ui.ui_fonts), so scaling never has to replace the application stylesheet, which
+# re-polishes every widget. A stylesheet font-size would also override those fonts.
+@functools.lru_cache(maxsize=None)
+def qss() -> str:
+    """Return the application stylesheet (colors, shapes and font family)."""
     return f"""
     QWidget {{
         background-color: {BG};
         color: {TEXT};
         font-family: "Segoe UI", Roboto, Arial, sans-serif;
-        font-size: {font_size_px}px;
     }}
 
     QFrame#panel {{
@@ -52,7 +68,6 @@ def qss(font_size_px: int = BASE_FONT_SIZE) -> str:
 
     QLabel.muted {{
         color: {MUTED};
-        font-size: {max(11, font_size_px - 2)}px;
     }}
 
     QProgressBar {{
@@ -61,7 +76,6 @@ def qss(font_size_px: int = BASE_FONT_SIZE) -> str:
         height: 12px;
         border-radius: 6px;
         text-align: center;
-        font-size: {max(10, font_size_px - 4)}px;
     }}
 
     QProgressBar::chunk {{
@@ -69,6 +83,22 @@ def qss(font_size_px: int = BASE_FONT_SIZE) -> str:
         border-radius: 6px;
     }}
 
+    /* label colors are painted from a shared per-label cache (ui.label_style), not per-card sheets */
+    QLabel#chip {{
+        background: transparent;
+        padding: 4px 8px;
+    }}
+
+    QPushButton#move {{
+        border-radius: 6px;
+        padding: 6px;
+        border: 1px solid rgba(255,255,255,0.02);
+    }}
+
+    QPushButton#move:hover {{
+        background-color: rgba(255,255,255,0.02);
+    }}
+
     QLineEdit, QComboBox {{
         background-color: rgba(255,255,255,0.02);
         border: 1px solid rgba(255,255,255,0.03);
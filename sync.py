@@ -0,0 +1,163 @@
+# sync.py
+# Picks up edits other programs made to a board's data file: diffs them by id and merges them into the loaded board.
+#
+# Headless, like storage.py: the watcher (watcher.py) calls read_external() on a
+# worker thread and merge() on the GUI thread; Board.close() calls both directly.
+#
+# Three versions of each record are involved: the one in the file when we last
+# read or wrote it (kept as `Signatures`, hashes of its fields), the one in the
+# file now, and the one in memory. A record only the file changed is taken from
+# the file; one only we changed is kept; one both changed goes to whichever edit
+# is newer, our edit time (SaveQueue.touched) against the file's mtime.
+
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+import perf
+import storage
+from models import Task, Label
+from search import SearchIndex
+from store import TaskStore
+
+# what reading a file someone is still writing (or broke) can raise
+READ_ERRORS = (OSError, ValueError, KeyError, TypeError)
+
+# record id -> hash of its fields, for the tasks and for the labels
+Signatures = Tuple[Dict[str, int], Dict[str, int]]
+
+
+def task_signature(task: Task) -> int:
+    return hash((task.id, task.title, task.progress, task.label_id, task.column, task.done_at, task.rank))
+
+
+def label_signature(label: Label) -> int:
+    return hash((label.id, label.name, label.color))
+
+
+def signatures(tasks: List[Task], labels: List[Label]) -> Signatures:
+    with perf.timed("sync.signatures"):
+        return {t.id: task_signature(t) for t in tasks}, {l.id: label_signature(l) for l in labels}
+
+
+def _differing(old: Dict[str, int], new: Dict[str, int]) -> Set[str]:
+    """Ids added, removed or changed between two signature maps."""
+    changed = {rid for rid, sig in new.items() if old.get(rid) != sig}
+    changed.update(rid for rid in old if rid not in new)
+    return changed
+
+
+class External:
+    """The data file as another program left it, and which records differ from the base we knew."""
+    __slots__ = ("state", "tasks", "labels", "sigs", "changed_tasks", "changed_labels")
+
+    def __init__(self, state: Tuple[int, int], tasks: List[Task], labels: List[Label], base: Signatures):
+        self.state = state
+        self.tasks = {t.id: t for t in tasks}
+        self.labels = labels
+        self.sigs = signatures(tasks, labels)
+        self.changed_tasks = _differing(base[0], self.sigs[0])
+        self.changed_labels = _differing(base[1], self.sigs[1])
+
+    @property
+    def mtime(self) -> float:
+        """When the file was written, in seconds (the time of every edit in it, as far as we can tell)."""
+        return self.state[0] / 1e9
+
+
+def read_external(data_file: Path, base: Signatures) -> Optional[External]:
+    """Parse the data file and diff it against `base`; safe to call from a worker thread.
+
+    Returns None when there is nothing to merge yet: the file is gone (a sync tool
+    may be replacing it) or was rewritten again while we read it.
+    """
+    state = storage.file_state(data_file)
+    if state == storage.MISSING:
+        return None
+    with perf.timed("sync.read_external"):
+        tasks, labels = storage.load_data(data_file)
+        if storage.file_state(data_file) != state:
+            return None
+        return External(state, tasks, labels, base)
+
+
+class Changes:
+    """What merge() did to the board, so the UI can update just those cards and labels."""
+    __slots__ = ("added", "updated", "removed", "labels", "kept")
+
+    def __init__(self):
+        self.added: List[Task] = []
+        # changed in place (their cards may also need to move to another column)
+        self.updated: List[Task] = []
+        self.removed: List[Task] = []
+        # ids of the labels added, changed or removed
+        self.labels: Set[str] = set()
+        # ids both sides changed where our edit was newer
+        self.kept: Set[str] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed or self.labels)
+
+
+def merge(ext: External, store: TaskStore, labels: List[Label], search: SearchIndex, touched: Dict[str, float]) -> Changes:
+    """Apply the records the file changed to `store`, `labels` (edited in place) and `search`.
+
+    `touched` maps the ids we changed since our last save to when we did; an id
+    whose change loses to the file's is dropped from it.
+    """
+    changes = Changes()
+    with perf.timed("sync.merge"):
+        for rid in ext.changed_labels:
+            if _ours_is_newer(rid, touched, ext, changes):
+                continue
+            theirs = next((l for l in ext.labels if l.id == rid), None)
+            ours = next((l for l in labels if l.id == rid), None)
+            if theirs is None:
+                if ours is not None:
+                    labels.remove(ours)
+                    changes.updated += store.clear_label(rid)
+            elif ours is None:
+                labels.append(theirs)
+            elif (ours.name, ours.color) != (theirs.name, theirs.color):
+                ours.name, ours.color = theirs.name, theirs.color
+            else:
+                continue
+            changes.labels.add(rid)
+        for rid in ext.changed_tasks:
+            if _ours_is_newer(rid, touched, ext, changes):
+                continue
+            theirs = ext.tasks.get(rid)
+            ours = store.get(rid)
+            if theirs is None:
+                if ours is not None:
+                    store.remove(rid)
+                    search.remove(rid)
+                    changes.removed.append(ours)
+            elif ours is None:
+                store.add(theirs)
+                search.add(theirs)
+                changes.added.append(theirs)
+            elif task_signature(ours) != task_signature(theirs):
+                # in place: the cards hold on to the Task objects
+                ours.title, ours.progress, ours.label_id = theirs.title, theirs.progress, theirs.label_id
+                if ours.column != theirs.column:
+                    store.move(ours, theirs.column)
+                # their place in the column (a program that doesn't know ranks leaves ours)
+                ours.rank = theirs.rank or ours.rank
+                store.update(ours)
+                ours.done_at = theirs.done_at
+                search.update(ours)
+                changes.updated.append(ours)
+    perf.count("sync.merged", len(changes.added) + len(changes.updated) + len(changes.removed) + len(changes.labels))
+    perf.count("sync.conflicts_kept", len(changes.kept))
+    return changes
+
+
+def _ours_is_newer(rid: str, touched: Dict[str, float], ext: External, changes: Changes) -> bool:
+    """Whether both sides changed `rid` and our edit wins (otherwise the file's does, and ours is forgotten)."""
+    edited = touched.get(rid)
+    if edited is None:
+        return False
+    if edited > ext.mtime:
+        changes.kept.add(rid)
+        return True
+    del touched[rid]
+    return False
@@ -1,24 +1,272 @@
 # ui.py
 # Main GUI: columns, task widgets, dialogs, main window.
 
+import itertools
+import time
 from PyQt5 import QtWidgets, QtCore, QtGui
-from models import Task, Label
-from typing import List, Dict, Optional, Callable
+from models import Task, Label, COLUMN_ORDER
+from typing import List, Dict, Iterator, Optional, Callable, Set, Tuple
+from archive import Archive, ARCHIVE_PAGE
+from search import parse_query
 import styles
-import storage
+import perf
 
-# Column identifiers and human labels
-COLUMN_ORDER = [("todo", "TO-DO"), ("in_progress", "IN PROGRESS"), ("done", "COMPLETED")]
+# how a label changed (LabelDialog.labelChanged)
+LABEL_ADDED = "added"
+LABEL_RENAMED = "renamed"
+LABEL_RECOLORED = "recolored"
+LABEL_DELETED = "deleted"
+
+# detached cards each column keeps around for re-binding (see CardPool)
+CARD_POOL_SIZE = 256
+
+# after a scale change, each QTimer tick rescales off-screen cards for at most this long
+RESCALE_SLICE_MS = 8
+
+# drag-and-drop payload of a card: its task id (see start_card_drag)
+CARD_MIME = "application/x-taskapp-card"
+
+# a card dragged this close to the top or bottom of a column scrolls it by DRAG_SCROLL_STEP per move
+DRAG_SCROLL_MARGIN = 30
+DRAG_SCROLL_STEP = 20
+
+# the drop of the drag start_card_drag() is running, to be run once that drag has ended
+_dropped: Optional[Callable[[], None]] = None
+
+
+def start_card_drag(card: QtWidgets.QWidget, task: Task, hot_spot: QtCore.QPoint):
+    """Drag `task` out of `card` (the widget it was pressed on) until it is dropped or cancelled.
+
+    A column's drop (see drop_card) may move or delete this very card, so it only
+    runs once the drag's own event loop has returned.
+    """
+    global _dropped
+    mime = QtCore.QMimeData()
+    mime.setData(CARD_MIME, task.id.encode("utf-8"))
+    drag = QtGui.QDrag(card)
+    drag.setMimeData(mime)
+    drag.setPixmap(card.grab())
+    drag.setHotSpot(hot_spot)
+    perf.count("ui.card_drags")
+    drag.exec_(QtCore.Qt.MoveAction)
+    action, _dropped = _dropped, None
+    if action is not None:
+        QtCore.QTimer.singleShot(0, action)
+
+
+def dragged_card(event: QtGui.QDropEvent) -> Optional[str]:
+    """The task id a drag event carries, or None if it isn't a card."""
+    mime = event.mimeData()
+    if not mime.hasFormat(CARD_MIME):
+        return None
+    return bytes(mime.data(CARD_MIME)).decode("utf-8")
+
+
+def drop_card(event: QtGui.QDropEvent, action: Callable[[str], None]):
+    """Accept a dropped card; action(task id) runs once it is safe to move cards (see start_card_drag)."""
+    global _dropped
+    task_id = dragged_card(event)
+    event.acceptProposedAction()
+    if event.source() is not None:
+        _dropped = lambda: action(task_id)
+    else:
+        # dragged from another window of another process: no card of ours to wait for
+        QtCore.QTimer.singleShot(0, lambda: action(task_id))
+
+
+def drag_autoscroll(bar: QtWidgets.QScrollBar, y: int, height: int):
+    """Scroll while a drag hovers near the top or bottom of a viewport `height` pixels high."""
+    if y < DRAG_SCROLL_MARGIN:
+        bar.setValue(bar.value() - DRAG_SCROLL_STEP)
+    elif y > height - DRAG_SCROLL_MARGIN:
+        bar.setValue(bar.value() + DRAG_SCROLL_STEP)
+
+
+class DropMarker(QtWidgets.QFrame):
+    """The line where a dragged card would land; laid over the cards, so moving it relayouts nothing."""
+    def __init__(self, parent: QtWidgets.QWidget):
+        super().__init__(parent)
+        self.setStyleSheet(f"background: {styles.ACCENT}; border-radius: 1px;")
+        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
+        self.hide()
+
+    def show_at(self, y: int, width: int):
+        self.setGeometry(4, y - 1, max(0, width - 8), 3)
+        self.raise_()
+        self.show()
+
+
+class LabelStyle:
+    """Colors for one label, shared by every card that shows it."""
+    __slots__ = ("chip_bg", "chip_fg", "chunk")
+
+    def __init__(self, chip_bg: QtGui.QColor, chip_fg: QtGui.QColor, chunk: QtGui.QColor):
+        self.chip_bg = chip_bg
+        self.chip_fg = chip_fg
+        self.chunk = chunk
+
+# (label id, color) -> LabelStyle; built once per label color instead of one stylesheet per card
+_label_styles: Dict[Tuple[Optional[str], str], LabelStyle] = {}
+
+def label_style(label: Optional[Label]) -> LabelStyle:
+    """The cached LabelStyle for `label` (None = "No Label")."""
+    key = (label.id, label.color) if label else (None, "")
+    style = _label_styles.get(key)
+    if style is None:
+        if label:
+            # drop the entry for this label's previous color
+            for old in [k for k in _label_styles if k[0] == label.id]:
+                del _label_styles[old]
+            color = QtGui.QColor(label.color)
+            style = LabelStyle(color, QtGui.QColor("#ffffff"), color)
+        else:
+            style = LabelStyle(QtGui.QColor(255, 255, 255, 5), QtGui.QColor("#cfd8dc"), QtGui.QColor(styles.ACCENT))
+        _label_styles[key] = style
+    return style
+
+
+class UiFonts:
+    """Fonts for one UI scale step, shared by every widget that shows them."""
+    __slots__ = ("base", "muted", "progress")
+
+    def __init__(self, base: QtGui.QFont, muted: QtGui.QFont, progress: QtGui.QFont):
+        self.base = base
+        self.muted = muted
+        self.progress = progress
+
+# (base, muted, progress) pixel sizes -> UiFonts; built once per scale step
+_ui_fonts: Dict[Tuple[int, int, int], UiFonts] = {}
+_current_fonts: Optional[UiFonts] = None
+
+def ui_fonts(scale: float = 1.0) -> UiFonts:
+    """The cached UiFonts for `scale` (see styles.font_sizes)."""
+    sizes = styles.font_sizes(scale)
+    fonts = _ui_fonts.get(sizes)
+    if fonts is None:
+        made = []
+        for px in sizes:
+            f = QtGui.QFont()
+            f.setPixelSize(px)
+            made.append(f)
+        fonts = _ui_fonts[sizes] = UiFonts(*made)
+    return fonts
+
+def current_fonts() -> UiFonts:
+    """The fonts of the current scale step (see set_ui_fonts)."""
+    return _current_fonts or ui_fonts()
+
+def set_ui_fonts(fonts: UiFonts):
+    """Make `fonts` current and the default font of windows created from now on (dialogs, menus).
+
+    Existing widgets are left alone (apply_fonts and the columns' set_fonts rescale
+    them): QApplication.setFont would send a font change through every widget.
+    """
+    global _current_fonts
+    _current_fonts = fonts
+    QtGui.QGuiApplication.setFont(fonts.base)
+
+def apply_fonts(root: QtWidgets.QWidget, fonts: UiFonts):
+    """Set `fonts` on the widgets under `root`.
+
+    Under the application stylesheet a font set on a parent does not reach its
+    children, so every widget gets its own. Widgets with a set_fonts() method
+    (the columns) rescale their own subtree.
+    """
+    for w in root.findChildren(QtWidgets.QWidget, options=QtCore.Qt.FindDirectChildrenOnly):
+        if hasattr(w, "set_fonts"):
+            w.set_fonts(fonts)
+            continue
+        if isinstance(w, QtWidgets.QProgressBar):
+            w.setFont(fonts.progress)
+        elif isinstance(w, QtWidgets.QLabel) and w.property("class") == "muted":
+            w.setFont(fonts.muted)
+        else:
+            w.setFont(fonts.base)
+        apply_fonts(w, fonts)
+
+
+class ChipLabel(QtWidgets.QLabel):
+    """Label chip that paints its rounded background from a shared LabelStyle (no per-card stylesheet)."""
+    def __init__(self, text: str = ""):
+        super().__init__(text)
+        self.setObjectName("chip")
+        self.label_style = label_style(None)
+
+    def set_label_style(self, style: LabelStyle):
+        if style is not self.label_style:
+            self.label_style = style
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(self.label_style.chip_bg)
+        painter.drawRoundedRect(QtCore.QRectF(self.rect()), 8, 8)
+        painter.setPen(self.label_style.chip_fg)
+        painter.drawText(self.contentsRect(), QtCore.Qt.AlignCenter, self.text())
+
+
+class LabelProgressBar(QtWidgets.QProgressBar):
+    """Progress bar whose chunk color comes from a shared LabelStyle."""
+    TRACK = QtGui.QColor(255, 255, 255, 8)
+
+    def __init__(self):
+        super().__init__()
+        self.setObjectName("labelProgress")
+        self.label_style = label_style(None)
+
+    def set_label_style(self, style: LabelStyle):
+        if style is not self.label_style:
+            self.label_style = style
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.setRenderHint(QtGui.QPainter.Antialiasing)
+        rect = QtCore.QRectF(self.rect())
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(self.TRACK)
+        painter.drawRoundedRect(rect, 6, 6)
+        span = max(1, self.maximum() - self.minimum())
+        frac = (self.value() - self.minimum()) / span
+        if frac > 0:
+            chunk = QtCore.QRectF(rect)
+            chunk.setWidth(max(rect.height(), rect.width() * frac))
+            painter.setBrush(self.label_style.chunk)
+            painter.drawRoundedRect(chunk, 6, 6)
+        if self.isTextVisible():
+            painter.setPen(QtGui.QColor(styles.TEXT))
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, self.text())
+
+class TitleLabel(QtWidgets.QLabel):
+    """Selectable title text that passes ctrl/shift clicks on to the card (for multi-select)."""
+    def mousePressEvent(self, event):
+        if event.modifiers() & (QtCore.Qt.ControlModifier | QtCore.Qt.ShiftModifier):
+            event.ignore()
+            return
+        super().mousePressEvent(event)
 
 class TaskWidget(QtWidgets.QFrame):
-    """A visual card representing a Task with title, label chip, progress bar, and left/right move buttons."""
+    """A visual card representing a Task with title, label chip, progress bar, and left/right move buttons.
+
+    Ctrl-click toggles the card's selection and shift-click extends it (see ColumnWidget.select).
+    """
+    SELECTED_PEN = QtGui.QPen(QtGui.QColor(styles.ACCENT), 2)
+
     def __init__(self, task: Task, label_lookup: Dict[str, Label], on_move: Callable[[Task, str], None], on_update: Callable[[Task], None]):
         super().__init__()
         self.setObjectName("card")
+        perf.count("ui.task_widget.created")
         self.task = task
         self.label_lookup = label_lookup
         self.on_move = on_move
         self.on_update = on_update
+        self.selected = False
+        # where the left button went down, while a drag may still start from there
+        self._press_pos: Optional[QtCore.QPoint] = None
+        # the UiFonts the card is shown with (None: not set yet, see apply_fonts)
+        self.fonts: Optional[UiFonts] = None
         self.setSizePolicy(QtWidgets.QSizePolicy.Minimum, QtWidgets.QSizePolicy.Fixed)
         self._build_ui()
 
@@ -31,7 +279,7 @@ class TaskWidget(QtWidgets.QFrame):
         top.setSpacing(6)
 
         # Title label
-        self.title_label = QtWidgets.QLabel(self.task.title)
+        self.title_label = TitleLabel(self.task.title)
         self.title_label.setProperty("class", "title")
         self.title_label.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
         top.addWidget(self.title_label)
@@ -40,12 +288,14 @@ class TaskWidget(QtWidgets.QFrame):
 
         # Move left button
         self.btn_left = QtWidgets.QPushButton("◀")
+        self.btn_left.setObjectName("move")
         self.btn_left.setToolTip("Move left")
         self.btn_left.clicked.connect(lambda: self._move("left"))
         top.addWidget(self.btn_left)
 
         # Move right button
         self.btn_right = QtWidgets.QPushButton("▶")
+        self.btn_right.setObjectName("move")
         self.btn_right.setToolTip("Move right")
         self.btn_right.clicked.connect(lambda: self._move("right"))
         top.addWidget(self.btn_right)
@@ -55,9 +305,8 @@ class TaskWidget(QtWidgets.QFrame):
         # Label chip row
         label_row = QtWidgets.QHBoxLayout()
         label_row.setSpacing(8)
-        self.chip = QtWidgets.QLabel()
+        self.chip = ChipLabel()
         self.chip.setContentsMargins(4,2,4,2)
-        self.chip.setStyleSheet("border-radius: 8px; padding: 4px 8px;")
         label_row.addWidget(self.chip)
         label_row.addStretch()
         layout.addLayout(label_row)
@@ -65,7 +314,7 @@ class TaskWidget(QtWidgets.QFrame):
         # Progress row: progressbar + slider
         progress_row = QtWidgets.QHBoxLayout()
         progress_row.setSpacing(8)
-        self.progressbar = QtWidgets.QProgressBar()
+        self.progressbar = LabelProgressBar()
         self.progressbar.setRange(0,100)
         self.progressbar.setValue(self.task.progress)
         self.progressbar.setTextVisible(True)
@@ -99,6 +348,16 @@ class TaskWidget(QtWidgets.QFrame):
         # wire delete (external owner will override this attribute)
         self.btn_delete.clicked.connect(lambda: self.on_update_delete())
 
+    def apply_fonts(self, fonts: UiFonts):
+        """Show the card at another UI scale step (nothing to do if it already is)."""
+        if fonts is self.fonts:
+            return
+        self.fonts = fonts
+        # a font set on the card doesn't reach children the app stylesheet has polished
+        for w in (self.title_label, self.btn_left, self.btn_right, self.chip, self.btn_edit, self.btn_delete):
+            w.setFont(fonts.base)
+        self.progressbar.setFont(fonts.progress)
+
     def _move(self, direction: str):
         current_index = [c[0] for c in COLUMN_ORDER].index(self.task.column)
         if direction == "left" and current_index > 0:
@@ -124,44 +383,123 @@ class TaskWidget(QtWidgets.QFrame):
             self.on_update(self.task)
 
     def refresh_label(self, label_lookup: Dict[str, Label]):
-        """Update chip text/color and progressbar color according to the task's label."""
+        """Update chip text/color and progressbar color according to the task's label.
+
+        Colors come from the shared per-label LabelStyle, so this never touches a stylesheet.
+        """
         self.label_lookup = label_lookup
         label = None
         if self.task.label_id:
             label = label_lookup.get(self.task.label_id)
-        if label:
-            self.chip.setText(label.name)
-            # text color: decide white or dark based on color brightness
-            text_color = "#ffffff"
-            self.chip.setStyleSheet(f"border-radius: 8px; padding: 4px 8px; background: {label.color}; color: {text_color};")
-            # style the progressbar chunk to match the label
-            self.progressbar.setStyleSheet(
-                f"QProgressBar {{ background-color: rgba(255,255,255,0.03); border-radius: 6px; height: 16px; }} "
-                f"QProgressBar::chunk {{ background: {label.color}; border-radius: 6px; }}"
-            )
-            # style the arrow buttons: hover outline using label color
-            btn_styles = (
-                "QPushButton {{ border-radius:6px; padding:6px; border:1px solid rgba(255,255,255,0.02); }} "
-                f"QPushButton:hover {{ outline: 2px solid {label.color}; background-color: rgba(255,255,255,0.02); }}"
-            )
-            self.btn_left.setStyleSheet(btn_styles)
-            self.btn_right.setStyleSheet(btn_styles)
-        else:
-            # no label - muted chip
-            self.chip.setText("No Label")
-            self.chip.setStyleSheet("border-radius: 8px; padding: 4px 8px; background: rgba(255,255,255,0.02); color: #cfd8dc;")
-            # default progress chunk
-            self.progressbar.setStyleSheet("")
-            # reset button style
-            base = "QPushButton {{ border-radius:6px; padding:6px; border:1px solid rgba(255,255,255,0.02); }} QPushButton:hover {{ background-color: rgba(255,255,255,0.02); }}"
-            self.btn_left.setStyleSheet(base)
-            self.btn_right.setStyleSheet(base)
+        style = label_style(label)
+        self.chip.setText(label.name if label else "No Label")
+        self.chip.set_label_style(style)
+        self.progressbar.set_label_style(style)
+
+    def bind(self, task: Task, label_lookup: Dict[str, Label], on_move: Callable[[Task, str], None], on_update: Callable[[Task], None]):
+        """Show another task in this card, reusing every child widget."""
+        self.task = task
+        self.label_lookup = label_lookup
+        self.on_move = on_move
+        self.on_update = on_update
+        self.set_selected(False)
+        self.sync()
+
+    def sync(self):
+        """Re-read title, progress and label from the task after it was changed elsewhere."""
+        self.title_label.setText(self.task.title)
+        self.slider.blockSignals(True)
+        self.slider.setValue(self.task.progress)
+        self.slider.blockSignals(False)
+        self.progressbar.setValue(self.task.progress)
+        self.progressbar.setFormat(f"{self.task.progress}%")
+        self.refresh_label(self.label_lookup)
+
+    def set_selected(self, selected: bool):
+        if selected != self.selected:
+            self.selected = selected
+            self.update()
+
+    def mousePressEvent(self, event):
+        mods = event.modifiers()
+        if event.button() == QtCore.Qt.LeftButton and mods & (QtCore.Qt.ControlModifier | QtCore.Qt.ShiftModifier):
+            self.on_select("range" if mods & QtCore.Qt.ShiftModifier else "toggle")
+            return
+        self._press_pos = event.pos() if event.button() == QtCore.Qt.LeftButton else None
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        # dragging the card (anywhere but its controls) reorders it, see ColumnWidget.dropEvent
+        if (self._press_pos is not None and event.buttons() & QtCore.Qt.LeftButton
+                and (event.pos() - self._press_pos).manhattanLength() >= QtWidgets.QApplication.startDragDistance()):
+            hot_spot, self._press_pos = self._press_pos, None
+            start_card_drag(self, self.task, hot_spot)
+            return
+        super().mouseMoveEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.selected:
+            painter = QtGui.QPainter(self)
+            painter.setRenderHint(QtGui.QPainter.Antialiasing)
+            painter.setPen(self.SELECTED_PEN)
+            painter.drawRoundedRect(QtCore.QRectF(self.rect()).adjusted(1, 1, -1, -1), 10, 10)
+
+    def on_select(self, mode: str):
+        """Replaced by the owning ColumnWidget, like on_update_delete."""
+        pass
 
     def on_update_delete(self):
         """A placeholder to be replaced by the owning ColumnWidget when the widget is created."""
         pass
 
 
+class CardPool(QtWidgets.QWidget):
+    """Hidden holder for detached TaskWidgets, re-bound to new tasks instead of building new cards.
+
+    Parked cards stay inside the window (moving a widget out of it walks the whole
+    focus chain). At most `limit` cards are kept; the rest are deleted. hits/misses
+    are also reported as the ui.card_pool.* perf counters.
+    """
+    def __init__(self, parent: QtWidgets.QWidget, limit: int = CARD_POOL_SIZE):
+        super().__init__(parent)
+        self.hide()
+        self.limit = limit
+        self.hits = 0
+        self.misses = 0
+        self._free: List[TaskWidget] = []
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def acquire(self, task: Task, label_lookup: Dict[str, Label], on_move: Callable[[Task, str], None], on_update: Callable[[Task], None]) -> TaskWidget:
+        if self._free:
+            self.hits += 1
+            perf.count("ui.card_pool.hit")
+            widget = self._free.pop()
+            widget.bind(task, label_lookup, on_move, on_update)
+            return widget
+        self.misses += 1
+        perf.count("ui.card_pool.miss")
+        return TaskWidget(task, label_lookup, on_move, on_update)
+
+    def release(self, widget: TaskWidget):
+        """Take back a card that has already been removed from its layout."""
+        if len(self._free) >= self.limit:
+            perf.count("ui.card_pool.dropped")
+            widget.hide()
+            widget.deleteLater()
+            return
+        widget.set_selected(False)
+        widget.setParent(self)
+        self._free.append(widget)
+
+
 class ColumnWidget(QtWidgets.QFrame):
     """A column (TO-DO / IN PROGRESS / DONE) that holds TaskWidgets."""
     def __init__(self, key: str, title: str, label_lookup: Dict[str, Label]):
@@ -170,14 +508,37 @@ class ColumnWidget(QtWidgets.QFrame):
         self.key = key
         self.title = title
         self.label_lookup = label_lookup
+        # task id -> card; the layout holds the display order (see _cards)
         self.task_widgets: Dict[str, TaskWidget] = {}
+        self.on_move: Optional[Callable[[Task, str], None]] = None
+        self.on_update: Optional[Callable[[Task], None]] = None
+        self.on_delete: Optional[Callable[[Task], None]] = None
+        # on_drop(task id, column key, id of the card it was dropped in front of or None for the end)
+        self.on_drop: Optional[Callable[[str, str, Optional[str]], None]] = None
+        # ids the filter bar lets through (None = no filter) and the cards hidden because of it
+        self._filter: Optional[Set[str]] = None
+        self._hidden: Set[str] = set()
+        # selected card ids in selection order, the card shift-click extends from, and
+        # who to tell when the selection changes
+        self.selected: Dict[str, None] = {}
+        self._anchor: Optional[str] = None
+        self.on_selection_changed: Optional[Callable[[], None]] = None
+        # ids of the cards set_fonts hasn't rescaled yet
+        self._rescale_pending: Iterator[str] = iter(())
         self._build_ui()
 
     def _build_ui(self):
         layout = QtWidgets.QVBoxLayout(self)
-        header = QtWidgets.QLabel(self.title)
-        header.setStyleSheet("font-weight: 700; padding: 4px;")
-        layout.addWidget(header)
+        header_row = QtWidgets.QHBoxLayout()
+        self.header = QtWidgets.QLabel(self.title)
+        self.header.setStyleSheet("font-weight: 700; padding: 4px;")
+        header_row.addWidget(self.header)
+        header_row.addStretch()
+        self.select_all_btn = QtWidgets.QPushButton("Select all")
+        self.select_all_btn.setToolTip("Select every (shown) card in this column")
+        self.select_all_btn.clicked.connect(self.select_all)
+        header_row.addWidget(self.select_all_btn)
+        layout.addLayout(header_row)
         layout.addSpacing(6)
 
         self.scroll = QtWidgets.QScrollArea()
@@ -189,26 +550,357 @@ class ColumnWidget(QtWidgets.QFrame):
         self.inner_layout.addStretch()
         self.scroll.setWidget(self.inner)
         layout.addWidget(self.scroll)
+        self.setAcceptDrops(True)
+        self.drop_marker = DropMarker(self.inner)
+        self.pool = CardPool(self)
+        self._rescale_timer = QtCore.QTimer(self)
+        self._rescale_timer.setInterval(0)
+        self._rescale_timer.timeout.connect(self._rescale_slice)
+        self.scroll.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+    def set_callbacks(self, on_move: Callable[[Task,str], None], on_update: Callable[[Task], None], on_delete: Callable[[Task], None]):
+        """Handlers passed to every TaskWidget this column creates."""
+        self.on_move = on_move
+        self.on_update = on_update
+        self.on_delete = on_delete
 
     def set_tasks(self, tasks: List[Task], on_move: Callable[[Task,str], None], on_update: Callable[[Task], None], on_delete: Callable[[Task], None]):
-        """Clear & add tasks for this column."""
-        # clear existing widgets
-        for w in list(self.task_widgets.values()):
-            w.setParent(None)
-        self.task_widgets.clear()
-        # add tasks in order
-        for t in tasks:
-            if t.column != self.key:
+        """Show exactly `tasks` in this column (use add/remove/take/insert for single cards).
+
+        The existing cards are re-bound to the new tasks in place; surplus cards go
+        back to the pool and missing ones come from it.
+        """
+        self.set_callbacks(on_move, on_update, on_delete)
+        tasks = [t for t in tasks if t.column == self.key]
+        self._drop_selection()
+        old = [(w.task.id, w) for w in self._cards()]
+        keep = min(len(old), len(tasks))
+        self.remove_tasks([task_id for task_id, _ in old[keep:]])
+        self.task_widgets = {}
+        self._hidden.clear()
+        for (_, widget), t in zip(old[:keep], tasks):
+            widget.bind(t, self.label_lookup, on_move, on_update)
+            self.task_widgets[t.id] = widget
+            self._set_hidden(t.id, widget, self._filtered_out(t.id))
+        self.add_tasks(tasks[keep:])
+
+    def has_task(self, task_id: str) -> bool:
+        return task_id in self.task_widgets
+
+    def task_ids(self) -> List[str]:
+        """The ids of the cards in display order."""
+        return [w.task.id for w in self._cards()]
+
+    def _cards(self) -> Iterator[TaskWidget]:
+        """The cards in display order, hidden ones included (runs of them sit in pages, see add_tasks)."""
+        for i in range(self.inner_layout.count()):
+            item = self.inner_layout.itemAt(i).widget()
+            if item is None:
+                continue
+            if item.objectName() != "page":
+                yield item
+                continue
+            layout = item.layout()
+            for j in range(layout.count()):
+                yield layout.itemAt(j).widget()
+
+    def next_card(self, task_id: str) -> Optional[str]:
+        """The id of the card right below `task_id` (hidden or not), None for the last one."""
+        widget = self.task_widgets.get(task_id)
+        if widget is None:
+            return None
+        parent = widget.parentWidget()
+        if parent is not self.inner:
+            layout = parent.layout()
+            i = layout.indexOf(widget) + 1
+            if i < layout.count():
+                return layout.itemAt(i).widget().task.id
+            widget = parent
+        i = self.inner_layout.indexOf(widget) + 1
+        item = self.inner_layout.itemAt(i).widget() if i < self.inner_layout.count() else None
+        if item is None:
+            # the stretch at the bottom
+            return None
+        if item.objectName() == "page":
+            item = item.layout().itemAt(0).widget()
+        return item.task.id
+
+    def _make_card(self, task: Task) -> TaskWidget:
+        widget = self.pool.acquire(task, self.label_lookup, self.on_move, self.on_update)
+        self._hook(widget)
+        return widget
+
+    def _hook(self, widget: TaskWidget):
+        """Point the card's delete/select hooks at this column (cards move between columns)
+        and bring the card to the current scale step."""
+        widget.on_update_delete = lambda: self.on_delete(widget.task)
+        widget.on_select = lambda mode: self.select(widget.task.id, mode)
+        widget.apply_fonts(current_fonts())
+
+    def set_fonts(self, fonts: UiFonts):
+        """Change the UI scale step: the header and the cards on screen now, the rest in time slices.
+
+        Only the cards in the viewport are rescaled right away, so the cost of a
+        scale change doesn't grow with the column; the others follow from a QTimer
+        (RESCALE_SLICE_MS per tick), and any the user scrolls to first are done then.
+        """
+        self.header.setFont(fonts.base)
+        self.select_all_btn.setFont(fonts.base)
+        with perf.timed("ui.rescale_visible"):
+            for widget in self._visible_cards():
+                widget.apply_fonts(fonts)
+        self._rescale_pending = iter(list(self.task_widgets))
+        self._rescale_timer.start()
+
+    def _rescale_slice(self):
+        """One QTimer tick of set_fonts: rescale off-screen cards for up to RESCALE_SLICE_MS."""
+        deadline = time.perf_counter() + RESCALE_SLICE_MS / 1000
+        fonts = current_fonts()
+        for task_id in self._rescale_pending:
+            widget = self.task_widgets.get(task_id)
+            if widget is not None:
+                widget.apply_fonts(fonts)
+            if time.perf_counter() >= deadline:
+                return
+        self._rescale_timer.stop()
+
+    def _on_scrolled(self):
+        if self._rescale_timer.isActive():
+            fonts = current_fonts()
+            for widget in self._visible_cards():
+                widget.apply_fonts(fonts)
+
+    def _visible_cards(self) -> List[TaskWidget]:
+        """The shown cards that overlap the viewport, found by bisecting each page on its cards' y."""
+        top = self.scroll.verticalScrollBar().value()
+        bottom = top + self.scroll.viewport().height()
+        cards = []
+        for i in range(self.inner_layout.count()):
+            item = self.inner_layout.itemAt(i).widget()
+            if item is None or item.isHidden():
                 continue
-            widget = TaskWidget(t, self.label_lookup, on_move, on_update)
-            # hook delete handler
-            def make_delete_fn(task_obj):
-                def _delete():
-                    on_delete(task_obj)
-                return _delete
-            widget.on_update_delete = make_delete_fn(t)
+            if item.y() > bottom:
+                break
+            if item.y() + item.height() < top:
+                continue
+            if item.objectName() != "page":
+                cards.append(item)
+                continue
+            layout = item.layout()
+            lo, hi = 0, layout.count()
+            while lo < hi:
+                mid = (lo + hi) // 2
+                card = layout.itemAt(mid).widget()
+                if item.y() + card.y() + card.height() < top:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            for j in range(lo, layout.count()):
+                card = layout.itemAt(j).widget()
+                if item.y() + card.y() > bottom:
+                    break
+                if not card.isHidden():
+                    cards.append(card)
+        return cards
+
+    def add_task(self, task: Task, before: Optional[str] = None) -> TaskWidget:
+        """Create a card for `task` in front of the card `before`, or at the bottom of the column."""
+        widget = self._make_card(task)
+        self.insert_widget(widget, before)
+        return widget
+
+    def add_tasks(self, tasks: List[Task]):
+        """Append many cards at once.
+
+        Showing a widget inside a visible parent costs time proportional to its
+        siblings, so the cards are built inside a hidden "page" widget that is
+        then added (and shown) as one unit.
+        """
+        if not tasks:
+            return
+        page = self._new_page()
+        for t in tasks:
+            widget = self._make_card(t)
             self.task_widgets[t.id] = widget
+            page.layout().addWidget(widget)
+            self._set_hidden(t.id, widget, self._filtered_out(t.id))
+        page.show()
+
+    def _new_page(self) -> QtWidgets.QWidget:
+        """A hidden page at the bottom of the column; show it once its cards are in.
+
+        The page joins the column before the cards do: moving a (pooled or adopted)
+        card in from outside the window walks the whole focus chain, moving it
+        within the window doesn't.
+        """
+        page = QtWidgets.QWidget()
+        page.setObjectName("page")
+        page_layout = QtWidgets.QVBoxLayout(page)
+        page_layout.setContentsMargins(0,0,0,0)
+        page_layout.setSpacing(self.inner_layout.spacing())
+        page.hide()
+        self.inner_layout.insertWidget(self.inner_layout.count()-1, page)
+        return page
+
+    def insert_widgets(self, widgets: List[TaskWidget]):
+        """Adopt many existing cards at once, in one hidden page (see add_tasks)."""
+        if not widgets:
+            return
+        page = self._new_page()
+        for w in widgets:
+            task_id = w.task.id
+            self.task_widgets[task_id] = w
+            self._hook(w)
+            page.layout().addWidget(w)
+            self._set_hidden(task_id, w, self._filtered_out(task_id))
+        page.show()
+
+    def refresh_tasks(self, task_ids: List[str]):
+        """Re-read the given cards from their tasks (after a bulk edit)."""
+        for task_id in task_ids:
+            widget = self.task_widgets.get(task_id)
+            if widget is not None:
+                widget.sync()
+
+    def remove_tasks(self, task_ids: List[str]):
+        for widget in self.take_widgets(task_ids):
+            self.pool.release(widget)
+
+    def insert_widget(self, widget: TaskWidget, before: Optional[str] = None):
+        """Adopt an existing card (e.g. one taken from another column) in front of the card
+        `before`, or at the bottom."""
+        task_id = widget.task.id
+        anchor = self.task_widgets.get(before) if before is not None else None
+        self._hook(widget)
+        self.task_widgets[task_id] = widget
+        if anchor is None:
             self.inner_layout.insertWidget(self.inner_layout.count()-1, widget)
+        else:
+            layout = anchor.parentWidget().layout()
+            layout.insertWidget(layout.indexOf(anchor), widget)
+        # a card taken from another column may have been hidden there
+        self._set_hidden(task_id, widget, self._filtered_out(task_id))
+
+    def move_card(self, task_id: str, before: Optional[str] = None):
+        """Show the card `task_id` in front of the card `before` (None: at the bottom)."""
+        widget = self.take_widget(task_id)
+        if widget is not None:
+            self.insert_widget(widget, before)
+
+    def take_widget(self, task_id: str) -> Optional[TaskWidget]:
+        """Detach a card from this column without destroying it."""
+        widget = self.task_widgets.pop(task_id, None)
+        self._hidden.discard(task_id)
+        if widget is not None:
+            if task_id in self.selected:
+                del self.selected[task_id]
+                widget.set_selected(False)
+                self._selection_changed()
+            parent = widget.parentWidget()
+            if parent is not None and parent.objectName() == "page":
+                parent.layout().removeWidget(widget)
+                # off the page before it is deleted, but still inside the window (see CardPool)
+                widget.setParent(self.inner)
+                if parent.layout().count() == 0:
+                    self.inner_layout.removeWidget(parent)
+                    parent.deleteLater()
+            else:
+                self.inner_layout.removeWidget(widget)
+        return widget
+
+    def take_widgets(self, task_ids: List[str]) -> List[TaskWidget]:
+        """take_widget() for many cards.
+
+        setParent(None) walks the window's whole focus chain, so the cards stay (hidden)
+        children of their old page: adopt them with insert_widgets() or delete them
+        before returning to the event loop.
+        """
+        widgets = [w for w in (self.task_widgets.get(tid) for tid in task_ids) if w is not None]
+        parents = {w.parentWidget() for w in widgets}
+        # toggling cards inside a visible page is slow (see set_filter)
+        for parent in parents:
+            parent.hide()
+        deselected = False
+        for w in widgets:
+            task_id = w.task.id
+            del self.task_widgets[task_id]
+            self._hidden.discard(task_id)
+            if task_id in self.selected:
+                del self.selected[task_id]
+                w.set_selected(False)
+                deselected = True
+            w.parentWidget().layout().removeWidget(w)
+            w.hide()
+        for parent in parents:
+            if parent is not self.inner and parent.layout().count() == 0:
+                self.inner_layout.removeWidget(parent)
+                parent.deleteLater()
+            else:
+                parent.show()
+        if deselected:
+            self._selection_changed()
+        return widgets
+
+    def remove_task(self, task_id: str):
+        """Remove the card for `task_id`, if this column has it, and return it to the pool."""
+        widget = self.take_widget(task_id)
+        if widget is not None:
+            self.pool.release(widget)
+
+    def dragEnterEvent(self, event):
+        if dragged_card(event) is not None:
+            event.acceptProposedAction()
+
+    def dragMoveEvent(self, event):
+        if dragged_card(event) is None:
+            return
+        event.acceptProposedAction()
+        y = self.inner.mapFrom(self, event.pos()).y()
+        before = self._card_below(y)
+        if before is not None:
+            top = self.task_widgets[before].mapTo(self.inner, QtCore.QPoint(0, 0)).y()
+        else:
+            # the stretch below the last card
+            top = self.inner_layout.itemAt(self.inner_layout.count()-1).geometry().top()
+        self.drop_marker.show_at(top - self.inner_layout.spacing() // 2, self.inner.width())
+        viewport = self.scroll.viewport()
+        drag_autoscroll(self.scroll.verticalScrollBar(), viewport.mapFrom(self, event.pos()).y(), viewport.height())
+
+    def dragLeaveEvent(self, event):
+        self.drop_marker.hide()
+
+    def dropEvent(self, event):
+        self.drop_marker.hide()
+        if dragged_card(event) is None or self.on_drop is None:
+            return
+        before = self._card_below(self.inner.mapFrom(self, event.pos()).y())
+        on_drop = self.on_drop
+        drop_card(event, lambda task_id: on_drop(task_id, self.key, before))
+
+    def _card_below(self, y: int) -> Optional[str]:
+        """The first shown card whose middle is below `y` (in self.inner's coordinates); None past the last one."""
+        for i in range(self.inner_layout.count()):
+            item = self.inner_layout.itemAt(i).widget()
+            if item is None or item.isHidden() or item.y() + item.height() < y:
+                continue
+            if item.objectName() != "page":
+                if item.y() + item.height() // 2 > y:
+                    return item.task.id
+                continue
+            layout = item.layout()
+            lo, hi = 0, layout.count()
+            while lo < hi:
+                mid = (lo + hi) // 2
+                card = layout.itemAt(mid).widget()
+                if item.y() + card.y() + card.height() // 2 <= y:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            for j in range(lo, layout.count()):
+                card = layout.itemAt(j).widget()
+                if not card.isHidden():
+                    return card.task.id
+        return None
 
     def refresh_labels(self, label_lookup: Dict[str, Label]):
         """If label colors/names changed, update chips inside each task widget."""
@@ -216,9 +908,114 @@ class ColumnWidget(QtWidgets.QFrame):
         for w in self.task_widgets.values():
             w.refresh_label(label_lookup)
 
+    def refresh_task_labels(self, task_ids: List[str]):
+        """Restyle only the chips of the given cards (after their label changed)."""
+        for task_id in task_ids:
+            widget = self.task_widgets.get(task_id)
+            if widget is not None:
+                widget.refresh_label(self.label_lookup)
+
+    def set_filter(self, ids: Optional[Set[str]]):
+        """Show only the cards whose id is in `ids` (None shows all); cards are hidden, never rebuilt."""
+        self._filter = ids
+        changed = []
+        for task_id, widget in self.task_widgets.items():
+            hide = ids is not None and task_id not in ids
+            if hide != (task_id in self._hidden):
+                changed.append((task_id, widget, hide))
+        if not changed:
+            return
+        # showing a card in a visible parent costs time proportional to its siblings (see
+        # add_tasks), so toggle the cards while their pages are hidden and show each page once
+        parents = {widget.parentWidget() for _, widget, _ in changed}
+        for parent in parents:
+            parent.hide()
+        for task_id, widget, hide in changed:
+            self._set_hidden(task_id, widget, hide)
+        for parent in parents:
+            parent.show()
+
+    def set_task_visible(self, task_id: str, visible: bool):
+        """Re-filter one card after its task changed (the filter itself stays)."""
+        if self._filter is not None:
+            if visible:
+                self._filter.add(task_id)
+            else:
+                self._filter.discard(task_id)
+        widget = self.task_widgets.get(task_id)
+        if widget is not None and visible == (task_id in self._hidden):
+            self._set_hidden(task_id, widget, not visible)
+
+    def select(self, task_id: str, mode: str):
+        """"toggle" one card, or extend the selection over a "range" from the last clicked card."""
+        if task_id not in self.task_widgets:
+            return
+        if mode == "range" and self._anchor in self.task_widgets:
+            order = self.task_ids()
+            a, b = sorted((order.index(self._anchor), order.index(task_id)))
+            for tid in order[a:b + 1]:
+                if tid not in self._hidden:
+                    self._set_selected(tid, True)
+        else:
+            self._set_selected(task_id, task_id not in self.selected)
+        self._anchor = task_id
+        self._selection_changed()
+
+    def select_all(self):
+        for task_id in self.task_widgets:
+            if task_id not in self._hidden:
+                self._set_selected(task_id, True)
+        self._selection_changed()
+
+    def clear_selection(self):
+        if self.selected:
+            self._drop_selection()
+            self._selection_changed()
+
+    def selected_tasks(self) -> List[Task]:
+        """Selected tasks in column order (cards the filter hides are left out)."""
+        if not self.selected:
+            return []
+        return [w.task for w in self._cards() if w.task.id in self.selected and w.task.id not in self._hidden]
+
+    def _set_selected(self, task_id: str, on: bool):
+        if on:
+            self.selected[task_id] = None
+        else:
+            self.selected.pop(task_id, None)
+        self.task_widgets[task_id].set_selected(on)
+
+    def _drop_selection(self):
+        for task_id in self.selected:
+            widget = self.task_widgets.get(task_id)
+            if widget is not None:
+                widget.set_selected(False)
+        self.selected.clear()
+        self._anchor = None
+
+    def _selection_changed(self):
+        if self.on_selection_changed is not None:
+            self.on_selection_changed()
+
+    def _filtered_out(self, task_id: str) -> bool:
+        return self._filter is not None and task_id not in self._filter
+
+    def _set_hidden(self, task_id: str, widget: TaskWidget, hide: bool):
+        widget.setVisible(not hide)
+        if hide:
+            self._hidden.add(task_id)
+        else:
+            self._hidden.discard(task_id)
+
 
 class LabelDialog(QtWidgets.QDialog):
-    """Dialog to add/edit labels. Emits labelsChanged when any modification occurs."""
+    """Dialog to add/edit labels.
+
+    Emits labelChanged(label_id, kind) for every modification, kind being one of
+    LABEL_ADDED / LABEL_RENAMED / LABEL_RECOLORED / LABEL_DELETED, and labelsChanged
+    after it.
+    """
+    labelChanged = QtCore.pyqtSignal(str, str)
     labelsChanged = QtCore.pyqtSignal()
 
     def __init__(self, labels: List[Label], parent=None):
@@ -287,6 +1084,7 @@ class LabelDialog(QtWidgets.QDialog):
         self.color_in.clear()
         self._reload_list()
         # inform listeners
+        self.labelChanged.emit(new_label.id, LABEL_ADDED)
         self.labelsChanged.emit()
 
     def _edit_selected(self):
@@ -299,9 +1097,18 @@ class LabelDialog(QtWidgets.QDialog):
             return
         name = self.name_in.text().strip() or lbl.name
         color = self.color_in.text().strip() or lbl.color
-        lbl.name = name
-        lbl.color = color
+        changes = []
+        if name != lbl.name:
+            lbl.name = name
+            changes.append(LABEL_RENAMED)
+        if color != lbl.color:
+            lbl.color = color
+            changes.append(LABEL_RECOLORED)
+        if not changes:
+            return
         self._reload_list()
+        for kind in changes:
+            self.labelChanged.emit(lid, kind)
         self.labelsChanged.emit()
 
     def _delete_selected(self):
@@ -311,6 +1118,7 @@ class LabelDialog(QtWidgets.QDialog):
         lid = sel.data(QtCore.Qt.UserRole)
         self.labels[:] = [l for l in self.labels if l.id != lid]
         self._reload_list()
+        self.labelChanged.emit(lid, LABEL_DELETED)
         self.labelsChanged.emit()
 
 
@@ -345,3 +1153,105 @@ class LabelPickDialog(QtWidgets.QDialog):
     def _ok(self):
         self.selected_id = self.combo.currentData()
         self.accept()
+
+
+class ArchiveDialog(QtWidgets.QDialog):
+    """The "Archived" view: searches a board's archive and restores tasks from it.
+
+    Results are read from the archive file a page (archive.ARCHIVE_PAGE) at a time,
+    as the list is scrolled to its end or "Load more" is pressed, so opening the
+    view or typing a query never reads more of the archive than is shown.
+    Emits restoreRequested(tasks) with the tasks to put back on the board.
+    """
+    restoreRequested = QtCore.pyqtSignal(list)
+
+    def __init__(self, archive: Archive, label_lookup: Dict[str, Label], parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Archived tasks")
+        self.resize(560, 480)
+        self.archive = archive
+        self.label_lookup = label_lookup
+        self._results: Optional[Iterator[Task]] = None
+        self._exhausted = True
+        self._build_ui()
+        self._search()
+
+    def _build_ui(self):
+        layout = QtWidgets.QVBoxLayout(self)
+        self.query_in = QtWidgets.QLineEdit()
+        self.query_in.setPlaceholderText("Search: words, label:name, progress:20-80")
+        self.query_in.setClearButtonEnabled(True)
+        # every query re-reads the archive, so wait for a pause in typing
+        self._search_timer = QtCore.QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(250)
+        self._search_timer.timeout.connect(self._search)
+        self.query_in.textChanged.connect(lambda _: self._search_timer.start())
+        layout.addWidget(self.query_in)
+
+        self.list_widget = QtWidgets.QListWidget()
+        self.list_widget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+        self.list_widget.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        layout.addWidget(self.list_widget)
+        self.status = QtWidgets.QLabel()
+        layout.addWidget(self.status)
+
+        btns = QtWidgets.QHBoxLayout()
+        self.more_btn = QtWidgets.QPushButton("Load more")
+        self.more_btn.clicked.connect(self._fetch_page)
+        self.restore_btn = QtWidgets.QPushButton("Restore Selected")
+        self.restore_btn.clicked.connect(self._restore_selected)
+        close_btn = QtWidgets.QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        btns.addWidget(self.more_btn)
+        btns.addStretch()
+        btns.addWidget(self.restore_btn)
+        btns.addWidget(close_btn)
+        layout.addLayout(btns)
+
+    def _search(self):
+        if self._results is not None:
+            self._results.close()
+        query = parse_query(self.query_in.text())
+        self._results = self.archive.search(None if query.is_empty() else query, self.label_lookup)
+        self._exhausted = False
+        self.list_widget.clear()
+        self._fetch_page()
+
+    def _fetch_page(self):
+        if self._exhausted:
+            return
+        with perf.timed("ui.archive_page"):
+            page = list(itertools.islice(self._results, ARCHIVE_PAGE))
+        self._exhausted = len(page) < ARCHIVE_PAGE
+        titles = {key: title for key, title in COLUMN_ORDER}
+        for t in page:
+            label = self.label_lookup.get(t.label_id) if t.label_id else None
+            text = f"{t.title}  ·  {label.name if label else 'No label'}  ·  {titles.get(t.column, t.column)}"
+            item = QtWidgets.QListWidgetItem(text)
+            item.setData(QtCore.Qt.UserRole, t)
+            self.list_widget.addItem(item)
+        self.more_btn.setEnabled(not self._exhausted)
+        more = "" if self._exhausted else " (more in the archive)"
+        self.status.setText(f"{self.list_widget.count()} shown{more}")
+
+    def _on_scroll(self, value: int):
+        if value == self.list_widget.verticalScrollBar().maximum():
+            self._fetch_page()
+
+    def _restore_selected(self):
+        items = self.list_widget.selectedItems()
+        if not items:
+            return
+        tasks = [item.data(QtCore.Qt.UserRole) for item in items]
+        for item in items:
+            self.list_widget.takeItem(self.list_widget.row(item))
+        self.restoreRequested.emit(tasks)
+        self.status.setText(f"{len(tasks)} task(s) restored")
+
+    def done(self, result: int):
+        # close the archive file the result stream still holds
+        if self._results is not None:
+            self._results.close()
+            self._results = None
+        super().done(result)
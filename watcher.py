@@ -0,0 +1,137 @@
+# watcher.py
+# Notices when another program rewrites a loaded board's data file and merges its changes in (see sync.py).
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Set, Tuple
+from PyQt5 import QtCore
+import perf
+import storage
+import sync
+from boards import Board, BoardCache
+from savequeue import detach
+
+# file-system events don't arrive for every (network or synced) folder, so also compare
+# the files' mtime and size this often
+WATCH_POLL_MS = 2000
+# wait this long after an event for the writer (e.g. a sync tool) to finish the file
+WATCH_SETTLE_MS = 200
+
+
+class BoardWatcher(QtCore.QObject):
+    """Watches the data files of the loaded JSON boards in `boards`.
+
+    watch() starts tracking a board: from then on its saves refuse to overwrite a
+    changed file (see SaveQueue.disk_state). A change, whether reported by
+    QFileSystemWatcher or found by the poll, is parsed and diffed on a worker
+    thread (sync.read_external); the merge runs on the GUI thread and `merged`
+    reports (board, sync.Changes) so the window only touches those cards.
+    """
+    merged = QtCore.pyqtSignal(object, object)
+    # emitted by the worker: (board, result of the job)
+    _done = QtCore.pyqtSignal(object, object)
+
+    def __init__(self, boards: BoardCache, parent=None):
+        super().__init__(parent)
+        self.boards = boards
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="taskapp-watch")
+        # names of the boards with a job on the worker; a board gets at most one at a time
+        self._busy: Set[str] = set()
+        # board name -> file_state() of a file that couldn't be read, so the poll doesn't re-read it
+        self._unreadable: Dict[str, Tuple[int, int]] = {}
+        self._fs = QtCore.QFileSystemWatcher(self)
+        self._fs.fileChanged.connect(self._schedule)
+        self._fs.directoryChanged.connect(self._schedule)
+        self._settle = QtCore.QTimer(self)
+        self._settle.setSingleShot(True)
+        self._settle.setInterval(WATCH_SETTLE_MS)
+        self._settle.timeout.connect(self.check)
+        self._poll = QtCore.QTimer(self)
+        self._poll.setInterval(WATCH_POLL_MS)
+        self._poll.timeout.connect(self.check)
+        self._poll.start()
+        self._done.connect(self._on_done)
+
+    def watch(self, board: Board):
+        """Track `board` (once it is loaded); boards without a SaveQueue are left alone."""
+        queue = board.queue
+        if queue is None or queue.disk_state is not None:
+            return
+        queue.disk_state = board.backend.loaded_state
+        # the base to diff the file against: the board as loaded, hashed on the worker
+        # (edits made since are in queue.touched, so they win over the file's older ones)
+        self._submit(board, sync.signatures, *detach(board.store.all(), board.labels))
+        self._watch_paths()
+
+    def _watched(self) -> List[Board]:
+        return [b for b in self.boards if b.watched]
+
+    def _watch_paths(self):
+        """Point QFileSystemWatcher at the watched files and their folders.
+
+        The folders catch atomic replaces, which drop the file itself from the watcher.
+        """
+        wanted = set()
+        for board in self._watched():
+            wanted.add(str(board.data_file.parent))
+            if board.data_file.exists():
+                wanted.add(str(board.data_file))
+        current = set(self._fs.files()) | set(self._fs.directories())
+        if current - wanted:
+            self._fs.removePaths(list(current - wanted))
+        if wanted - current:
+            self._fs.addPaths(list(wanted - current))
+
+    def _schedule(self, path: str):
+        # events come in bursts (temp file, rename, our own saves); look once they settle
+        self._settle.start()
+
+    def check(self):
+        """Start reading every watched file that isn't what its board last read or wrote."""
+        self._watch_paths()
+        for board in self._watched():
+            queue = board.queue
+            if board.name in self._busy or queue.writing():
+                # a running write updates disk_state when it ends; the next event or poll looks again
+                continue
+            state = storage.file_state(board.data_file)
+            if state == queue.disk_state or state == self._unreadable.get(board.name):
+                continue
+            perf.count("sync.external_changes")
+            self._submit(board, sync.read_external, board.data_file, queue.disk_sigs)
+
+    def _submit(self, board: Board, job: Callable, *args):
+        self._busy.add(board.name)
+        def run():
+            # worker thread; the signal is queued to the GUI thread
+            try:
+                result = job(*args)
+            except sync.READ_ERRORS as e:
+                result = e
+            self._done.emit(board, result)
+        self._executor.submit(run)
+
+    def _on_done(self, board: Board, result):
+        self._busy.discard(board.name)
+        if not any(b is board for b in self.boards) or not board.watched:
+            # evicted (and closed) while the worker was busy
+            return
+        queue = board.queue
+        if isinstance(result, tuple):
+            # the base from watch(); the file may have changed meanwhile
+            queue.disk_sigs = result
+            self.check()
+        elif isinstance(result, sync.External):
+            self._unreadable.pop(board.name, None)
+            changes = board.merge_external(result)
+            self.merged.emit(board, changes)
+        elif isinstance(result, Exception):
+            # half written or broken: wait until it changes again
+            self._unreadable[board.name] = storage.file_state(board.data_file)
+            perf.count("sync.unreadable")
+        # None: it was being rewritten while we read it; the next event or poll tries again
+
+    def stop(self):
+        """Stop watching and wait for a running job (before the boards are closed)."""
+        self._poll.stop()
+        self._settle.stop()
+        self._executor.shutdown()